@@ -1,23 +1,42 @@
 from __future__ import annotations
+from typing import Optional
 from flask import Flask
 from app.config import Config
+from app.jira import init_jira_client
 from app.errors import register_error_handlers
+from app.metrics import init_metrics
+from app.warmup import check_ready
 from app.routes.robots import robots_bp
 from app.routes.routing import routing_bp
+from app.routes.standard_work import standard_work_bp
+from jira_tools.jira_client import JiraClient
 
-def create_app() -> Flask:
+def create_app(jira_client: Optional[JiraClient] = None) -> Flask:
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    # one long-lived JiraClient per app (pooled connections, credentials resolved once)
+    init_jira_client(app, jira_client)
+
     # blueprints
     app.register_blueprint(robots_bp)
     app.register_blueprint(routing_bp)
+    app.register_blueprint(standard_work_bp)
 
     # error handlers
     register_error_handlers(app)
 
+    # GET /metrics and per-route latency
+    init_metrics(app)
+
     @app.get("/healthz")
     def healthz():
         return {"ok": True}
 
+    @app.get("/readyz")
+    def readyz():
+        # green only once master data is loaded and compiled in this process
+        state = check_ready(app)
+        return state.as_dict(), 200 if state.ready else 503
+
     return app
@@ -0,0 +1,23 @@
+from __future__ import annotations
+import hashlib
+from typing import Any
+from flask import Response, jsonify, request
+
+def strong_etag(*parts: Any) -> str:
+    """Opaque strong validator for the given parts (e.g. attachment id, version, eco)."""
+    raw = "\x1f".join(str(p) for p in parts).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:32]
+
+def conditional_json(etag: str, max_age: int, build) -> Response:
+    """
+    Answer 304 when the request's If-None-Match matches `etag`; otherwise the JSON
+    returned by `build()` (only called on a miss). Both carry the ETag and Cache-Control.
+    """
+    # weak comparison (RFC 7232 3.2): a proxy that compresses the body turns the ETag into W/"..."
+    if request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+    else:
+        resp = jsonify(build())
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = f"public, max-age={max_age}"
+    return resp
@@ -4,3 +4,26 @@ import os
 class Config:
     # Basic Flask settings
     JSON_SORT_KEYS = False  # preserve insertion order (keep operatorComment last, etc.)
+
+    # POST /v1/robots/events:batch
+    EVENTS_BATCH_MAX_KEYS = 200   # issue keys (or JQL matches) per request
+    EVENTS_BATCH_WORKERS = 8      # robots fetched from Jira concurrently
+
+    # POST /v1/robots/resolve:batch
+    RESOLVE_BATCH_MAX_RINS = 20000           # RINs per request
+    RESOLVE_BATCH_STREAM_THRESHOLD = 2000    # above this, answer as JSON lines
+
+    # Cache-Control max-age (seconds) on GET /v1/routing/<robotPid> and GET /v1/robots/resolve;
+    # clients revalidate with If-None-Match afterwards
+    ROUTING_CACHE_MAX_AGE = int(os.getenv("ROUTING_CACHE_MAX_AGE", "300"))
+    RESOLVE_CACHE_MAX_AGE = int(os.getenv("RESOLVE_CACHE_MAX_AGE", "300"))
+
+    # GET /sw/...: static standard work site written by `mes-standard-work build`
+    STANDARD_WORK_SITE_DIR = os.getenv("STANDARD_WORK_SITE_DIR", "var/standard_work_site")
+
+    # GET /readyz: a process that is not warm retries the master data warm-up this often
+    READY_RETRY_SECONDS = float(os.getenv("READY_RETRY_SECONDS", "10"))
+
+    # POST /v1/robots/<issueKey>/events (write-behind outbox)
+    EVENT_OUTBOX_PATH = os.getenv("EVENT_OUTBOX_PATH", "var/event_outbox.sqlite3")
+    EVENT_OUTBOX_WORKERS = int(os.getenv("EVENT_OUTBOX_WORKERS", "4"))   # issues posted concurrently
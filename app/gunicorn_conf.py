@@ -0,0 +1,61 @@
+"""
+gunicorn settings for the API (`run_api.sh`, or `gunicorn -c python:app.gunicorn_conf app.wsgi:app`).
+Every value can be overridden from the environment.
+"""
+import multiprocessing
+import os
+import shutil
+
+def _int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+bind = os.getenv("API_BIND", "0.0.0.0:8000")
+
+# processes x threads; threads overlap the time spent waiting on Jira
+workers = _int("API_WORKERS", min(2 * multiprocessing.cpu_count() + 1, 8))
+worker_class = "gthread"
+threads = _int("API_THREADS", 8)
+
+# import app.wsgi (and warm master data) once in the master, then fork
+preload_app = os.getenv("API_PRELOAD_MASTER_DATA", "1") == "1"
+
+# graceful recycling: each worker is replaced after ~max_requests requests (jittered so
+# they do not all restart together) and gets graceful_timeout to finish in-flight requests
+max_requests = _int("API_MAX_REQUESTS", 5000)
+max_requests_jitter = _int("API_MAX_REQUESTS_JITTER", 500)
+graceful_timeout = _int("API_GRACEFUL_TIMEOUT", 30)
+# above the 30 s Jira timeout, so a slow Jira call is not mistaken for a hung worker
+timeout = _int("API_WORKER_TIMEOUT", 60)
+keepalive = 5
+
+accesslog = os.getenv("API_ACCESS_LOG", "-")
+errorlog = "-"
+
+# a scrape of /metrics reaches one worker, so every worker (and the master, for what it
+# counted while preloading) writes its values here and /metrics merges them
+_METRICS_DIR = os.getenv("API_METRICS_DIR", "var/metrics")
+
+def on_starting(server):
+    # counters start from zero with the server
+    from jira_tools.utils import metrics
+    shutil.rmtree(_METRICS_DIR, ignore_errors=True)
+    metrics.REGISTRY.share(_METRICS_DIR, interval=None)
+
+def pre_fork(server, worker):
+    from jira_tools.utils import metrics
+    metrics.REGISTRY.publish()
+
+def post_fork(server, worker):
+    # a preloaded JiraClient never carries the master's sockets into a worker.
+    # Only an existing client is closed: building one here would raise without Jira
+    # credentials, and gunicorn halts on a worker boot error instead of letting /readyz retry
+    from app.wsgi import app
+    from app.jira import close_jira_client
+    from jira_tools.utils import metrics
+    close_jira_client(app)
+    metrics.REGISTRY.share(_METRICS_DIR)
+
+def child_exit(server, worker):
+    # a recycled worker's counts stay in the totals
+    from jira_tools.utils import metrics
+    metrics.retire(_METRICS_DIR, worker.pid)
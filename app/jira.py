@@ -0,0 +1,40 @@
+from __future__ import annotations
+import threading
+from typing import Optional
+from flask import Flask, current_app
+from jira_tools.jira_client import JiraClient
+
+_EXTENSION_KEY = "jira_client"
+_lock = threading.Lock()
+
+def init_jira_client(app: Flask, client: Optional[JiraClient] = None) -> None:
+    """
+    Attach the app's long-lived JiraClient. With no `client`, one is built on first use,
+    so the app can start without Jira credentials.
+    Credentials are resolved once per process and re-resolved only when Jira answers 401.
+    """
+    if client is not None:
+        app.extensions[_EXTENSION_KEY] = client
+
+def get_jira_client() -> JiraClient:
+    """
+    Return the JiraClient shared by every request handled by this app.
+    """
+    ext = current_app.extensions
+    client = ext.get(_EXTENSION_KEY)
+    if client is None:
+        with _lock:
+            client = ext.get(_EXTENSION_KEY)
+            if client is None:
+                client = JiraClient()
+                ext[_EXTENSION_KEY] = client
+    return client
+
+def close_jira_client(app: Flask) -> None:
+    """
+    Drop the pooled connections of the app's JiraClient, if one was built; it reconnects lazily.
+    Used around fork, so a worker never shares the master's sockets; never builds a client.
+    """
+    client = app.extensions.get(_EXTENSION_KEY)
+    if client is not None:
+        client.close()
@@ -0,0 +1,33 @@
+from __future__ import annotations
+import time
+from flask import Flask, Response, g, request
+from jira_tools.utils import metrics
+
+HTTP_LATENCY = metrics.histogram(
+    "http_request_duration_seconds", "API request latency by route.", ("method", "route", "status"))
+
+def init_metrics(app: Flask) -> None:
+    """
+    Time every request by its route rule (e.g. /v1/robots/<issueKey>/events) and serve
+    the metrics at GET /metrics in Prometheus text format: this process's, or every
+    worker's under gunicorn (see `Registry.share`).
+    Streamed responses are timed up to their first byte.
+    """
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _observe(response):
+        start = g.pop("metrics_start", None)
+        if start is not None:
+            rule = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+            HTTP_LATENCY.observe(
+                time.perf_counter() - start,
+                method=request.method, route=rule, status=str(response.status_code),
+            )
+        return response
+
+    @app.get("/metrics")
+    def metrics_endpoint():
+        return Response(metrics.REGISTRY.render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,38 @@
+from __future__ import annotations
+import threading
+from flask import current_app
+from app.jira import get_jira_client
+from jira_tools.services.outbox import EventOutbox
+from jira_tools.utils import metrics
+
+_EXTENSION_KEY = "event_outbox"
+_lock = threading.Lock()
+
+def get_event_outbox() -> EventOutbox:
+    """
+    Return this app's event outbox, opening it and starting its workers on first use.
+    Events left pending by a previous run are posted once it starts.
+    """
+    ext = current_app.extensions
+    outbox = ext.get(_EXTENSION_KEY)
+    if outbox is None:
+        with _lock:
+            outbox = ext.get(_EXTENSION_KEY)
+            if outbox is None:
+                outbox = EventOutbox(
+                    current_app.config["EVENT_OUTBOX_PATH"],
+                    get_jira_client(),
+                    workers=current_app.config["EVENT_OUTBOX_WORKERS"],
+                ).start()
+                ext[_EXTENSION_KEY] = outbox
+                metrics.callback(
+                    "event_outbox_events", "Events in the local outbox: pending (not yet in Jira) or failed (parked).",
+                    "gauge", _outbox_gauge(outbox), ("state",),
+                )
+    return outbox
+
+def _outbox_gauge(outbox: EventOutbox):
+    def read():
+        stats = outbox.stats()
+        return {("pending",): stats["pending"], ("failed",): stats["failed"]}
+    return read
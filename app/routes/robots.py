@@ -1,5 +1,13 @@
 from __future__ import annotations
-from flask import Blueprint, request, jsonify, current_app
+import json
+from flask import Blueprint, Response, request, jsonify, current_app
+from app.caching import conditional_json, strong_etag
+from app.jira import get_jira_client
+from app.outbox import get_event_outbox
+from jira_tools.services.errors import NotFoundError
+from jira_tools.services.events import get_event_history_for, get_event_histories_for
+from jira_tools.services.http import JiraHttpError
+from jira_tools.services.robot_lookup import ROBOT_INDEX, lookup_robot_pid, lookup_robot_pids
 
 robots_bp = Blueprint("robots", __name__, url_prefix="/v1/robots")
 
@@ -7,19 +15,89 @@ robots_bp = Blueprint("robots", __name__, url_prefix="/v1/robots")
 def resolve_robot():
     """
     Body: { "rin": "<RIN string>" }
-    Response: { "robotPid": "<production id>" }
+    Response: { "robotPid": "<production id>" }, with the same ETag as GET /resolve
     """
     payload = request.get_json(silent=True) or {}
     rin = payload.get("rin")
     if not isinstance(rin, str) or not rin.strip():
         return jsonify({"error": "BadRequest", "detail": "rin (string) is required"}), 400
 
-    # Next step: wire to helper, e.g.:
-    # from jira_tools.services.access_robot import lookup_robot
-    # robot_pid = lookup_robot({"rin": rin}, mrr_issue_key=current_app.config["MASTER_ROBOT_ISSUE_KEY"])
-    # return jsonify({"robotPid": robot_pid})
+    try:
+        robot_pid, etag = _resolve(rin)
+    except NotFoundError as e:
+        return jsonify({"error": "NotFound", "detail": str(e)}), 404
+    except (JiraHttpError, ValueError) as e:
+        err, status = _master_data_error(e)
+        return jsonify(err), status
+    resp = jsonify({"robotPid": robot_pid})
+    resp.set_etag(etag)
+    return resp
+
+@robots_bp.get("/resolve")
+def resolve_robot_get():
+    """
+    Query: ?rin=<RIN string>
+    Response: { "robotPid": "<production id>" }
+    Cacheable: strong ETag from the Master Robot Record version and the RIN -> robotPid pair;
+    a matching If-None-Match is answered 304 without a body.
+    """
+    rin = request.args.get("rin", "")
+    if not rin.strip():
+        return jsonify({"error": "BadRequest", "detail": "rin (query parameter) is required"}), 400
+
+    try:
+        robot_pid, etag = _resolve(rin)
+    except NotFoundError as e:
+        return jsonify({"error": "NotFound", "detail": str(e)}), 404
+    except (JiraHttpError, ValueError) as e:
+        err, status = _master_data_error(e)
+        return jsonify(err), status
+    return conditional_json(etag, current_app.config["RESOLVE_CACHE_MAX_AGE"], lambda: {"robotPid": robot_pid})
 
-    return jsonify({"error": "NotImplemented", "detail": "resolve_robot not wired yet"}), 501
+def _resolve(rin: str):
+    """(robotPid, ETag) for a RIN; the ETag changes with the Master Robot Record version."""
+    client = get_jira_client()
+    robot_pid = lookup_robot_pid({"rin": rin}, client)
+    return robot_pid, strong_etag(*ROBOT_INDEX.version(client), rin, robot_pid)
+
+@robots_bp.post("/resolve:batch")
+def resolve_robots_batch():
+    """
+    Body: { "rins": ["<RIN>", ...] }
+    Response: { <RIN>: "<robotPid>" | { error, detail } }
+    With `Accept: application/x-ndjson` (or above RESOLVE_BATCH_STREAM_THRESHOLD RINs)
+    the answer is streamed as JSON lines: { "rin", "robotPid" } or { "rin", "error", "detail" }.
+    All RINs are answered from a single load of the Master Robot Record.
+    """
+    payload = request.get_json(silent=True) or {}
+    rins = payload.get("rins")
+    if not isinstance(rins, list) or not all(isinstance(r, str) and r.strip() for r in rins):
+        return jsonify({"error": "BadRequest", "detail": "rins must be a list of non-empty strings"}), 400
+    max_rins = current_app.config["RESOLVE_BATCH_MAX_RINS"]
+    if len(rins) > max_rins:
+        return jsonify({"error": "BadRequest", "detail": f"at most {max_rins} RINs per batch"}), 400
+
+    try:
+        resolved = lookup_robot_pids(rins, get_jira_client())
+    except (JiraHttpError, ValueError) as e:
+        err, status = _master_data_error(e)
+        return jsonify(err), status
+
+    def not_found(rin):
+        return {"error": "NotFound", "detail": f"RIN '{rin}' not found in Master Robot Record."}
+
+    stream = (
+        request.accept_mimetypes.best == "application/x-ndjson"
+        or len(rins) > current_app.config["RESOLVE_BATCH_STREAM_THRESHOLD"]
+    )
+    if stream:
+        def lines():
+            for rin, pid in resolved.items():
+                row = {"rin": rin, "robotPid": pid} if pid is not None else {"rin": rin, **not_found(rin)}
+                yield json.dumps(row) + "\n"
+        return Response(lines(), mimetype="application/x-ndjson")
+
+    return jsonify({rin: pid if pid is not None else not_found(rin) for rin, pid in resolved.items()})
 
 @robots_bp.get("/<issueKey>/events")
 def robot_events(issueKey: str):
@@ -29,10 +107,93 @@ def robot_events(issueKey: str):
                   timestamp, robotStatus, productionStatus, operatorComment } ... ]
     (All fields present; use None for not-applicable; operatorComment last)
     """
+    try:
+        events = get_event_history_for(issueKey, get_jira_client())
+    except JiraHttpError as e:
+        err, status = _jira_error(e)
+        return jsonify(err), status
+    return jsonify(events)
 
-    # Next step: wire to helper, e.g.:
-    # from jira_tools.services.access_robot import build_robot_history
-    # events = build_robot_history(issueKey)
-    # return jsonify(events)
+@robots_bp.post("/<issueKey>/events")
+def post_robot_event(issueKey: str):
+    """
+    Path: /v1/robots/<issueKey>/events
+    Body: { "eventType": "OPERATION_COMPLETE", "timestamp"?: ISO-8601, <event fields>... }
+    Response (202): { "outboxId": <int>, "queueDepth": <pending events for this robot> }
+    Answered once the event is committed to the local outbox; it is posted to Jira in the background,
+    in order with the robot's other events, and shows up in the history after that.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "BadRequest", "detail": "body must be a JSON object"}), 400
+    outbox = get_event_outbox()
+    try:
+        outbox_id = outbox.enqueue_event(issueKey, payload)
+    except ValueError as e:
+        return jsonify({"error": "UnprocessableEntity", "detail": str(e)}), 422
+    return jsonify({"outboxId": outbox_id, "queueDepth": outbox.depth(issueKey)}), 202
+
+@robots_bp.get("/events:outbox")
+def robot_events_outbox():
+    """
+    Response: { pending, failed, inFlight, oldestPendingAgeSeconds }
+    """
+    return jsonify(get_event_outbox().stats())
+
+@robots_bp.post("/events:batch")
+def robot_events_batch():
+    """
+    Body: { "issueKeys": ["POPS-1", ...] }  or  { "jql": "<JQL filter>" }
+    Response: { "results": { <issueKey>: [ events... ] },
+                "errors":  { <issueKey>: { error, detail } } }
+    Histories are fetched concurrently; one failing robot does not fail the batch.
+    """
+    payload = request.get_json(silent=True) or {}
+    keys = payload.get("issueKeys")
+    jql = payload.get("jql")
+    max_keys = current_app.config["EVENTS_BATCH_MAX_KEYS"]
+    if (keys is None) == (jql is None):
+        return jsonify({"error": "BadRequest", "detail": "exactly one of issueKeys (list) or jql (string) is required"}), 400
+
+    client = get_jira_client()
+    if jql is not None:
+        if not isinstance(jql, str) or not jql.strip():
+            return jsonify({"error": "BadRequest", "detail": "jql must be a non-empty string"}), 400
+        try:
+            # one key past the limit tells a too-broad query apart from one that fits exactly
+            keys = client.search_issue_keys(jql, max_results=max_keys + 1)
+        except JiraHttpError as e:
+            err, status = _jira_error(e)
+            return jsonify(err), status
+        if len(keys) > max_keys:
+            return jsonify({"error": "BadRequest", "detail": f"jql matches more than {max_keys} issues; narrow the query"}), 400
+    elif not isinstance(keys, list) or not all(isinstance(k, str) and k.strip() for k in keys):
+        return jsonify({"error": "BadRequest", "detail": "issueKeys must be a list of non-empty strings"}), 400
+    if len(keys) > max_keys:
+        return jsonify({"error": "BadRequest", "detail": f"at most {max_keys} issue keys per batch"}), 400
+
+    histories, errors = get_event_histories_for(
+        keys, client, max_workers=current_app.config["EVENTS_BATCH_WORKERS"],
+    )
+    return jsonify({
+        "results": histories,
+        "errors": {key: _jira_error(e)[0] for key, e in errors.items()},
+    })
 
-    return jsonify({"error": "NotImplemented", "detail": "robot_events not wired yet"}), 501
+def _jira_error(e: Exception):
+    """Map a Jira/client failure to our error body and HTTP status."""
+    status = getattr(getattr(e, "response", None), "status_code", None)
+    if status == 404:
+        return {"error": "NotFound", "detail": str(e)}, 404
+    if isinstance(e, JiraHttpError):
+        return {"error": "JiraError", "detail": str(e)}, 502
+    return {"error": type(e).__name__, "detail": str(e)}, 500
+
+def _master_data_error(e: Exception):
+    """
+    Loading master data failed: a Jira error (even a 404 means the configured master issue is gone),
+    or missing configuration / a malformed record. Either way a server fault, never "RIN not found".
+    """
+    if isinstance(e, JiraHttpError):
+        return {"error": "JiraError", "detail": str(e)}, 502
+    return {"error": "MasterDataError", "detail": str(e)}, 500
@@ -1,5 +1,9 @@
 from __future__ import annotations
 from flask import Blueprint, jsonify, current_app
+from app.caching import conditional_json, strong_etag
+from app.jira import get_jira_client
+from jira_tools.services.http import JiraHttpError
+from jira_tools.services.routing import ROUTING_STORE
 
 # flask blueprints are used to organize routes and logic
 # url prefix ensures all routes in the blueprint are grouped under base URL
@@ -10,10 +14,22 @@ def get_routing(robotPid: str):
     """
     Path: /v1/routing/<robotPid>
     Response: routing record JSON (selected by highest semver covering effectivity)
+    Carries a strong ETag (master routing attachment id + the record's version and eco);
+    a matching If-None-Match is answered 304 without a body.
     """
+    try:
+        master = ROUTING_STORE.get(get_jira_client())
+    except JiraHttpError as e:
+        return jsonify({"error": "JiraError", "detail": str(e)}), 502
+    except (LookupError, ValueError) as e:
+        # missing configuration, malformed attachment, snapshot or table mismatch: a server fault
+        return jsonify({"error": "MasterDataError", "detail": str(e)}), 500
+    try:
+        record = master.index.resolve(robotPid)
+    except LookupError as e:
+        return jsonify({"error": "NotFound", "detail": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"error": "BadRequest", "detail": str(e)}), 400
 
-    # from jira_tools.services.access_robot import fetch_routing
-    # record = fetch_routing(robotPid, mroute_issue_key=current_app.config["MASTER_ROUTING_ISSUE_KEY"])
-    # return jsonify(record)
-
-    return jsonify({"error": "NotImplemented", "detail": "get_routing not wired yet"}), 501
+    etag = strong_etag(master.version[0], record.get("version"), record.get("eco"))
+    return conditional_json(etag, current_app.config["ROUTING_CACHE_MAX_AGE"], lambda: record)
@@ -0,0 +1,45 @@
+from __future__ import annotations
+import mimetypes
+import os
+from flask import Blueprint, abort, current_app, request, send_file
+from werkzeug.security import safe_join
+from jira_tools.services.image_derivatives import IMAGES_MANIFEST
+from jira_tools.services.standard_work import ASSETS_DIR, MANIFEST
+
+# pre-rendered work instructions (`mes-standard-work build`), for station tablets
+standard_work_bp = Blueprint("standard_work", __name__, url_prefix="/sw")
+
+# content-hashed names never change content
+_IMMUTABLE = "public, max-age=31536000, immutable"
+# pages keep their URL; revalidated with If-None-Match on every load (304 when unchanged)
+_REVALIDATE = "no-cache"
+
+@standard_work_bp.get("/", defaults={"path": "index.html"})
+@standard_work_bp.get("/<path:path>")
+def standard_work_file(path: str):
+    """
+    Path: /sw/<page or asset path>
+    Serves the .br or .gz copy when the client accepts it, with Vary: Accept-Encoding.
+    """
+    if path in (MANIFEST, IMAGES_MANIFEST) or path.endswith((".gz", ".br", ".tmp")):
+        abort(404)
+    full = safe_join(current_app.config["STANDARD_WORK_SITE_DIR"], path)
+    if full is None or not os.path.isfile(full):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if mimetype.startswith("text/"):
+        mimetype += "; charset=utf-8"
+    variants = [(name, full + suffix) for name, suffix in (("br", ".br"), ("gzip", ".gz"))
+                if os.path.isfile(full + suffix)]
+    encoding = next((name for name, _ in variants if request.accept_encodings[name]), None)
+    if encoding:
+        full = dict(variants)[encoding]
+
+    resp = send_file(os.path.abspath(full), mimetype=mimetype, conditional=True, etag=True)
+    if encoding:
+        resp.headers["Content-Encoding"] = encoding
+    if variants:
+        resp.vary.add("Accept-Encoding")
+    resp.headers["Cache-Control"] = _IMMUTABLE if path.startswith(f"{ASSETS_DIR}/") else _REVALIDATE
+    return resp
@@ -0,0 +1,71 @@
+from __future__ import annotations
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+from flask import Flask
+from app.jira import get_jira_client
+from jira_tools.services import master_data, robot_lookup
+from jira_tools.services import routing
+
+log = logging.getLogger(__name__)
+
+_EXTENSION_KEY = "warmup"
+
+@dataclass
+class WarmupState:
+    ready: bool = False
+    warmed_at: Optional[float] = None   # wall clock of the last successful warm-up
+    seconds: Optional[float] = None     # how long it took
+    error: Optional[str] = None         # why the last attempt failed
+    last_attempt: float = 0.0           # monotonic
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "warmedAt": self.warmed_at, "seconds": self.seconds, "error": self.error}
+
+def warmup_state(app: Flask) -> WarmupState:
+    return app.extensions.setdefault(_EXTENSION_KEY, WarmupState())
+
+def warm_caches(app: Flask) -> bool:
+    """
+    Load and compile the master data the scan path needs: the RIN -> robotPid index
+    and the RoutingIndex. Run in the WSGI master before forking (see app/wsgi.py), so every
+    worker starts warm and shares those pages copy-on-write.
+    Returns True when the caches are warm; failures are recorded for /readyz, not raised.
+    The shared JiraClient stays open (a serving worker retries through here); the pre-fork
+    caller closes it.
+    """
+    state = warmup_state(app)
+    with state._lock, app.app_context():
+        state.last_attempt = time.monotonic()
+        start = time.perf_counter()
+        try:
+            client = get_jira_client()
+            snapshot = master_data.data_source(client) == master_data.SOURCE_SNAPSHOT
+            if snapshot or client.config.master_robot_issue_key:
+                robot_lookup.ROBOT_INDEX.get_map(client)
+            if snapshot or client.config.master_routing_issue_key:
+                routing.ROUTING_STORE.get(client)
+        except Exception as e:
+            state.ready = False
+            state.error = f"{type(e).__name__}: {e}"
+            log.warning(f"Master data warm-up failed: {state.error}")
+        else:
+            state.ready = True
+            state.error = None
+            state.warmed_at = time.time()
+            state.seconds = round(time.perf_counter() - start, 3)
+            log.info(f"Master data warm in {state.seconds}s")
+    return state.ready
+
+def check_ready(app: Flask) -> WarmupState:
+    """
+    Readiness for /readyz. A process that is not warm retries the warm-up,
+    at most once every READY_RETRY_SECONDS, so a Jira outage at boot heals on its own.
+    """
+    state = warmup_state(app)
+    if not state.ready and time.monotonic() - state.last_attempt >= app.config["READY_RETRY_SECONDS"]:
+        warm_caches(app)
+    return state
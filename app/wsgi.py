@@ -0,0 +1,24 @@
+"""
+Production WSGI entry point.
+
+    gunicorn -c python:app.gunicorn_conf app.wsgi:app
+
+With `preload_app` (the default in app/gunicorn_conf.py), this module is imported once in
+the master: master data is loaded and compiled here, then every forked worker shares it.
+"""
+from __future__ import annotations
+import gc
+import os
+from app.api import create_app
+from app.jira import close_jira_client
+from app.warmup import warm_caches
+
+app = create_app()
+
+if os.getenv("API_PRELOAD_MASTER_DATA", "1") == "1":
+    warm_caches(app)
+    # pooled sockets must not be inherited by forked workers; each reconnects lazily
+    close_jira_client(app)
+    # keep the warm objects out of the collector's reach: a GC pass in a worker would
+    # otherwise touch (and so copy) every page holding them
+    gc.freeze()
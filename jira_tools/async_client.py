@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import random
+import time
+log = logging.getLogger(__name__)
+
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional
+from urllib.parse import urlencode
+from jira_tools.config.config import Config
+from jira_tools.config.credentials import load_credentials
+from jira_tools.services.http import (
+    COMMENT_ORDERS,
+    JIRA_COALESCED,
+    RETRY_METHODS,
+    RETRY_STATUSES,
+    JiraHttpError,
+    coalesce_key,
+    endpoint_label,
+    record_jira_call,
+)
+from jira_tools.utils.adf import build_adf_comment_body, parse_adf_comment
+from jira_tools.utils.singleflight import AsyncSingleFlight
+
+try:
+    import httpx
+except Exception:
+    httpx = None  # async client is optional; install the `async` extra to use it
+
+class AsyncJiraClient:
+    """
+    asyncio counterpart of JiraClient with the same surface as JiraClientProtocol.
+    - One pooled `httpx.AsyncClient` (keep-alive) per client
+    - At most `max_concurrency` Jira calls in flight, across every coroutine using the client
+    - GETs are retried on connection errors and 5xx with jittered exponential backoff
+    Use as `async with AsyncJiraClient() as client: ...` so the pool is closed.
+    """
+    def __init__(
+        self,
+        config: Config | None = None,
+        *,
+        base_url: str | None = None,
+        max_concurrency: int = 10,
+        pool_size: int = 20,
+        max_retries: int = 3,
+        backoff_factor: float = 0.3,
+        backoff_jitter: float = 0.2,
+        timeout: float = 30.0,
+        coalesce: bool = True,
+    ):
+        if httpx is None:
+            raise RuntimeError("AsyncJiraClient requires httpx (pip install 'brain-bot-factory[async]').")
+        # no prompts by default
+        self.config = config or Config.from_providers(allow_prompt=False)
+        # only credentials we resolved ourselves are re-resolved on 401
+        self._owns_credentials = config is None
+        # `base_url` lets tests point the client at a local fake Jira
+        self.base_url = base_url or self.config.base_url
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_jitter = backoff_jitter
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # concurrent identical GETs share one call; see `_get_json`
+        self.single_flight: Optional[AsyncSingleFlight] = AsyncSingleFlight() if coalesce else None
+        self._http = httpx.AsyncClient(
+            auth=(self.config.jira_email, self.config.jira_api_token),
+            headers=self.config.default_headers,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            timeout=timeout,
+            follow_redirects=True,
+        )
+
+    async def __aenter__(self) -> "AsyncJiraClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Release pooled connections."""
+        await self._http.aclose()
+
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        json_payload: Optional[Any] = None,
+        *,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> "httpx.Response":
+        """
+        Perform an HTTP request to the Jira API.
+        Raises:
+            JiraHttpError: If Jira responds with a 4xx/5xx status code.
+        """
+        url = f"{self.base_url}{endpoint}"
+        kwargs: Dict[str, Any] = {"headers": headers, "json": json_payload}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        retries = self.max_retries if method in RETRY_METHODS else 0
+        attempt = 0
+        token = self.config.jira_api_token
+        refreshed = False
+        start = time.perf_counter()
+        while True:
+            try:
+                async with self._semaphore:
+                    resp = await self._http.request(method, url, **kwargs)
+            except httpx.TransportError:
+                if attempt >= retries:
+                    record_jira_call(method, endpoint, "error", time.perf_counter() - start)
+                    raise
+            else:
+                if resp.status_code == 401 and not refreshed and await self.refresh_credentials(token):
+                    refreshed = True
+                    continue
+                if resp.status_code not in RETRY_STATUSES or attempt >= retries:
+                    break
+            # back off outside the semaphore so waiting retries don't hold a slot
+            await asyncio.sleep(self.backoff_factor * (2 ** attempt) + random.uniform(0, self.backoff_jitter))
+            attempt += 1
+
+        record_jira_call(method, endpoint, resp.status_code, time.perf_counter() - start, len(resp.content))
+        if resp.is_error:
+            raise JiraHttpError(
+                f"Jira API {method} request failed: {resp.status_code} - {resp.text}",
+                response=resp,
+            )
+        return resp
+
+    async def refresh_credentials(self, stale_token: str | None = None) -> bool:
+        """
+        asyncio version of `JiraClient.refresh_credentials`; the keyring read runs in a worker thread.
+        Returns True if the client now holds different credentials.
+        """
+        if not self._owns_credentials:
+            return False
+        if stale_token is not None and stale_token != self.config.jira_api_token:
+            return True
+        creds = await asyncio.to_thread(load_credentials, refresh=True)
+        if (creds.email, creds.api_token) == (self.config.jira_email, self.config.jira_api_token):
+            return False
+        self.config.jira_email = creds.email
+        self.config.jira_api_token = creds.api_token
+        self._http.auth = (creds.email, creds.api_token)
+        return True
+
+    async def _get_json(self, endpoint: str, **kwargs) -> Any:
+        if self.single_flight is None:
+            return (await self._request("GET", endpoint, **kwargs)).json()
+
+        async def fetch() -> Any:
+            return (await self._request("GET", endpoint, **kwargs)).json()
+
+        result, shared = await self.single_flight.do(coalesce_key("GET", endpoint, kwargs.get("headers")), fetch)
+        if shared:
+            JIRA_COALESCED.inc(endpoint=endpoint_label(endpoint))
+        return result
+
+    async def get_issue_data(self, issue_key: str) -> Dict[str, Any]:
+        """
+        Fetches data attached to a Jira issue (i.e. a Robot Record)
+        """
+        return await self._get_json(f"{issue_key}")
+
+    async def get_attachments(self, issue_key: str) -> List[Dict[str, Any]]:
+        # Only ask Jira for the attachment field; the full issue is much heavier
+        data = await self._get_json(f"{issue_key}?fields=attachment")
+        attachments = (data.get("fields", {}).get("attachment")) or []
+        if not attachments:
+            raise ValueError("No attachments found.")
+        return attachments
+
+    async def get_attachment_content(self, attachment_id: str) -> Dict[str, Any]:
+        """
+        Downloads a JSON attachment by id.
+        """
+        return await self._get_json(f"../attachment/content/{attachment_id}", timeout=30)
+
+    async def get_nth_attachment(self, n: int, issue_key: str) -> Dict[str, Any]:
+        attachments = await self.get_attachments(issue_key)
+        return await self.get_attachment_content(attachments[n]["id"])
+
+    async def get_comment_page(
+        self,
+        issue_key: str,
+        start_at: int = 0,
+        max_results: int = 100,
+        order: str = "created",
+    ) -> Dict[str, Any]:
+        """
+        Fetches one raw page of comments from a Jira issue
+        """
+        if order not in COMMENT_ORDERS:
+            raise ValueError(f"order must be one of {sorted(COMMENT_ORDERS)}; got '{order}'.")
+        params = urlencode({"startAt": start_at, "maxResults": max_results, "orderBy": order})
+        return await self._get_json(f"{issue_key}/comment?{params}")
+
+    async def iter_comments(
+        self,
+        issue_key: str,
+        page_size: int = 100,
+        order: str = "created",
+        raw: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streams comments from a Jira issue, walking Jira pagination.
+        The next page is requested while the current one is being consumed.
+        """
+        page = await self.get_comment_page(issue_key, 0, page_size, order)
+        while True:
+            comments = page.get("comments", [])
+            start_at = page.get("startAt", 0) + len(comments)
+            has_more = bool(comments) and start_at < page.get("total", 0)
+            pending = (
+                asyncio.ensure_future(self.get_comment_page(issue_key, start_at, page_size, order))
+                if has_more else None
+            )
+            try:
+                for c in comments:
+                    yield c if raw else parse_adf_comment(c)
+            except BaseException:
+                if pending:
+                    pending.cancel()
+                raise
+            if not pending:
+                return
+            page = await pending
+
+    async def get_comments(self, issue_key: str) -> List[Dict[str, Any]]:
+        """
+        Gets all comments from an existing Jira issue
+        """
+        return [c async for c in self.iter_comments(issue_key)]
+
+    async def add_comment(self, issue_key: str, comment_text: str = "This is a default comment.") -> Dict[str, Any]:
+        """
+        Posts a comment to an existing Jira issue.
+        """
+        payload = build_adf_comment_body(comment_text)
+        return (await self._request("POST", f"{issue_key}/comment", payload)).json()
+
+    async def delete_last_comment(self, issue_key: str) -> None:
+        """
+        Deletes the most recent comment from a Jira issue.
+        Note: Authenticated user must have delete permissions in Jira
+        """
+        comments = await self.get_comments(issue_key)
+        if not comments:
+            return
+        comment_id = max(comments, key=lambda c: c["created"])["id"]
+        await self._request("DELETE", f"{issue_key}/comment/{comment_id}")
+        log.info(f"Deleted comment ID {comment_id} from issue {issue_key}.")
@@ -1,12 +1,12 @@
+from __future__ import annotations
 import os
-from dotenv import load_dotenv
 from dataclasses import dataclass
-from requests.auth import HTTPBasicAuth
+from typing import TYPE_CHECKING
 
 from jira_tools.config.credentials import load_credentials, Credentials
 
-# Load environment variables for local/dev usage only (harmless in prod)
-load_dotenv()
+if TYPE_CHECKING:
+    from requests.auth import HTTPBasicAuth
 
 @dataclass
 class Config:
@@ -15,9 +15,13 @@ class Config:
     jira_domain: str
     master_robot_issue_key: str | None = None
     master_routing_issue_key: str | None = None
+    # "jira" (live attachments) or "snapshot" (newest local copy; see services/master_data.py)
+    master_data_source: str = "jira"
+    snapshot_dir: str | None = None
 
     @classmethod
     def from_providers(cls, allow_prompt: bool = False) -> "Config":
+        # credentials are resolved once per process (and .env loaded then); see load_credentials
         creds: Credentials = load_credentials(allow_prompt=allow_prompt)
         return cls(
             jira_email=creds.email,
@@ -25,6 +29,8 @@ class Config:
             jira_domain=creds.domain,
             master_robot_issue_key=os.getenv("JIRA_MASTER_ROBOT_ISSUE_KEY"),
             master_routing_issue_key=os.getenv("JIRA_MASTER_ROUTING_ISSUE_KEY"),
+            master_data_source=os.getenv("JIRA_MASTER_DATA_SOURCE", "jira"),
+            snapshot_dir=os.getenv("JIRA_SNAPSHOT_DIR"),
         )
 
     @property
@@ -33,6 +39,8 @@ class Config:
 
     @property
     def auth(self) -> HTTPBasicAuth:
+        # requests is only needed once something talks to Jira
+        from requests.auth import HTTPBasicAuth
         return HTTPBasicAuth(self.jira_email, self.jira_api_token)
 
     @property
@@ -2,16 +2,48 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Optional, Protocol
 import os
-import getpass
+import threading
 
-try:
-    import keyring 
-except Exception:
-    keyring = None  # allow running without keyring installed
+# keyring (and its D-Bus/secret-service backends) is imported on first use; see _keyring()
+_UNLOADED = object()
+keyring = _UNLOADED
 
 # appears in OS keyring app
 SERVICE_NAME = "jira_tools"
 
+_dotenv_loaded = False
+
+def _keyring():
+    """The keyring module, imported on first use; None when it is not installed."""
+    global keyring
+    if keyring is _UNLOADED:
+        try:
+            import keyring as _kr
+        except Exception:
+            _kr = None  # allow running without keyring installed
+        keyring = _kr
+    return keyring
+
+# credentials resolved by `load_credentials`, shared by every client in this process
+_cached: Optional["Credentials"] = None
+_cache_lock = threading.Lock()
+
+def load_dotenv_once() -> None:
+    """
+    Load a local .env into the process env (dev usage; harmless in prod).
+    Done on first credential lookup rather than at import, and only once per process.
+    """
+    global _dotenv_loaded
+    if _dotenv_loaded:
+        return
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        pass
+    else:
+        load_dotenv()
+    _dotenv_loaded = True
+
 @dataclass
 class Credentials:
     email: str
@@ -42,23 +74,26 @@ class EnvProvider:
 class KeyringProvider:
     """Stores token in OS keychain, keyed by (domain, email)."""
     def load(self) -> Optional[Credentials]:
-        if keyring is None:
-            return None
         email = os.getenv("JIRA_EMAIL")
         domain = os.getenv("JIRA_DOMAIN")
+        # env check first: no keyring import when it could not be used anyway
         if not (email and domain):
             return None
+        kr = _keyring()
+        if kr is None:
+            return None
         key = _scope_key(domain, email)
-        token = keyring.get_password(SERVICE_NAME, key)
+        token = kr.get_password(SERVICE_NAME, key)
         if token:
             return Credentials(email=email, api_token=token, domain=domain)
         return None
 
     def save(self, creds: Credentials) -> None:
-        if keyring is None:
+        kr = _keyring()
+        if kr is None:
             return
         key = _scope_key(creds.domain, creds.email)
-        keyring.set_password(SERVICE_NAME, key, creds.api_token)
+        kr.set_password(SERVICE_NAME, key, creds.api_token)
 
 class PromptProvider:
     """
@@ -68,31 +103,43 @@ class PromptProvider:
     def load(self) -> Optional[Credentials]:
         email = os.getenv("JIRA_EMAIL") or input("Jira email: ").strip()
         domain = os.getenv("JIRA_DOMAIN") or input("Jira domain (e.g. myco.atlassian.net): ").strip()
+        import getpass
         token = getpass.getpass("Jira API token (input hidden): ").strip()
         if email and token and domain:
             return Credentials(email=email, api_token=token, domain=domain)
         return None
 
     def save(self, creds: Credentials) -> None:
-        if keyring is not None:
-            KeyringProvider().save(creds)
+        KeyringProvider().save(creds)
 
-def load_credentials(allow_prompt: bool = False) -> Credentials:
+def load_credentials(allow_prompt: bool = False, refresh: bool = False) -> Credentials:
     """
     Resolution order:
       1) Explicit env (dev/CI)
       2) Keyring (prod runtime)
       3) Prompt (optional; use in 'login' command, not servers)
+    The result is cached for the process, so only the first call pays for keyring I/O.
+    Pass `refresh=True` (e.g. after Jira answers 401) to resolve again.
     """
-    for provider in (EnvProvider(), KeyringProvider()):
-        creds = provider.load()
-        if creds:
-            return creds
+    global _cached
+    with _cache_lock:
+        if _cached is not None and not refresh:
+            return _cached
+
+        load_dotenv_once()
+        for provider in (EnvProvider(), KeyringProvider()):
+            creds = provider.load()
+            if creds:
+                _cached = creds
+                return creds
 
+    # prompt outside the lock: other threads must not wait on someone typing
     if allow_prompt:
         creds = PromptProvider().load()
         if creds:
             PromptProvider().save(creds)
+            with _cache_lock:
+                _cached = creds
             return creds
 
     raise RuntimeError(
@@ -107,14 +154,23 @@ def clear_credentials(email: Optional[str] = None, domain: Optional[str] = None)
     If email/domain are omitted, try env vars JIRA_EMAIL/JIRA_DOMAIN.
     Returns True if something was deleted, False otherwise.
     """
-    if keyring is None:
-        return False
+    invalidate_credentials()
+    load_dotenv_once()
     email = email or os.getenv("JIRA_EMAIL")
     domain = domain or os.getenv("JIRA_DOMAIN")
     if not (email and domain):
         return False
+    kr = _keyring()
+    if kr is None:
+        return False
     try:
-        keyring.delete_password(SERVICE_NAME, _scope_key(domain, email))
+        kr.delete_password(SERVICE_NAME, _scope_key(domain, email))
         return True
-    except keyring.errors.PasswordDeleteError:
+    except kr.errors.PasswordDeleteError:
         return False
+
+def invalidate_credentials() -> None:
+    """Forget the cached credentials; the next `load_credentials` resolves them again."""
+    global _cached
+    with _cache_lock:
+        _cached = None
@@ -1,23 +1,63 @@
 import logging
 log = logging.getLogger(__name__)
 
-from typing import Any, List, Dict, Protocol
-from jira_tools.services.http import get_json, post_json, delete as http_delete
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator, List, Dict, Optional, Protocol
+from urllib.parse import urlencode
+from jira_tools.services.http import COMMENT_ORDERS, JiraTransport, get_json, post_json, delete as http_delete
 from jira_tools.utils.adf import build_adf_comment_body, parse_adf_comment
+from jira_tools.utils.singleflight import SingleFlight
 from jira_tools.config.config import Config
+from jira_tools.config.credentials import load_credentials
 
 class JiraClientProtocol(Protocol):
     def get_issue_data(self, issue_key: str) -> Dict[str, Any]: ...
     def get_attachments(self, issue_key: str) -> List[Dict[str,Any]]: ...
+    def get_attachment_content(self, attachment_id: str) -> Dict[str,Any]: ...
     def get_nth_attachment(self, n: int, issue_key: str) -> Dict[str,Any]: ...
+    def search_issue_keys(self, jql: str, max_results: int = ...) -> List[str]: ...
+    def get_comment_page(self, issue_key: str, start_at: int = ..., max_results: int = ..., order: str = ...) -> Dict[str, Any]: ...
+    def iter_comments(self, issue_key: str, page_size: int = ..., order: str = ...) -> Iterator[Dict[str, Any]]: ...
     def get_comments(self, issue_key: str) -> List[Dict[str, Any]]: ...
     def add_comment(self, issue_key: str, comment_text: str) -> Dict[str, Any]: ...
     def delete_last_comment(self, issue_key: str) -> None: ...
 
 class JiraClient(JiraClientProtocol):
-    def __init__(self, config: Config | None = None):
+    def __init__(self, config: Config | None = None, transport: JiraTransport | None = None, coalesce: bool = True):
         # no prompts by default
         self.config = config or Config.from_providers(allow_prompt=False)
+        # only credentials we resolved ourselves are re-resolved on 401; explicit configs are left alone
+        self._owns_credentials = config is None
+        self._auth_lock = threading.Lock()
+        # pooled keep-alive session shared by every call made through this client
+        self.transport = transport or JiraTransport(self.config)
+        # concurrent identical GETs (e.g. every station loading the master record at shift start) share one call
+        self.single_flight: Optional[SingleFlight] = SingleFlight() if coalesce else None
+
+    def close(self) -> None:
+        """Release pooled connections held by the transport."""
+        self.transport.close()
+
+    def refresh_credentials(self, stale_token: str | None = None) -> bool:
+        """
+        Re-resolve credentials after Jira rejected `stale_token` (401), bypassing the process cache.
+        Concurrent callers share one refresh: if the token already changed, nothing is re-read.
+        Returns:
+            True if the client now holds different credentials and the request is worth retrying.
+        """
+        if not self._owns_credentials:
+            return False
+        with self._auth_lock:
+            if stale_token is not None and stale_token != self.config.jira_api_token:
+                return True
+            creds = load_credentials(refresh=True)
+            if (creds.email, creds.api_token) == (self.config.jira_email, self.config.jira_api_token):
+                return False
+            self.config.jira_email = creds.email
+            self.config.jira_api_token = creds.api_token
+            self.transport.set_auth(self.config.auth)
+            return True
 
     def get_issue_data(self, issue_key: str) -> Dict[str, Any]:
         """
@@ -31,19 +71,103 @@ class JiraClient(JiraClientProtocol):
         return get_json(issue_url, self)
 
     def get_attachments(self, issue_key: str) -> List[Dict[str, Any]]:
-        data = self.get_issue_data(issue_key)
+        # Only ask Jira for the attachment field; the full issue is much heavier
+        data = get_json(f"{issue_key}?fields=attachment", self)
         attachments = (data.get("fields", {}).get("attachment")) or []
         if not attachments:
             raise ValueError("No attachments found.")
         return attachments
 
-    def get_nth_attachment(self, n: int, issue_key: str) -> Dict[str, Any]:
-        attachments = self.get_attachments(issue_key)
-        attachment_id = attachments[n]["id"]
+    def get_attachment_content(self, attachment_id: str) -> Dict[str, Any]:
+        """
+        Downloads a JSON attachment by id.
+        """
         # Hop up one level from issue/ to attachment/ content endpoint
         attachment_url = f"../attachment/content/{attachment_id}" 
         return get_json(attachment_url, self, headers={}, timeout=30)
 
+    def get_nth_attachment(self, n: int, issue_key: str) -> Dict[str, Any]:
+        attachments = self.get_attachments(issue_key)
+        return self.get_attachment_content(attachments[n]["id"])
+
+    def search_issue_keys(self, jql: str, max_results: int = 1000) -> List[str]:
+        """
+        Returns the keys of issues matching a JQL query, walking search pagination
+        Args:
+            jql (str): JQL filter, e.g. 'project = POPS AND labels = jaeger'
+            max_results (int): Stop after this many keys.
+        """
+        keys: List[str] = []
+        next_token = None
+        while len(keys) < max_results:
+            params = {"jql": jql, "fields": "key", "maxResults": min(100, max_results - len(keys))}
+            if next_token:
+                params["nextPageToken"] = next_token
+            # Hop up one level from issue/ to the search endpoint
+            page = get_json(f"../search/jql?{urlencode(params)}", self)
+            keys.extend(i["key"] for i in page.get("issues", []))
+            next_token = page.get("nextPageToken")
+            if not next_token or not page.get("issues"):
+                break
+        return keys[:max_results]
+
+    def get_comment_page(
+        self,
+        issue_key: str,
+        start_at: int = 0,
+        max_results: int = 100,
+        order: str = "created",
+    ) -> Dict[str, Any]:
+        """
+        Fetches one raw page of comments from a Jira issue
+        Returns:
+            dict: Jira's page object: startAt, maxResults, total, comments (unparsed ADF)
+        """
+        if order not in COMMENT_ORDERS:
+            raise ValueError(f"order must be one of {sorted(COMMENT_ORDERS)}; got '{order}'.")
+        params = urlencode({"startAt": start_at, "maxResults": max_results, "orderBy": order})
+        return get_json(f"{issue_key}/comment?{params}", self)
+
+    def iter_comments(
+        self,
+        issue_key: str,
+        page_size: int = 100,
+        order: str = "created",
+        prefetch: bool = False,
+        raw: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Streams parsed comments from a Jira issue, walking Jira pagination
+        Args:
+            issue_key (str): The unique key of the Jira issue (e.g., "PROJ-123").
+            page_size (int): Comments requested per page (`maxResults`).
+            order (str): "created" (oldest first) or "-created" (newest first).
+            prefetch (bool): Fetch the next page in the background while the current one is consumed.
+            raw (bool): Yield Jira's comment objects as-is instead of parsing them.
+        Yields:
+            Parsed comments, as each page arrives
+        """
+        def fetch(start_at: int) -> Dict[str, Any]:
+            return self.get_comment_page(issue_key, start_at, page_size, order)
+
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            page = fetch(0)
+            while True:
+                comments = page.get("comments", [])
+                start_at = page.get("startAt", 0) + len(comments)
+                # Jira may clamp maxResults below what we asked; trust `total` over page size
+                has_more = bool(comments) and start_at < page.get("total", 0)
+                pending = executor.submit(fetch, start_at) if (executor and has_more) else None
+                for c in comments:
+                    yield c if raw else parse_adf_comment(c)
+                if not has_more:
+                    return
+                page = pending.result() if pending else fetch(start_at)
+        finally:
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+
     def get_comments(self, issue_key: str) -> List[Dict[str, Any]]:
         """
         Gets all comments from an existing Jira issue
@@ -52,15 +176,9 @@ class JiraClient(JiraClientProtocol):
         Returns:
             List of all comments
         """
-        # Fetch all comments
-        comments_url = f"{issue_key}/comment"
-        response = get_json(comments_url, self)
-
-        # Gets comments, if key is available, else returns empty list
-        comments = response.get("comments", [])
-        if not comments:
+        parsed_comments = list(self.iter_comments(issue_key))
+        if not parsed_comments:
             print(f"No comments found for issue {issue_key}.")
-        parsed_comments = [parse_adf_comment(c) for c in comments]
 
         return parsed_comments
 
@@ -6,12 +6,6 @@ Usage:
 """
 
 import argparse
-from jira_tools.config.config import Config
-from jira_tools.config.credentials import (
-    clear_credentials,
-    EnvProvider,
-    KeyringProvider,
-)
 
 def main() -> None:
     parser = argparse.ArgumentParser(prog="jira-auth")
@@ -21,8 +15,20 @@ def main() -> None:
     sub.add_parser("status")
     args = parser.parse_args()
 
+    # imported after parsing, so `--help` and typos never pay for dotenv/keyring;
+    # `status` with env credentials never imports keyring at all
+    from jira_tools.config.credentials import (
+        clear_credentials,
+        load_credentials,
+        load_dotenv_once,
+        EnvProvider,
+        KeyringProvider,
+    )
+    # providers read JIRA_* from the env; pick up a local .env first
+    load_dotenv_once()
+
     if args.cmd == "login":
-        Config.from_providers(allow_prompt=True)
+        load_credentials(allow_prompt=True)
         print("✅ Saved credentials to system keyring.")
     elif args.cmd == "clear":
         ok = clear_credentials()
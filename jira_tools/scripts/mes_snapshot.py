@@ -0,0 +1,58 @@
+"""
+Usage:
+  mes-snapshot sync     # pull current master data attachments from Jira into local snapshots
+  mes-snapshot status   # show the newest snapshot of each kind
+  mes-snapshot registry IN.json OUT.reg   # compile a Master Robot Record into a memory-mapped registry
+  mes-snapshot routing-table IN.json OUT.rtab   # compile a Master Routing Record into an applicability table
+
+Snapshots go to $JIRA_SNAPSHOT_DIR (default: mes_master_data/snapshots).
+Set JIRA_MASTER_DATA_SOURCE=snapshot to have stations read them instead of Jira.
+"""
+
+import argparse
+import hashlib
+import os
+import json
+from jira_tools.services.master_data import DEFAULT_SNAPSHOT_DIR, KINDS, SnapshotStore
+from jira_tools.utils.robot_registry import build_registry
+from jira_tools.utils.routing_table import build_routing_table
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="mes-snapshot")
+    parser.add_argument("--dir", default=os.getenv("JIRA_SNAPSHOT_DIR") or DEFAULT_SNAPSHOT_DIR,
+                        help="snapshot directory (default: $JIRA_SNAPSHOT_DIR or %(default)s)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("sync")
+    sub.add_parser("status")
+    reg = sub.add_parser("registry")
+    reg.add_argument("source", help="Master Robot Record JSON (RIN -> robotPid)")
+    reg.add_argument("output", help="registry file to write")
+    rtab = sub.add_parser("routing-table")
+    rtab.add_argument("source", help="Master Routing Record JSON")
+    rtab.add_argument("output", help="applicability table file to write")
+    args = parser.parse_args()
+    store = SnapshotStore(args.dir)
+
+    if args.cmd == "sync":
+        # imported here so `status` works without Jira credentials
+        from jira_tools.jira_client import JiraClient
+        for entry in store.sync(JiraClient()):
+            print(f"✅ {entry['kind']}: {entry['file']} (attachment {entry['attachmentId']}, sha256 {entry['sha256'][:12]})")
+    elif args.cmd == "status":
+        for kind in KINDS:
+            entry = store.latest(kind)
+            if entry:
+                print(f"{kind}: {entry['file']} fetched {entry['fetchedAt']} (attachment {entry['attachmentId']})")
+            else:
+                print(f"{kind}: ❌ no snapshot in {args.dir}")
+    elif args.cmd == "registry":
+        with open(args.source, "r", encoding="utf-8") as f:
+            rin_to_pid = json.load(f)
+        build_registry(rin_to_pid, args.output)
+        print(f"✅ Compiled {len(rin_to_pid)} RINs into {args.output}")
+    elif args.cmd == "routing-table":
+        with open(args.source, "rb") as f:
+            data = f.read()
+        doc = json.loads(data)
+        digest = build_routing_table(doc, args.output, hashlib.sha256(data).hexdigest())
+        print(f"✅ Compiled {len(doc['masterRoutingRecord'])} routings into {args.output} (sha256 {digest[:12]})")
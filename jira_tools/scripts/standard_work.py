@@ -0,0 +1,38 @@
+"""
+Usage:
+  mes-standard-work build [--source standard_work] [--out var/standard_work_site] [--jobs N]
+
+Renders the standard work Markdown into the static site the API serves at /sw/.
+Run after changing any work instruction or image; unchanged files are left alone and
+only new or changed images are resized (--jobs processes, default one per CPU).
+"""
+
+import argparse
+import os
+import time
+from jira_tools.services.standard_work import DEFAULT_SITE_DIR, DEFAULT_SOURCE_DIR, SiteBuilder
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="mes-standard-work")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    build = sub.add_parser("build")
+    build.add_argument("--source", default=DEFAULT_SOURCE_DIR, help="Markdown source dir (default: %(default)s)")
+    build.add_argument("--out", default=os.getenv("STANDARD_WORK_SITE_DIR") or DEFAULT_SITE_DIR,
+                       help="site dir (default: $STANDARD_WORK_SITE_DIR or %(default)s)")
+    build.add_argument("--jobs", type=int, default=None, help="processes resizing images (default: one per CPU)")
+    args = parser.parse_args()
+
+    if args.cmd == "build":
+        start = time.perf_counter()
+        builder = SiteBuilder(args.source, args.out, jobs=args.jobs)
+        manifest = builder.build()
+        images = builder.image_pipeline
+        print(f"✅ {len(manifest['pages'])} pages, {len(manifest['assets'])} assets -> {args.out} "
+              f"({builder.written} files written, {time.perf_counter() - start:.1f}s)")
+        print(f"   images: {images.derived} resized, {images.reused} unchanged"
+              + (f", {images.skipped} at full size (pip install '.[site]' for Pillow)" if images.skipped else ""))
+        for link in manifest["missing"]:
+            print(f"⚠️  missing link target: {link}")
+
+if __name__ == "__main__":
+    main()
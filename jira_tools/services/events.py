@@ -1,6 +1,21 @@
+from __future__ import annotations
+import json
 import re
-from typing import Dict, List, Any
-from jira_tools.jira_client import JiraClient
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, Iterable, List, Any, Mapping, Optional, Tuple
+from jira_tools.services.http import post_json
+from jira_tools.utils import metrics
+from jira_tools.utils.adf import adf_to_text, iter_adf_lines
+from jira_tools.utils.parse import format_timestamp, parse_timestamp
+
+if TYPE_CHECKING:
+    from jira_tools.async_client import AsyncJiraClient
+    from jira_tools.jira_client import JiraClient
 
 # Matches Markdown-style heading for an event
 _EVENT_HEADER_RE = re.compile(r"^\s*#{1,6}\s*(?P<etype>[A-Z_]+)\s*$", re.MULTILINE)
@@ -21,37 +36,432 @@ _EVENT_ALL_FIELDS = [
     "operatorComment",   # << always last
 ]
 
-def get_event_history_for(robot_issue_key: str, client: JiraClient) -> List[Dict[str, Any]]:
+# Line-local forms of the patterns above, used by the ADF walker
+_HEADER_LINE_RE = re.compile(r"\s*#{1,6}\s*(?P<etype>[A-Z_]+)\s*$")
+_FIELD_LINE_RE = re.compile(r"\s*[-–—*•]\s*(?P<key>[A-Za-z][\w]*)\s*:\s*(?P<val>.+?)\s*$")
+# A bullet line the multiline regex could finish on a following line ("- key:" / "- key" / "-")
+_FIELD_PARTIAL_RE = re.compile(r"\s*[-–—*•]\s*(?:[A-Za-z][\w]*\s*(?::\s*)?)?$")
+# A heading node whose whole text is an event type, e.g. a Jira-rendered "## OPERATION_COMPLETE";
+# only taken as an event when a "- key: value" line follows, so all-caps note headings ("WARNING") are not
+_HEADING_ETYPE_RE = re.compile(r"\s*(?P<etype>[A-Z_]+)\s*$")
+_BULLETS = frozenset("-–—*•")
+
+# Structured events carry their fields as one line of JSON in a code block after the readable text:
+#   {"mesEvent":1,"eventType":"OPERATION_COMPLETE","timestamp":"2025-08-01T10:00:00Z",...}
+_EVENT_PAYLOAD_TAG = "mesEvent"
+_EVENT_PAYLOAD_VERSION = 1
+_EVENT_PAYLOAD_PREFIX = '{"' + _EVENT_PAYLOAD_TAG + '"'
+# Idempotency key in the payload: a retried POST may create the comment twice, histories keep one
+_EVENT_ID_KEY = "eventId"
+_EVENT_TYPE_RE = re.compile(r"^[A-Z_]+$")
+# Events without a usable timestamp sort first
+_MIN_TIME = datetime.min.replace(tzinfo=timezone.utc)
+
+EVENT_COMMENTS = metrics.counter(
+    "event_history_comments_total", "Comments seen by history syncs: cached (unchanged) or parsed.", ("result",))
+EVENT_PARSE_SECONDS = metrics.histogram(
+    "event_parse_seconds", "Time to parse one comment's ADF body into an event.", buckets=metrics.FAST_BUCKETS)
+
+def _build_event(etype: str, parsed: Dict[str, Any]) -> Dict[str, Any]:
+    # Build fixed-schema event with defaults = None
+    evt: Dict[str, Any] = {f: None for f in _EVENT_ALL_FIELDS}
+    evt["eventType"] = etype
+    for f in _EVENT_ALL_FIELDS:
+        if f in parsed:
+            evt[f] = parsed[f]
+    return evt
+
+def _event_from_text(text: str, heading_etype: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    # normalize NBSPs that Jira sometimes injects
+    text = text.replace("\u00A0", " ").strip()
+    if not text:
+        return None
+
+    m_header = _EVENT_HEADER_RE.search(text)
+    if m_header:
+        etype = m_header.group("etype").upper()
+    elif heading_etype:
+        # the heading's text is a line of its own; it needs a field line after it
+        m_heading = re.search(rf"^\s*{heading_etype}\s*$", text, re.MULTILINE)
+        if m_heading is None or not _EVENT_FIELD_RE.search(text, m_heading.end()):
+            return None
+        etype = heading_etype
+    else:
+        return None
+
+    parsed: Dict[str, Any] = {}
+    for m in _EVENT_FIELD_RE.finditer(text):
+        parsed[m.group("key")] = m.group("val").strip()
+    return _build_event(etype, parsed)
+
+def parse_event_comment(comment: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """
-    Construct robot history from the comment fields of a robot issue (robot record) 
+    Parse one parsed comment (see `parse_adf_comment`) into a fixed-schema event.
+    Returns None for comments that are not events.
     """
-    comments = client.get_comments(robot_issue_key)  # your objects use: text, author_name, author_email, created
-    events: List[Dict[str, Any]] = []
+    # Use 'text' (your shape)
+    return _event_from_text(comment.get("text") or comment.get("body") or "")
 
-    for c in comments:
-        # Use 'text' (your shape) and normalize NBSPs that Jira sometimes injects
-        text = (c.get("text") or c.get("body") or "").replace("\u00A0", " ").strip()
-        if not text:
+def _event_payload(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """A structured comment's JSON payload; None when there is none (legacy comment) or it is broken."""
+    content = doc.get("content") if isinstance(doc, dict) else None
+    if not isinstance(content, list):
+        return None
+    # the writer puts the payload last, so look from the end
+    for node in reversed(content):
+        if not isinstance(node, dict) or node.get("type") != "codeBlock":
+            continue
+        inner = node.get("content")
+        text = "".join(
+            c["text"] for c in inner if isinstance(c, dict) and isinstance(c.get("text"), str)
+        ) if isinstance(inner, list) else ""
+        if not text.startswith(_EVENT_PAYLOAD_PREFIX):
             continue
+        try:
+            payload = json.loads(text)
+        except ValueError:
+            return None
+        return payload if isinstance(payload, dict) else None
+    return None
+
+def _event_from_payload(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    etype = payload.get("eventType")
+    if not isinstance(etype, str) or not _EVENT_TYPE_RE.match(etype):
+        return None
+    return _build_event(etype, {k: str(v) for k, v in payload.items() if v is not None})
+
+def _parse_event(doc: Optional[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """(event or None, its eventId when the comment carries one)."""
+    payload = _event_payload(doc)
+    if payload is not None:
+        structured = _event_from_payload(payload)
+        if structured is not None:
+            event_id = payload.get(_EVENT_ID_KEY)
+            return structured, event_id if isinstance(event_id, str) else None
+    return _event_from_lines(doc), None
+
+def event_id_of(doc: Optional[Dict[str, Any]]) -> Optional[str]:
+    """The eventId a structured comment was posted with (see `build_event_comment_body`), or None."""
+    payload = _event_payload(doc)
+    event_id = payload.get(_EVENT_ID_KEY) if payload is not None else None
+    return event_id if isinstance(event_id, str) else None
 
-        m_header = _EVENT_HEADER_RE.search(text)
-        if not m_header:
+def parse_event_adf(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Parse an event straight from a comment's ADF body, without building its text.
+    Comments written by `post_event` are read from their JSON payload with a single `json.loads`.
+    Legacy comments give the same result as `parse_event_comment(parse_adf_comment(...))`,
+    and a heading node holding the event type (how Jira stores a typed "## TYPE") is also accepted
+    when a "- key: value" line follows it.
+    - Lines are inspected by their first character; only '#' and bullet lines reach a regex
+    - Field lines are only matched once a header is found, so non-events cost one walk
+    - Rare layouts the multiline regexes could match across lines fall back to the text path
+    """
+    return _parse_event(doc)[0]
+
+def _event_from_lines(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Legacy (unstructured) comment: event from its '## TYPE' / '- key: value' lines."""
+    etype: Optional[str] = None
+    heading_etype: Optional[str] = None
+    # field lines before the heading node do not make it an event
+    heading_at = 0
+    field_lines: List[str] = []
+    for block, line in iter_adf_lines(doc):
+        if "\u00A0" in line:
+            line = line.replace("\u00A0", " ")
+        stripped = line.lstrip()
+        if not stripped:
             continue
-        etype = m_header.group("etype").upper()
+        first = stripped[0]
+        if first == "#":
+            if etype is None:
+                m = _HEADER_LINE_RE.match(stripped)
+                if m:
+                    etype = m.group("etype").upper()
+                elif not stripped.rstrip().strip("#"):
+                    # "##" alone: the header regex may continue onto the next line
+                    return _event_from_text(adf_to_text(doc), heading_etype)
+        elif first in _BULLETS:
+            field_lines.append(stripped)
+        elif block == "heading" and heading_etype is None:
+            m = _HEADING_ETYPE_RE.match(stripped)
+            if m:
+                heading_etype = m.group("etype")
+                heading_at = len(field_lines)
 
-        parsed: Dict[str, Any] = {}
-        for m in _EVENT_FIELD_RE.finditer(text):
+    from_heading = etype is None
+    etype = etype or heading_etype
+    if etype is None:
+        return None
+
+    parsed: Dict[str, Any] = {}
+    heading_fields = False
+    for i, line in enumerate(field_lines):
+        m = _FIELD_LINE_RE.match(line)
+        if m:
             parsed[m.group("key")] = m.group("val").strip()
+            heading_fields = heading_fields or i >= heading_at
+        elif _FIELD_PARTIAL_RE.match(line):
+            return _event_from_text(adf_to_text(doc), heading_etype)
+    if from_heading and not heading_fields:
+        return None
+    return _build_event(etype, parsed)
+
+def normalize_event(event: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Validate an event for writing and return it in the fixed schema.
+    - eventType must be UPPER_SNAKE_CASE
+    - timestamp (datetime or ISO-8601 string, default now) is normalized to UTC, e.g. 2025-08-01T10:00:00Z
+    - other values are stored as strings, the way the comment parser returns them
+    Raises:
+        ValueError: If eventType or timestamp is invalid.
+    """
+    etype = str(event.get("eventType") or "").strip().upper()
+    if not _EVENT_TYPE_RE.match(etype):
+        raise ValueError(f"eventType '{event.get('eventType')}' must be UPPER_SNAKE_CASE, e.g. OPERATION_COMPLETE.")
+    raw_ts = event.get("timestamp")
+    when = parse_timestamp(raw_ts) if raw_ts is not None else datetime.now(timezone.utc)
+    if when is None:
+        raise ValueError(f"timestamp '{raw_ts}' is not an ISO-8601 timestamp.")
+    parsed = {k: str(v) for k, v in event.items() if v is not None and k != "eventType"}
+    parsed["timestamp"] = format_timestamp(when)
+    return _build_event(etype, parsed)
+
+def format_event_text(event: Mapping[str, Any]) -> str:
+    """Human-readable form of an event, in the layout the comment parser reads."""
+    lines = [f"## {event['eventType']}"]
+    for f in _EVENT_ALL_FIELDS[1:]:
+        if event.get(f) is not None:
+            # one line per field, or the text parser would cut the value short
+            lines.append(f"- {f}: " + " ".join(str(event[f]).split()))
+    return "\n".join(lines)
+
+def build_event_comment_body(event: Mapping[str, Any], event_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    ADF comment payload for an event: one paragraph per readable line, then the
+    JSON payload in a code block for `parse_event_adf` to read back directly.
+    `event_id` (e.g. a uuid) makes reposts of the same event recognizable: histories keep
+    one event per id, and the outbox checks for it before retrying.
+    """
+    evt = normalize_event(event)
+    payload: Dict[str, Any] = {_EVENT_PAYLOAD_TAG: _EVENT_PAYLOAD_VERSION}
+    if event_id is not None:
+        payload[_EVENT_ID_KEY] = event_id
+    payload.update((k, v) for k, v in evt.items() if v is not None)
+    content: List[Dict[str, Any]] = [
+        {"type": "paragraph", "content": [{"type": "text", "text": line}]}
+        for line in format_event_text(evt).split("\n")
+    ]
+    content.append({
+        "type": "codeBlock",
+        "attrs": {"language": "json"},
+        "content": [{"type": "text", "text": json.dumps(payload, ensure_ascii=False, separators=(",", ":"))}],
+    })
+    return {"body": {"type": "doc", "version": 1, "content": content}}
+
+def post_event(robot_issue_key: str, event: Mapping[str, Any], client: JiraClient) -> Dict[str, Any]:
+    """
+    Post an event to a robot issue as a structured comment.
+    Returns:
+        dict: The JSON response from Jira with comment details.
+    """
+    return post_json(f"{robot_issue_key}/comment", build_event_comment_body(event), client)
+
+def _event_time(event: Dict[str, Any]) -> datetime:
+    return parse_timestamp(event.get("timestamp")) or _MIN_TIME
+
+def _unique_events(
+    entries: Iterable[Tuple[Optional[Tuple[datetime, Dict[str, Any]]], Optional[str]]],
+) -> Iterable[Tuple[datetime, Dict[str, Any]]]:
+    """Parsed events, one per eventId (a POST retried after a lost response leaves two comments)."""
+    seen = set()
+    for te, event_id in entries:
+        if te is None:
+            continue
+        if event_id is not None:
+            if event_id in seen:
+                continue
+            seen.add(event_id)
+        yield te
+
+def _sorted_events(events: Iterable[Tuple[datetime, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    # Sort oldest → newest by the event's parsed timestamp, so offsets and precision compare correctly
+    # Every event will have a timestamp; unparseable ones keep their relative order, first
+    ordered = sorted(events, key=lambda te: te[0])
+    return [dict(e) for _, e in ordered]
+
+def _comment_created(raw: Dict[str, Any]) -> datetime:
+    return parse_timestamp(raw.get("created")) or _MIN_TIME
+
+@dataclass
+class _RobotHistory:
+    # comment id -> (comment `updated`, (event time, parsed event) or None for non-event comments, eventId)
+    comments: Dict[str, Tuple[Optional[str], Optional[Tuple[datetime, Dict[str, Any]]], Optional[str]]] = \
+        field(default_factory=dict)
+    # newest comment `created` seen so far (parsed: Jira may mix UTC offsets)
+    watermark: datetime = _MIN_TIME
+    # incremental syncs since the last full walk
+    syncs_since_full: int = 0
+    # time.monotonic() of the last full walk
+    full_at: float = field(default_factory=time.monotonic)
+
+@dataclass
+class _RobotSlot:
+    # serializes syncs of one robot; evicted together with its history
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    hist: Optional[_RobotHistory] = None
+
+class EventHistoryStore:
+    """
+    Incremental, per-robot cache of parsed event history.
+    - First request for a robot walks every comment and parses it once
+    - Later requests walk comments newest-first in small pages and stop at the watermark,
+      so only new comments (and any edits on the pages read) are parsed
+    - An edit is detected by a changed `updated` on a known comment id
+    - A delete is detected when Jira's comment `total` disagrees with the cache;
+      that triggers a full walk
+    - Edits to comments older than the first page are caught by a full walk every
+      `full_resync_every` syncs or `full_resync_seconds`, whichever comes first
+    - At most `max_robots` robots are kept; the least recently asked about is dropped first
+    """
+    def __init__(self, page_size: int = 10, full_resync_every: int = 50, full_resync_seconds: float = 300.0,
+                 max_robots: int = 2048):
+        self.page_size = page_size
+        self.full_resync_every = full_resync_every
+        self.full_resync_seconds = full_resync_seconds
+        self.max_robots = max_robots
+        self._slots: "OrderedDict[str, _RobotSlot]" = OrderedDict()
+        self._guard = threading.Lock()
+
+    def _slot_for(self, issue_key: str) -> _RobotSlot:
+        with self._guard:
+            slot = self._slots.get(issue_key)
+            if slot is None:
+                slot = self._slots[issue_key] = _RobotSlot()
+                while len(self._slots) > self.max_robots:
+                    self._slots.popitem(last=False)
+            else:
+                self._slots.move_to_end(issue_key)
+            return slot
+
+    def get_history(self, robot_issue_key: str, client: JiraClient) -> List[Dict[str, Any]]:
+        slot = self._slot_for(robot_issue_key)
+        with slot.lock:
+            hist = slot.hist
+            if hist is None or self._due_full(hist) or not self._sync(hist, robot_issue_key, client):
+                hist = slot.hist = self._full_sync(robot_issue_key, client)
+            return _sorted_events(_unique_events((te, eid) for _, te, eid in hist.comments.values()))
+
+    def _due_full(self, hist: _RobotHistory) -> bool:
+        return (hist.syncs_since_full >= self.full_resync_every
+                or time.monotonic() - hist.full_at >= self.full_resync_seconds)
 
-        # Build fixed-schema event with defaults = None
-        evt: Dict[str, Any] = {f: None for f in _EVENT_ALL_FIELDS}
-        evt["eventType"] = etype
-        for f in _EVENT_ALL_FIELDS:
-            if f in parsed:
-                evt[f] = parsed[f]
-        events.append(evt)
-
-    # Sort by oldest → newest by the event's timestamp
-    # Every event will have a timestamp
-    events.sort(key=lambda e: e.get("timestamp") or "")
-    return events
+    def invalidate(self, robot_issue_key: Optional[str] = None) -> None:
+        with self._guard:
+            if robot_issue_key is None:
+                self._slots.clear()
+            else:
+                self._slots.pop(robot_issue_key, None)
+
+    def _full_sync(self, robot_issue_key: str, client: JiraClient) -> _RobotHistory:
+        hist = _RobotHistory()
+        for raw in client.iter_comments(robot_issue_key, prefetch=True, raw=True):
+            self._apply(hist, raw)
+        return hist
+
+    def _sync(self, hist: _RobotHistory, robot_issue_key: str, client: JiraClient) -> bool:
+        """
+        Pull comments newer than the watermark, newest first.
+        Returns False when the cache can no longer be trusted (comments were deleted).
+        """
+        watermark = hist.watermark
+        start_at = 0
+        total = None
+        while True:
+            page = client.get_comment_page(robot_issue_key, start_at, self.page_size, order="-created")
+            if total is None:
+                total = page.get("total", 0)
+            comments = page.get("comments", [])
+            reached_watermark = False
+            # finish the whole page even past the watermark; edits on it come for free
+            for raw in comments:
+                if raw.get("id") in hist.comments and _comment_created(raw) <= watermark:
+                    reached_watermark = True
+                self._apply(hist, raw)
+            start_at = page.get("startAt", 0) + len(comments)
+            if reached_watermark or not comments or start_at >= total:
+                break
+        hist.syncs_since_full += 1
+        # cache holds every comment id ever seen; a smaller Jira total means deletions
+        return total == len(hist.comments)
+
+    @staticmethod
+    def _apply(hist: _RobotHistory, raw: Dict[str, Any]) -> None:
+        cid = raw.get("id")
+        updated = raw.get("updated")
+        cached = hist.comments.get(cid)
+        # only new or edited comments pay for event parsing
+        if cached is None or cached[0] != updated:
+            start = time.perf_counter()
+            evt, event_id = _parse_event(raw.get("body"))
+            EVENT_PARSE_SECONDS.observe(time.perf_counter() - start)
+            EVENT_COMMENTS.inc(result="parsed")
+            hist.comments[cid] = (updated, (_event_time(evt), evt) if evt is not None else None, event_id)
+        else:
+            EVENT_COMMENTS.inc(result="cached")
+        created = _comment_created(raw)
+        if created > hist.watermark:
+            hist.watermark = created
+
+# Shared by every history request in this process
+EVENT_HISTORY = EventHistoryStore()
+
+def get_event_history_for(
+    robot_issue_key: str,
+    client: JiraClient,
+    store: Optional[EventHistoryStore] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Construct robot history from the comment fields of a robot issue (robot record) 
+    Served incrementally from `store` (defaults to the process-wide EVENT_HISTORY).
+    """
+    return (store or EVENT_HISTORY).get_history(robot_issue_key, client)
+
+def get_event_histories_for(
+    robot_issue_keys: Iterable[str],
+    client: JiraClient,
+    max_workers: int = 8,
+    store: Optional[EventHistoryStore] = None,
+) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, Exception]]:
+    """
+    Fetch histories for many robots concurrently, at most `max_workers` at a time.
+    One robot failing does not fail the batch.
+    Returns:
+        (histories by issue key, exceptions by issue key)
+    """
+    keys = list(dict.fromkeys(robot_issue_keys))  # de-duplicate, keep request order
+    histories: Dict[str, List[Dict[str, Any]]] = {}
+    errors: Dict[str, Exception] = {}
+    if not keys:
+        return histories, errors
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(keys))) as pool:
+        futures = {key: pool.submit(get_event_history_for, key, client, store) for key in keys}
+        for key, fut in futures.items():
+            try:
+                histories[key] = fut.result()
+            except Exception as e:
+                errors[key] = e
+    return histories, errors
+
+async def get_event_history_for_async(robot_issue_key: str, client: "AsyncJiraClient") -> List[Dict[str, Any]]:
+    """
+    asyncio version of `get_event_history_for`; always walks every comment.
+    """
+    entries = []
+    async for raw in client.iter_comments(robot_issue_key, raw=True):
+        start = time.perf_counter()
+        evt, event_id = _parse_event(raw.get("body"))
+        EVENT_PARSE_SECONDS.observe(time.perf_counter() - start)
+        if evt is not None:
+            entries.append(((_event_time(evt), evt), event_id))
+    return _sorted_events(_unique_events(entries))
@@ -1,14 +1,155 @@
 from __future__ import annotations
+import posixpath
+import re
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import TYPE_CHECKING, Any, Mapping, Optional
+from jira_tools.utils import metrics
 
 if TYPE_CHECKING:  # Only evaluated by type checkers, not at runtime
+    from jira_tools.config.config import Config
     from jira_tools.jira_client import JiraClient
 
+# Shared by JiraTransport and AsyncJiraClient.
+# Only idempotent reads are retried; POST/DELETE must never be replayed blindly
+RETRY_METHODS = frozenset({"GET"})
+RETRY_STATUSES = (500, 502, 503, 504)
+# Sort orders accepted by Jira's comment endpoint
+COMMENT_ORDERS = frozenset({"created", "-created"})
+
+# Issue keys and numeric ids are folded out of endpoint labels to keep metric cardinality bounded
+_ISSUE_KEY_RE = re.compile(r"(?<=/)[A-Z][A-Z0-9_]*-\d+(?=/|$)")
+_ID_RE = re.compile(r"(?<=/)\d+(?=/|$)")
+
+JIRA_REQUESTS = metrics.counter(
+    "jira_requests_total", "Jira API calls by endpoint and response status.", ("method", "endpoint", "status"))
+JIRA_LATENCY = metrics.histogram(
+    "jira_request_duration_seconds", "Jira API call latency, including retries.", ("method", "endpoint"))
+JIRA_BYTES = metrics.counter(
+    "jira_response_bytes_total", "Response bytes received from Jira (attachments included).", ("endpoint",))
+JIRA_COALESCED = metrics.counter(
+    "jira_coalesced_requests_total", "GETs answered by an identical in-flight request instead of a new call.",
+    ("endpoint",))
+
+def endpoint_label(endpoint: str) -> str:
+    """
+    Low-cardinality name for an endpoint relative to issue/, e.g.
+    "POPS-1/comment?startAt=0" -> "issue/{issueKey}/comment", "../attachment/content/10001" -> "attachment/content/{id}"
+    """
+    path = posixpath.normpath("issue/" + endpoint.split("?", 1)[0])
+    path = _ISSUE_KEY_RE.sub("{issueKey}", path)
+    return _ID_RE.sub("{id}", path)
+
+def record_jira_call(method: str, endpoint: str, status: Any, seconds: float, nbytes: int = 0) -> None:
+    """Count one Jira call; `status` is the HTTP status, or "error" when no response arrived."""
+    label = endpoint_label(endpoint)
+    JIRA_REQUESTS.inc(method=method, endpoint=label, status=str(status))
+    JIRA_LATENCY.observe(seconds, method=method, endpoint=label)
+    if nbytes:
+        JIRA_BYTES.inc(nbytes, endpoint=label)
+
 class JiraHttpError(requests.exceptions.HTTPError):
     """Raised when Jira API returns an error response."""
     pass
 
+class JiraTransport:
+    """
+    Pooled, keep-alive HTTP transport owned by a JiraClient.
+    - One `requests.Session` per transport, so TCP+TLS handshakes are reused across calls
+    - Auth and default headers are resolved once, not per request
+    - GETs are retried on connection resets and 5xx with jittered exponential backoff
+    The underlying urllib3 pool is thread-safe; session setup is guarded by a lock.
+    """
+    def __init__(
+        self,
+        config: Config,
+        *,
+        base_url: Optional[str] = None,
+        pool_size: int = 10,
+        pool_block: bool = False,
+        max_retries: int = 3,
+        backoff_factor: float = 0.3,
+        backoff_jitter: float = 0.2,
+    ):
+        # `base_url` lets tests point the transport at a local fake Jira
+        self.base_url = base_url or config.base_url
+        self.pool_size = pool_size
+        self.pool_block = pool_block
+        self.retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            allowed_methods=RETRY_METHODS,
+            status_forcelist=RETRY_STATUSES,
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_jitter,
+            # hand the final 5xx back to us so `raise_for_status` builds a JiraHttpError
+            raise_on_status=False,
+        )
+        self._auth = config.auth
+        self._headers = dict(config.default_headers)
+        self._session: Optional[requests.Session] = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        # lazily created so constructing a client never opens sockets
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._build_session()
+        return self._session
+
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            pool_block=self.pool_block,
+            max_retries=self.retry,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.auth = self._auth
+        session.headers.update(self._headers)
+        # keep-alive is the requests default; state it so nothing downstream turns it off
+        session.headers["Connection"] = "keep-alive"
+        return session
+
+    def request(
+        self,
+        method: str,
+        endpoint: str,
+        json_payload: Optional[Any] = None,
+        *,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: float = 30.0,
+    ) -> requests.Response:
+        url = f"{self.base_url}{endpoint}"
+        return self.session.request(
+            method,
+            url,
+            headers=headers,
+            json=json_payload,
+            timeout=timeout)
+
+    def set_auth(self, auth) -> None:
+        """Swap credentials (e.g. after a token rotation) without dropping pooled connections."""
+        with self._lock:
+            self._auth = auth
+            if self._session is not None:
+                self._session.auth = auth
+
+    def close(self) -> None:
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
 def jira_request(
     method: str,
     endpoint: str,
@@ -19,21 +160,30 @@ def jira_request(
     client: JiraClient,
 ) -> requests.Response:
     """
-    Perform an HTTP request to the Jira API.
+    Perform an HTTP request to the Jira API through the client's pooled transport.
+    Per-call `headers` are merged over the session defaults.
+    On 401, the client may re-resolve its credentials (`refresh_credentials`); the request is then sent once more.
     Raises:
         JiraHttpError: If Jira responds with a 4xx/5xx status code.
     """
-    merged_headers = {**client.config.default_headers, **(headers or {})}
-    url = f"{client.config.base_url}{endpoint}" 
-
-    # requests.request always returns response object; does not raise exceptions
-    resp = requests.request(
-        method,
-        url,
-        headers=merged_headers,
-        json=json_payload,
-        auth=client.config.auth,
-        timeout=timeout)
+    token = getattr(client.config, "jira_api_token", None)
+    for attempt in range(2):
+        # session.request always returns response object; does not raise on 4xx/5xx
+        start = time.perf_counter()
+        try:
+            resp = client.transport.request(
+                method,
+                endpoint,
+                json_payload,
+                headers=headers,
+                timeout=timeout)
+        except requests.exceptions.RequestException:
+            record_jira_call(method, endpoint, "error", time.perf_counter() - start)
+            raise
+        record_jira_call(method, endpoint, resp.status_code, time.perf_counter() - start, len(resp.content))
+        refresh = getattr(client, "refresh_credentials", None)
+        if resp.status_code != 401 or attempt or refresh is None or not refresh(token):
+            break
     try:
         # `raise_for_status` preserves response object, unlike manually raising
         resp.raise_for_status()
@@ -47,9 +197,26 @@ def jira_request(
         ) from e
     return resp
 
+def coalesce_key(method: str, endpoint: str, headers: Optional[Mapping[str, str]] = None) -> tuple:
+    """Identity of a request for single-flight coalescing: method, endpoint (with its query) and extra headers."""
+    return (method, endpoint, tuple(sorted((headers or {}).items())))
+
 def get_json(endpoint: str, client: JiraClient, **kwargs):
-    """Perform a GET request and return parsed JSON."""
-    return jira_request("GET", endpoint, client=client, **kwargs).json()
+    """
+    Perform a GET request and return parsed JSON.
+    Identical GETs already in flight on the same client (its `single_flight`) are joined
+    instead of re-sent; every joined caller gets the same (read-only) object.
+    """
+    flight = getattr(client, "single_flight", None)
+    if flight is None:
+        return jira_request("GET", endpoint, client=client, **kwargs).json()
+    result, shared = flight.do(
+        coalesce_key("GET", endpoint, kwargs.get("headers")),
+        lambda: jira_request("GET", endpoint, client=client, **kwargs).json(),
+    )
+    if shared:
+        JIRA_COALESCED.inc(endpoint=endpoint_label(endpoint))
+    return result
 
 def post_json(endpoint: str, payload, client: JiraClient, **kwargs):
     """Perform a POST request and return parsed JSON."""
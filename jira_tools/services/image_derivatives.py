@@ -0,0 +1,180 @@
+"""
+Responsive derivatives of the standard work images (screenshots and photos, mostly full-resolution PNG).
+
+For every source image the site builder hands over (keyed by its content-hashed asset name,
+e.g. assets/jaeger-p2/img/base-rails.<hash>.png), `ImagePipeline.run` writes next to it:
+
+    base-rails.<hash>.w320.png   base-rails.<hash>.w320.webp    thumbnail size
+    base-rails.<hash>.w640.png   base-rails.<hash>.w640.webp
+    base-rails.<hash>.w1280.png  base-rails.<hash>.w1280.webp
+                                 base-rails.<hash>.webp         full size
+
+Widths at or above the original's are skipped. The results are recorded in images.json
+({asset name: {width, height, variants: [{path, width, type}]}}), which the pages use for
+`srcset` on embedded images and to point image links (how the work instructions show their
+screenshots) at the `display_variant` instead of the full-resolution file. The asset name
+carries the content hash, so an entry is reused as long as its files exist; only new or
+changed images are resized, in a process pool.
+
+Resizing needs Pillow (`pip install '.[site]'`). Without it, images already derived are still
+reused and the rest are served at full size.
+"""
+from __future__ import annotations
+import io
+import json
+import logging
+import os
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+log = logging.getLogger(__name__)
+
+IMAGES_MANIFEST = "images.json"
+RASTER = frozenset({".png", ".jpg", ".jpeg"})
+WIDTHS = (320, 640, 1280)
+# widest variant an image link opens: a station tablet screen, not the camera's resolution
+DISPLAY_WIDTH = 1280
+# bump when sizes or encoder settings change, so every image is derived again
+PIPELINE_VERSION = 1
+_WEBP_QUALITY = 80
+_JPEG_QUALITY = 82
+
+def _pillow():
+    # optional: `pip install '.[site]'`
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return None
+    return Image, ImageOps
+
+def _save(im: Any, path: Path, fmt: str) -> None:
+    buf = io.BytesIO()
+    if fmt == "WEBP":
+        im.save(buf, "WEBP", quality=_WEBP_QUALITY, method=6)
+    elif fmt == "JPEG":
+        im.convert("RGB").save(buf, "JPEG", quality=_JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        im.save(buf, "PNG", optimize=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(buf.getvalue())
+    os.replace(tmp, path)
+
+def derive_image(src: str, out: str, name: str, widths: Sequence[int] = WIDTHS) -> Dict[str, Any]:
+    """
+    Write the derivatives of one image (runs in a pool worker).
+    `src` is the source file, `name` its hashed asset path under the site dir `out`.
+    Returns the images.json entry.
+    """
+    Image, ImageOps = _pillow()
+    base, ext = posixpath.splitext(name)
+    fmt = "JPEG" if ext.lower() in (".jpg", ".jpeg") else "PNG"
+    with Image.open(src) as opened:
+        im = ImageOps.exif_transpose(opened)
+        im.load()
+    if im.mode not in ("RGB", "RGBA", "L", "LA"):
+        # palette screenshots would otherwise be resized with nearest-neighbour
+        im = im.convert("RGBA")
+    width, height = im.size
+    variants: List[Dict[str, Any]] = []
+
+    def emit(img: Any, suffix: str, fmt_: str, mime: str) -> None:
+        path = f"{base}{suffix}"
+        target = Path(out) / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        _save(img, target, fmt_)
+        variants.append({"path": path, "width": img.size[0], "type": mime})
+
+    for w in sorted(widths):
+        if w >= width:
+            break
+        resized = im.resize((w, max(1, round(height * w / width))), Image.LANCZOS)
+        emit(resized, f".w{w}{ext}", fmt, "image/jpeg" if fmt == "JPEG" else "image/png")
+        emit(resized, f".w{w}.webp", "WEBP", "image/webp")
+    emit(im, ".webp", "WEBP", "image/webp")
+    return {"version": PIPELINE_VERSION, "width": width, "height": height, "variants": variants}
+
+def srcset(entry: Mapping[str, Any], mime: str, url, full: Optional[str] = None) -> str:
+    """`srcset` value for the variants of one type; `full` (the original) is added at full width."""
+    items = [(v["path"], v["width"]) for v in entry["variants"] if v["type"] == mime]
+    if full is not None:
+        items.append((full, entry["width"]))
+    return ", ".join(f"{url(path)} {width}w" for path, width in items)
+
+def display_variant(entry: Mapping[str, Any], width: int = DISPLAY_WIDTH) -> Optional[str]:
+    """Path of the widest WebP variant no wider than `width` (the full-size WebP for smaller images)."""
+    fitting = [v for v in entry["variants"] if v["type"] == "image/webp" and v["width"] <= width]
+    return max(fitting, key=lambda v: v["width"])["path"] if fitting else None
+
+@dataclass
+class ImagePipeline:
+    """
+    Derives images into the site dir `out`. `run` returns the new images.json content.
+    Attributes:
+        derived: images resized in this run
+        reused: images whose derivatives were already current
+        skipped: images left at full size (Pillow not installed, or the image could not be read)
+    """
+    out: Path
+    jobs: int = field(default_factory=lambda: os.cpu_count() or 1)
+    widths: Sequence[int] = WIDTHS
+    derived: int = 0
+    reused: int = 0
+    skipped: int = 0
+
+    def _previous(self) -> Dict[str, Any]:
+        try:
+            return json.loads((self.out / IMAGES_MANIFEST).read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _current(self, entry: Any) -> bool:
+        return (
+            isinstance(entry, dict) and entry.get("version") == PIPELINE_VERSION
+            and all((self.out / v["path"]).is_file() for v in entry.get("variants", []))
+        )
+
+    def _collect(self, result: Dict[str, Any], name: str, src: Path, get) -> None:
+        try:
+            result[name] = get()
+        except Exception as e:
+            # a broken image only loses its variants; the page still links the original
+            log.warning("Could not derive %s: %s", src, e)
+            self.skipped += 1
+        else:
+            self.derived += 1
+
+    def run(self, images: Mapping[str, Path]) -> Dict[str, Any]:
+        """`images` maps hashed asset name -> source file."""
+        previous = self._previous()
+        result: Dict[str, Any] = {}
+        todo: Dict[str, Path] = {}
+        for name, src in images.items():
+            if self._current(previous.get(name)):
+                result[name] = previous[name]
+                self.reused += 1
+            else:
+                todo[name] = src
+
+        if todo and _pillow() is None:
+            log.warning("Pillow is not installed; %d image(s) served at full size", len(todo))
+            self.skipped = len(todo)
+            todo = {}
+        if len(todo) > 1 and self.jobs > 1:
+            with ProcessPoolExecutor(max_workers=min(self.jobs, len(todo))) as pool:
+                futures = {name: pool.submit(derive_image, str(src), str(self.out), name, self.widths)
+                           for name, src in todo.items()}
+                for name, fut in futures.items():
+                    self._collect(result, name, todo[name], fut.result)
+        else:
+            for name, src in todo.items():
+                self._collect(result, name, src, lambda: derive_image(str(src), str(self.out), name, self.widths))
+
+        result = dict(sorted(result.items()))
+        if result != previous:
+            tmp = self.out / (IMAGES_MANIFEST + ".tmp")
+            tmp.write_text(json.dumps(result, indent=2), encoding="utf-8")
+            os.replace(tmp, self.out / IMAGES_MANIFEST)
+        return result
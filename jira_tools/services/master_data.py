@@ -0,0 +1,291 @@
+"""
+Master data sources: the live Jira attachments, or local snapshots of them.
+
+`SnapshotStore.sync` (CLI: `mes-snapshot sync`) pulls the current Master Robot Record and Master Routing Record
+attachments into versioned files under the snapshot dir, plus a manifest.json:
+
+    <snapshot_dir>/
+        manifest.json
+        master_robot_record/<fetchedAt>_<attachmentId>.json
+        master_robot_record/<fetchedAt>_<attachmentId>.reg     (compiled RIN registry)
+        master_routing_record/<fetchedAt>_<attachmentId>.json
+        master_routing_record/<fetchedAt>_<attachmentId>.rtab  (compiled applicability table)
+
+With `JIRA_MASTER_DATA_SOURCE=snapshot`, robot_lookup and routing read the newest
+snapshot instead of Jira, so the scan path keeps working through Jira slowdowns.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from jira_tools.utils import metrics
+from jira_tools.utils.robot_registry import RobotRegistry, build_registry
+from jira_tools.utils.routing_table import RoutingTable, build_routing_table
+
+if TYPE_CHECKING:
+    from jira_tools.jira_client import JiraClient
+
+MASTER_ROBOT_RECORD = "master_robot_record"
+MASTER_ROUTING_RECORD = "master_routing_record"
+KINDS = (MASTER_ROBOT_RECORD, MASTER_ROUTING_RECORD)
+
+SOURCE_JIRA = "jira"
+SOURCE_SNAPSHOT = "snapshot"
+
+DEFAULT_SNAPSHOT_DIR = "mes_master_data/snapshots"
+_MANIFEST = "manifest.json"
+
+# (attachment id, created/sha256): changes whenever the underlying document does
+Version = Tuple[str, str]
+
+SNAPSHOT_LOADS = metrics.counter(
+    "master_data_snapshot_loads_total", "Snapshot document loads: hit (parsed copy reused) or miss (read and parsed).",
+    ("kind", "result"))
+
+def _issue_key(kind: str, client: JiraClient) -> Optional[str]:
+    if kind == MASTER_ROBOT_RECORD:
+        return client.config.master_robot_issue_key
+    if kind == MASTER_ROUTING_RECORD:
+        return client.config.master_routing_issue_key
+    raise ValueError(f"Unknown master data kind '{kind}'.")
+
+def data_source(client: JiraClient) -> str:
+    """The client's master data source: "jira" (default) or "snapshot"."""
+    return getattr(client.config, "master_data_source", None) or SOURCE_JIRA
+
+def _snapshot_dir(client: JiraClient) -> Path:
+    return Path(getattr(client.config, "snapshot_dir", None) or DEFAULT_SNAPSHOT_DIR)
+
+class SnapshotStore:
+    """
+    Versioned local copies of master data attachments, described by manifest.json.
+    Parsed documents are cached by sha256, so repeated loads return the same object.
+    """
+    def __init__(self, root: str | os.PathLike):
+        self.root = Path(root)
+        self._docs: Dict[str, Any] = {}
+        self._registries: Dict[str, RobotRegistry] = {}
+        self._tables: Dict[str, RoutingTable] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.root / _MANIFEST
+
+    def manifest(self) -> List[Dict[str, Any]]:
+        try:
+            return json.loads(self.manifest_path.read_text(encoding="utf-8"))["snapshots"]
+        except FileNotFoundError:
+            return []
+
+    def latest(self, kind: str) -> Optional[Dict[str, Any]]:
+        entries = [e for e in self.manifest() if e["kind"] == kind]
+        return max(entries, key=lambda e: e["fetchedAt"]) if entries else None
+
+    def load(self, entry: Dict[str, Any]) -> Any:
+        sha = entry["sha256"]
+        with self._lock:
+            SNAPSHOT_LOADS.inc(kind=entry["kind"], result="hit" if sha in self._docs else "miss")
+            if sha not in self._docs:
+                data = (self.root / entry["file"]).read_bytes()
+                if hashlib.sha256(data).hexdigest() != sha:
+                    raise ValueError(f"Snapshot {entry['file']} does not match its manifest hash.")
+                self._docs[sha] = json.loads(data)
+            return self._docs[sha]
+
+    def sync(self, client: JiraClient, kinds=KINDS) -> List[Dict[str, Any]]:
+        """
+        Download the current attachment for each kind; a new file is only written
+        when its content hash differs from the newest snapshot of that kind.
+        Returns the manifest entries that are now the newest for each kind.
+        """
+        manifest = self.manifest()
+        newest: List[Dict[str, Any]] = []
+        for kind in kinds:
+            issue_key = _issue_key(kind, client)
+            if not issue_key:
+                raise ValueError(f"No Jira issue key configured for {kind}.")
+            attachment = client.get_attachments(issue_key)[0]
+            doc = client.get_attachment_content(attachment["id"])
+            data = json.dumps(doc, indent=2, ensure_ascii=False).encode("utf-8")
+            sha = hashlib.sha256(data).hexdigest()
+
+            current = self.latest(kind)
+            if current is not None and current["sha256"] == sha:
+                compiled = self._compile(kind, current, doc)
+                if compiled:
+                    current.update(compiled)
+                    self._write_manifest([current if e["file"] == current["file"] else e for e in manifest])
+                newest.append(current)
+                continue
+
+            fetched_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+            rel = f"{kind}/{fetched_at.replace(':', '')}_{attachment['id']}.json"
+            path = self.root / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+            entry = {
+                "kind": kind,
+                "file": rel,
+                "sha256": sha,
+                "issueKey": issue_key,
+                "attachmentId": str(attachment["id"]),
+                "attachmentFilename": attachment.get("filename"),
+                "attachmentCreated": attachment.get("created"),
+                "fetchedAt": fetched_at,
+            }
+            entry.update(self._compile(kind, entry, doc))
+            manifest.append(entry)
+            self._write_manifest(manifest)
+            newest.append(entry)
+        return newest
+
+    def _compile(self, kind: str, entry: Dict[str, Any], doc: Any) -> Dict[str, str]:
+        """Build the lookup artifact a snapshot entry is missing; returns the manifest fields to add."""
+        if kind == MASTER_ROBOT_RECORD and not entry.get("registry"):
+            return {"registry": self._build_registry(entry["file"], doc)}
+        if kind == MASTER_ROUTING_RECORD and not self._table_current(entry):
+            return {"table": self._build_routing_table(entry, doc)}
+        return {}
+
+    def _build_registry(self, rel: str, doc: Any) -> str:
+        """Compile the robot record next to its JSON snapshot; returns the registry path relative to root."""
+        reg = str(Path(rel).with_suffix(".reg"))
+        build_registry(doc, self.root / reg)
+        return reg
+
+    def _build_routing_table(self, entry: Dict[str, Any], doc: Any) -> str:
+        """Compile the routing record's applicability table next to its JSON snapshot."""
+        table = str(Path(entry["file"]).with_suffix(".rtab"))
+        build_routing_table(doc, self.root / table, entry["sha256"])
+        return table
+
+    def _table_current(self, entry: Dict[str, Any]) -> bool:
+        """Whether the entry's table exists, is readable in this format and was compiled from its file."""
+        if not entry.get("table"):
+            return False
+        try:
+            return RoutingTable(self.root / entry["table"]).source_sha256 == entry["sha256"]
+        except (OSError, ValueError):
+            return False
+
+    def _retired(self, cache: Dict[str, Any], entry: Dict[str, Any]) -> List[Any]:
+        """
+        Remove from `cache` (under the lock) what was opened for snapshots that are
+        neither `entry` nor the newest of its kind; returns the removed objects.
+        """
+        latest = self.latest(entry["kind"])
+        keep = {entry["sha256"], latest["sha256"] if latest else None}
+        return [cache.pop(sha) for sha in [sha for sha in cache if sha not in keep]]
+
+    def open_registry(self, entry: Dict[str, Any]) -> Optional[RobotRegistry]:
+        """
+        Memory-mapped RIN registry for a robot record snapshot, if one was compiled.
+        Registries of superseded snapshots are unmapped once a newer one is opened.
+        """
+        if not entry.get("registry"):
+            return None
+        sha = entry["sha256"]
+        with self._lock:
+            reg = self._registries.get(sha)
+            if reg is not None:
+                return reg
+            reg = self._registries[sha] = RobotRegistry(self.root / entry["registry"])
+            retired = self._retired(self._registries, entry)
+        for old in retired:
+            try:
+                old.close()
+            except BufferError:
+                # a lookup is still reading it; the mapping goes when the last reference does
+                pass
+        return reg
+
+    def open_routing_table(self, entry: Dict[str, Any]) -> Optional[RoutingTable]:
+        """
+        Applicability table for a routing record snapshot, bound to its records, if one was compiled.
+        Tables of superseded snapshots are dropped once a newer one is opened.
+        """
+        if not entry.get("table"):
+            return None
+        sha = entry["sha256"]
+        with self._lock:
+            table = self._tables.get(sha)
+        if table is None:
+            doc = self.load(entry)
+            table = RoutingTable(self.root / entry["table"]).bind(doc["masterRoutingRecord"], sha)
+            with self._lock:
+                table = self._tables.setdefault(sha, table)
+                self._retired(self._tables, entry)
+        return table
+
+    def _write_manifest(self, entries: List[Dict[str, Any]]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps({"snapshots": entries}, indent=2), encoding="utf-8")
+        # readers never see a half-written manifest
+        os.replace(tmp, self.manifest_path)
+
+_stores: Dict[Path, SnapshotStore] = {}
+_stores_lock = threading.Lock()
+
+def get_snapshot_store(root: str | os.PathLike) -> SnapshotStore:
+    """One SnapshotStore (and parsed-document cache) per snapshot dir, per process."""
+    path = Path(root).resolve()
+    with _stores_lock:
+        return _stores.setdefault(path, SnapshotStore(path))
+
+def current_version(kind: str, client: JiraClient) -> Version:
+    """
+    Cheap check of which document is current for `kind` under the client's data source.
+    Jira: the first attachment's (id, created). Snapshot: the newest entry's (attachmentId, sha256).
+    """
+    if data_source(client) == SOURCE_SNAPSHOT:
+        entry = get_snapshot_store(_snapshot_dir(client)).latest(kind)
+        if entry is None:
+            raise ValueError(f"No {kind} snapshot in {_snapshot_dir(client)}; run `mes-snapshot sync`.")
+        return (entry["attachmentId"], entry["sha256"])
+    attachment = client.get_attachments(_issue_key(kind, client))[0]
+    return (str(attachment.get("id")), str(attachment.get("created")))
+
+def load_document(kind: str, client: JiraClient, version: Optional[Version] = None) -> Any:
+    """
+    Load the document for `kind` (at `version`, when already known) from the client's data source.
+    """
+    if data_source(client) == SOURCE_SNAPSHOT:
+        store = get_snapshot_store(_snapshot_dir(client))
+        entry = store.latest(kind)
+        if entry is None:
+            raise ValueError(f"No {kind} snapshot in {_snapshot_dir(client)}; run `mes-snapshot sync`.")
+        return store.load(entry)
+    if version is None:
+        version = current_version(kind, client)
+    return client.get_attachment_content(version[0])
+
+def open_robot_registry(client: JiraClient) -> Optional[RobotRegistry]:
+    """
+    In snapshot mode, the memory-mapped registry of the newest robot record snapshot.
+    None in Jira mode, or when the snapshot has no compiled registry.
+    """
+    if data_source(client) != SOURCE_SNAPSHOT:
+        return None
+    store = get_snapshot_store(_snapshot_dir(client))
+    entry = store.latest(MASTER_ROBOT_RECORD)
+    return store.open_registry(entry) if entry else None
+
+def open_routing_table(client: JiraClient) -> Optional[RoutingTable]:
+    """
+    In snapshot mode, the compiled applicability table of the newest routing record snapshot.
+    None in Jira mode, or when the snapshot has no compiled table.
+    Raises:
+        ValueError: the table was not compiled from the snapshot's file (`mes-snapshot sync` recompiles it)
+    """
+    if data_source(client) != SOURCE_SNAPSHOT:
+        return None
+    store = get_snapshot_store(_snapshot_dir(client))
+    entry = store.latest(MASTER_ROUTING_RECORD)
+    return store.open_routing_table(entry) if entry else None
@@ -0,0 +1,337 @@
+"""
+Write-behind outbox for event comments.
+
+`EventOutbox.enqueue_event` validates an event and commits it to a local SQLite
+file, then returns; background workers post it to Jira afterwards.
+- Events for the same issue key are posted strictly in enqueue order (FIFO per issue)
+- Different issue keys are posted in parallel, one in-flight event per issue
+- Connection errors, 429 and 5xx are retried with exponential backoff; the issue's
+  later events wait behind the failing one
+- Every event carries an eventId. A failed POST may still have created the comment (e.g. a read
+  timeout), so a retry first looks for that id among the issue's newest comments, and histories
+  keep one event per id if a duplicate gets through anyway
+- Other 4xx responses can never succeed, so the event is parked as "failed" and the issue moves on
+Rows survive restarts: anything still pending when the process stops is posted by the next one.
+Several processes (e.g. WSGI workers) may share one outbox file: a row is claimed with a
+time-limited lease in the database, so each issue still has at most one post in flight. A row
+whose lease ran out (slow Jira, or a process killed mid-post) is checked for its eventId before
+the next claimant posts it again.
+A database error (e.g. "database is locked" while another process writes) is logged and counted
+in event_outbox_db_errors_total; the worker backs off and tries again.
+"""
+from __future__ import annotations
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional
+
+import requests
+
+from jira_tools.services.events import build_event_comment_body, event_id_of
+from jira_tools.services.http import JiraHttpError, post_json
+from jira_tools.utils import metrics
+
+if TYPE_CHECKING:
+    from jira_tools.jira_client import JiraClient
+
+log = logging.getLogger(__name__)
+
+OUTBOX_DB_ERRORS = metrics.counter(
+    "event_outbox_db_errors_total", "Outbox worker database errors, by step (claim, finish).", ("step",))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    issue_key       TEXT    NOT NULL,
+    body            TEXT    NOT NULL,
+    state           TEXT    NOT NULL DEFAULT 'pending',
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL    NOT NULL DEFAULT 0,
+    last_error      TEXT,
+    created_at      REAL    NOT NULL,
+    lease_until     REAL    NOT NULL DEFAULT 0,
+    claims          INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (state, issue_key, id);
+"""
+
+# newest comments searched for an event's id before it is posted again
+_REPOST_CHECK_COMMENTS = 50
+# longest pause between worker retries after a database error
+_DB_RETRY_MAX = 10.0
+
+# Oldest head (first pending row of its issue) that is due and not leased by any worker.
+# Only heads are ever leased, so an unleased head means nothing is in flight for that issue.
+_CLAIM_SQL = """
+SELECT o.id, o.issue_key, o.body, o.attempts, o.claims FROM outbox o
+WHERE o.state = 'pending' AND o.next_attempt_at <= :now AND o.lease_until <= :now
+  AND o.id = (SELECT MIN(i.id) FROM outbox i WHERE i.issue_key = o.issue_key AND i.state = 'pending')
+ORDER BY o.id
+LIMIT 1
+"""
+
+def _retryable(e: Exception) -> bool:
+    if isinstance(e, JiraHttpError) and e.response is not None:
+        return e.response.status_code == 429 or e.response.status_code >= 500
+    return isinstance(e, requests.exceptions.RequestException)
+
+class EventOutbox:
+    """
+    Durable local queue of comment bodies, drained to Jira by `workers` threads.
+    Arguments:
+        path: SQLite file (created with its parent dirs)
+        client: JiraClient used by the workers
+        workers: number of issues posted concurrently
+        backoff_base / backoff_max: retry delay is min(max, base * 2**attempts), +/- 20% jitter
+        lease: seconds a claimed row is reserved for its worker; outlives the POST timeout,
+               and lets another process take over the row if this one dies mid-post
+    """
+    def __init__(
+        self,
+        path: str | Path,
+        client: JiraClient,
+        *,
+        workers: int = 4,
+        backoff_base: float = 1.0,
+        backoff_max: float = 300.0,
+        lease: float = 120.0,
+    ):
+        self.path = Path(path)
+        self.client = client
+        self.workers = workers
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease = lease
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # handlers use `_db` under `_cond`; workers claim and finish rows on `_worker_db` under
+        # `_worker_lock`, so waiting out another process's write lock (`timeout`) never blocks
+        # enqueue. `_cond` itself only guards `_db` and wakes idle workers
+        self._db = self._connect()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        columns = {r[1] for r in self._db.execute("PRAGMA table_info(outbox)")}
+        if "lease_until" not in columns:
+            self._db.execute("ALTER TABLE outbox ADD COLUMN lease_until REAL NOT NULL DEFAULT 0")
+        if "claims" not in columns:
+            self._db.execute("ALTER TABLE outbox ADD COLUMN claims INTEGER NOT NULL DEFAULT 0")
+            # rows an older version tried or had in flight may already be in Jira
+            self._db.execute("UPDATE outbox SET claims = attempts + (lease_until > 0)")
+        self._worker_db = self._connect()
+        self._worker_lock = threading.Lock()
+        self._cond = threading.Condition()
+        # bumped on every notify, so a worker that found nothing to claim does not sleep through
+        # an event enqueued between its claim and its wait
+        self._wakeups = 0
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None, timeout=10.0)
+
+    # ---- producer side ----------------------------------------------------
+
+    def enqueue(self, issue_key: str, body: Mapping[str, Any]) -> int:
+        """Persist an ADF comment payload for `issue_key`; returns the outbox row id once committed."""
+        data = json.dumps(body, ensure_ascii=False, separators=(",", ":"))
+        with self._cond:
+            cur = self._db.execute(
+                "INSERT INTO outbox (issue_key, body, created_at) VALUES (?, ?, ?)",
+                (issue_key, data, time.time()),
+            )
+            self._wakeups += 1
+            self._cond.notify()
+            return cur.lastrowid
+
+    def enqueue_event(self, issue_key: str, event: Mapping[str, Any]) -> int:
+        """
+        Validate and queue an event as a structured comment (see `post_event`).
+        Raises:
+            ValueError: If the event is invalid; nothing is queued.
+        """
+        return self.enqueue(issue_key, build_event_comment_body(event, event_id=uuid.uuid4().hex))
+
+    def depth(self, issue_key: Optional[str] = None) -> int:
+        """Pending events, overall or for one issue."""
+        sql = "SELECT COUNT(*) FROM outbox WHERE state = 'pending'"
+        args: tuple = ()
+        if issue_key is not None:
+            sql += " AND issue_key = ?"
+            args = (issue_key,)
+        with self._cond:
+            return self._db.execute(sql, args).fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, parked failures, posts in flight (any process) and the age of the oldest pending event."""
+        with self._cond:
+            pending, oldest = self._db.execute(
+                "SELECT COUNT(*), MIN(created_at) FROM outbox WHERE state = 'pending'").fetchone()
+            failed = self._db.execute("SELECT COUNT(*) FROM outbox WHERE state = 'failed'").fetchone()[0]
+            inflight = self._db.execute(
+                "SELECT COUNT(*) FROM outbox WHERE state = 'pending' AND lease_until > ?", (time.time(),)).fetchone()[0]
+        return {
+            "pending": pending,
+            "failed": failed,
+            "inFlight": inflight,
+            "oldestPendingAgeSeconds": round(time.time() - oldest, 3) if oldest is not None else None,
+        }
+
+    def failed(self) -> List[Dict[str, Any]]:
+        """Events Jira rejected permanently, oldest first."""
+        with self._cond:
+            rows = self._db.execute(
+                "SELECT id, issue_key, attempts, last_error, created_at FROM outbox WHERE state = 'failed' ORDER BY id"
+            ).fetchall()
+        return [
+            {"id": r[0], "issueKey": r[1], "attempts": r[2], "error": r[3], "createdAt": r[4]}
+            for r in rows
+        ]
+
+    # ---- workers ----------------------------------------------------------
+
+    def start(self) -> "EventOutbox":
+        with self._cond:
+            if self._threads:
+                return self
+            self._stopping = False
+            self._threads = [
+                threading.Thread(target=self._worker, name=f"event-outbox-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the workers after their current post; pending rows stay on disk."""
+        with self._cond:
+            self._stopping = True
+            self._wakeups += 1
+            self._cond.notify_all()
+            threads, self._threads = self._threads, []
+        for t in threads:
+            t.join(timeout)
+
+    def close(self) -> None:
+        self.stop()
+        with self._cond:
+            self._db.close()
+        with self._worker_lock:
+            self._worker_db.close()
+
+    def drain(self, timeout: float = 30.0) -> bool:
+        """Wait until nothing is pending (in-flight rows count as pending); returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.depth() == 0:
+                return True
+            time.sleep(0.01)
+        return False
+
+    def _claim(self) -> Optional[tuple]:
+        """
+        Lease the oldest due head row whose issue has nothing in flight, or None.
+        Returns (id, issue_key, body, attempts, claims), `claims` counting the row's earlier leases.
+        """
+        with self._worker_lock:
+            db = self._worker_db
+            now = time.time()
+            # IMMEDIATE takes the write lock up front, so two processes cannot lease the same row
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(_CLAIM_SQL, {"now": now}).fetchone()
+                if row is not None:
+                    db.execute("UPDATE outbox SET lease_until = ?, claims = claims + 1 WHERE id = ?",
+                               (now + self.lease, row[0]))
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+            return row
+
+    def _next_due(self) -> Optional[float]:
+        with self._worker_lock:
+            row = self._worker_db.execute(
+                "SELECT MIN(next_attempt_at) FROM outbox WHERE state = 'pending' AND next_attempt_at > ?",
+                (time.time(),),
+            ).fetchone()
+        return row[0]
+
+    def _pause(self, wakeups: int, timeout: float) -> None:
+        """Sleep up to `timeout`, unless stopping or notified since `wakeups` was read."""
+        with self._cond:
+            if not self._stopping and self._wakeups == wakeups:
+                self._cond.wait(timeout)
+
+    def _worker(self) -> None:
+        db_failures = 0
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+                wakeups = self._wakeups
+            step = "claim"
+            try:
+                row = self._claim()
+                if row is None:
+                    due = self._next_due()
+                    # woken early by enqueue, or by another worker finishing an issue;
+                    # rows from other processes are picked up by the 1 s poll
+                    self._pause(wakeups, min(1.0, max(0.0, due - time.time())) if due else 1.0)
+                    continue
+                step = "finish"
+                self._deliver(*row)
+                db_failures = 0
+            except Exception as e:
+                # a row posted but not finished is claimed again once its lease runs out,
+                # and then found by its eventId instead of being posted twice
+                db_failures += 1
+                OUTBOX_DB_ERRORS.inc(step=step)
+                delay = min(_DB_RETRY_MAX, self.backoff_base * 2 ** (db_failures - 1))
+                log.warning("Event outbox %s failed, retrying in %.1fs: %s", step, delay, e)
+                self._pause(wakeups, delay)
+
+    def _deliver(self, row_id: int, issue_key: str, body: str, attempts: int, claims: int) -> None:
+        error: Optional[Exception] = None
+        try:
+            payload = json.loads(body)
+            # an earlier lease (a failed attempt, or a worker that died or outlived its lease
+            # mid-post) may have created the comment even though no success was recorded
+            if not (claims and self._already_posted(issue_key, payload)):
+                post_json(f"{issue_key}/comment", payload, self.client)
+        except Exception as e:
+            error = e
+        self._finish(row_id, attempts + 1, error)
+
+    def _already_posted(self, issue_key: str, payload: Mapping[str, Any]) -> bool:
+        """Whether a comment carrying this payload's eventId is among the issue's newest comments."""
+        event_id = event_id_of(payload.get("body"))
+        if event_id is None:
+            return False
+        page = self.client.get_comment_page(issue_key, 0, _REPOST_CHECK_COMMENTS, order="-created")
+        return any(event_id_of(c.get("body")) == event_id for c in page.get("comments", []))
+
+    def _finish(self, row_id: int, attempts: int, error: Optional[Exception]) -> None:
+        with self._worker_lock:
+            db = self._worker_db
+            if error is None:
+                db.execute("DELETE FROM outbox WHERE id = ?", (row_id,))
+            elif _retryable(error):
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+                delay *= random.uniform(0.8, 1.2)
+                db.execute(
+                    "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ?, lease_until = 0 WHERE id = ?",
+                    (attempts, time.time() + delay, str(error)[:1000], row_id),
+                )
+            else:
+                db.execute(
+                    "UPDATE outbox SET state = 'failed', attempts = ?, last_error = ?, lease_until = 0 WHERE id = ?",
+                    (attempts, str(error)[:1000], row_id),
+                )
+        with self._cond:
+            self._wakeups += 1
+            self._cond.notify_all()
@@ -1,25 +1,185 @@
-from typing import Dict
-from jira_tools.jira_client import JiraClient
+from __future__ import annotations
+import time
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Mapping, Optional, Tuple
+from jira_tools.services import master_data
+from jira_tools.services.errors import NotFoundError
+from jira_tools.utils import metrics
 
-def lookup_robot_pid(payload: Dict[str, str], client: JiraClient) -> str:
+if TYPE_CHECKING:
+    from jira_tools.async_client import AsyncJiraClient
+    from jira_tools.jira_client import JiraClient
+
+# How long a loaded index is trusted before we ask Jira whether the attachment changed
+DEFAULT_INDEX_TTL = 60.0
+
+@dataclass
+class _IndexEntry:
+    # (attachment id, created) of the attachment the map was built from
+    version: Tuple[str, str]
+    rin_to_pid: Mapping[str, str]
+    checked_at: float
+
+@dataclass
+class RobotIndexStats:
+    hits: int = 0           # lookups answered without touching Jira
+    misses: int = 0         # lookups that had to (re)validate against Jira
+    revalidations: int = 0  # attachment metadata checks after TTL expiry
+    refreshes: int = 0      # full Master Robot Record downloads
+
+@dataclass
+class RobotIndex:
+    """
+    Process-wide RIN -> robotPid index built from the Master Robot Record attachment.
+    - Loaded once per master robot issue and keyed by the attachment's (id, created),
+      or by the snapshot's (attachment id, sha256) in snapshot mode
+    - After `ttl` seconds, only the attachment metadata is re-fetched;
+      the record itself is re-downloaded only when the attachment changed
+    """
+    ttl: float = DEFAULT_INDEX_TTL
+    stats: RobotIndexStats = field(default_factory=RobotIndexStats)
+    _entries: Dict[str, _IndexEntry] = field(default_factory=dict, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def get_map(self, client: JiraClient) -> Mapping[str, str]:
+        """
+        Return the current RIN -> robotPid map, revalidating if the TTL has lapsed.
+        A dict in Jira mode; a memory-mapped RobotRegistry for compiled snapshots.
+        """
+        issue_key = client.config.master_robot_issue_key
+        now = time.monotonic()
+        entry = self._entries.get(issue_key)
+        if entry is not None and now - entry.checked_at < self.ttl:
+            self.stats.hits += 1
+            return entry.rin_to_pid
+
+        with self._lock:
+            # another thread may have revalidated while we waited
+            entry = self._entries.get(issue_key)
+            if entry is not None and now - entry.checked_at < self.ttl:
+                self.stats.hits += 1
+                return entry.rin_to_pid
+            self.stats.misses += 1
+            entry = self._revalidate(issue_key, entry, client)
+            self._entries[issue_key] = entry
+            return entry.rin_to_pid
+
+    def _revalidate(self, issue_key: str, entry: Optional[_IndexEntry], client: JiraClient) -> _IndexEntry:
+        version = master_data.current_version(master_data.MASTER_ROBOT_RECORD, client)
+        if entry is not None:
+            self.stats.revalidations += 1
+            if entry.version == version:
+                entry.checked_at = time.monotonic()
+                return entry
+
+        self.stats.refreshes += 1
+        # snapshot mode: binary search over the shared mmap'd registry instead of a per-process dict
+        rin_to_pid = master_data.open_robot_registry(client)
+        if rin_to_pid is None:
+            mrr_json = master_data.load_document(master_data.MASTER_ROBOT_RECORD, client, version)
+            rin_to_pid = _build_rin_map(mrr_json)
+        return _IndexEntry(version=version, rin_to_pid=rin_to_pid, checked_at=time.monotonic())
+
+    async def get_map_async(self, client: "AsyncJiraClient") -> Mapping[str, str]:
+        """
+        asyncio version of `get_map`. Runs on the event loop thread, so no lock is
+        taken; concurrent coroutines may at worst revalidate the same entry twice.
+        """
+        if master_data.data_source(client) == master_data.SOURCE_SNAPSHOT:
+            # local files only; no network to await
+            return self.get_map(client)
+        issue_key = client.config.master_robot_issue_key
+        entry = self._entries.get(issue_key)
+        if entry is not None and time.monotonic() - entry.checked_at < self.ttl:
+            self.stats.hits += 1
+            return entry.rin_to_pid
+
+        self.stats.misses += 1
+        attachment = (await client.get_attachments(issue_key))[0]
+        version = (str(attachment.get("id")), str(attachment.get("created")))
+        if entry is not None:
+            self.stats.revalidations += 1
+            if entry.version == version:
+                entry.checked_at = time.monotonic()
+                return entry.rin_to_pid
+
+        self.stats.refreshes += 1
+        mrr_json = await client.get_attachment_content(version[0])
+        entry = _IndexEntry(version=version, rin_to_pid=_build_rin_map(mrr_json), checked_at=time.monotonic())
+        self._entries[issue_key] = entry
+        return entry.rin_to_pid
+
+    def version(self, client: JiraClient) -> Tuple[str, str]:
+        """Version of the Master Robot Record currently served (revalidating like `get_map`)."""
+        self.get_map(client)
+        return self._entries[client.config.master_robot_issue_key].version
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+def _build_rin_map(mrr_json: Any) -> Dict[str, str]:
+    if not isinstance(mrr_json, dict) or not mrr_json:
+        raise ValueError("Master Robot Record attachment must be a non-empty JSON object (RIN -> robotPid).")
+    return {rin: str(pid) for rin, pid in mrr_json.items()}
+
+# Shared by every lookup in this process
+ROBOT_INDEX = RobotIndex()
+
+metrics.callback(
+    "robot_index_lookups_total",
+    "RIN index activity: hit (served from memory), miss (revalidated), revalidation, refresh (record reloaded).",
+    "counter",
+    lambda: {
+        ("hit",): ROBOT_INDEX.stats.hits,
+        ("miss",): ROBOT_INDEX.stats.misses,
+        ("revalidation",): ROBOT_INDEX.stats.revalidations,
+        ("refresh",): ROBOT_INDEX.stats.refreshes,
+    },
+    ("result",),
+)
+
+def _require_rin(payload: Dict[str, str]) -> str:
+    rin = (payload or {}).get("rin")
+    if not rin:
+        raise ValueError("QR payload must include 'rin'.")
+    return rin
+
+def _pid_for(rin: str, rin_to_pid: Mapping[str, str]) -> str:
+    try:
+    # Return robot_pid, if found
+        return rin_to_pid[rin]
+    except KeyError as e:
+        raise NotFoundError(f"RIN '{rin}' not found in Master Robot Record.") from e
+
+def lookup_robot_pid(payload: Dict[str, str], client: JiraClient, index: Optional[RobotIndex] = None) -> str:
     """
     Given a QR payload containing the RIN, looks in the master robot record to find the matching robot_pid
     Master robot record is a flat map: { RIN -> robot_pid }.
+    Served from the process-wide RobotIndex; Jira is only consulted when the TTL lapses.
     Arguments:
         payload: Dict[str, str]   QR payload
         client: JiraClient
+        index: RobotIndex         defaults to the process-wide ROBOT_INDEX
     Returns
         robot_pid: str
+    Raises:
+        NotFoundError: the RIN is not in the Master Robot Record
+        ValueError: master data is misconfigured or malformed
     """
-    rin = (payload or {}).get("rin")
-    if not rin:
-        raise ValueError("QR payload must include 'rin'.")
-    # Get Master Robot Record (json) attachment from the Master Robot Issue
-    mrr_json = client.get_nth_attachment(0, client.config.master_robot_issue_key)
-    if not isinstance(mrr_json, dict) or not mrr_json:
-        raise ValueError("Master Robot Record attachment must be a non-empty JSON object (RIN -> robotPid).")
-    try:
-    # Return robot_pid, if found
-        return str(mrr_json[rin])
-    except KeyError as e:
-        raise ValueError(f"RIN '{rin}' not found in Master Robot Record.") from e
+    rin = _require_rin(payload)
+    return _pid_for(rin, (index or ROBOT_INDEX).get_map(client))
+
+def lookup_robot_pids(rins: Iterable[str], client: JiraClient, index: Optional[RobotIndex] = None) -> Dict[str, Optional[str]]:
+    """
+    Resolve many RINs against one load of the Master Robot Record.
+    Unknown RINs map to None.
+    """
+    rin_to_pid = (index or ROBOT_INDEX).get_map(client)
+    return {rin: rin_to_pid.get(rin) for rin in rins}
+
+async def lookup_robot_pid_async(payload: Dict[str, str], client: "AsyncJiraClient", index: Optional[RobotIndex] = None) -> str:
+    """asyncio version of `lookup_robot_pid`."""
+    rin = _require_rin(payload)
+    return _pid_for(rin, await (index or ROBOT_INDEX).get_map_async(client))
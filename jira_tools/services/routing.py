@@ -1,53 +1,111 @@
-import re
-from typing import Any, Dict, List, Tuple
-from jira_tools.jira_client import JiraClient
-from jira_tools.utils.parse import parse_robot_pid, parse_semver
+from __future__ import annotations
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+from jira_tools.services import master_data
+from jira_tools.utils import metrics
+from jira_tools.utils.routing_index import RoutingIndex
+from jira_tools.utils.routing_table import RoutingTable
 
-# matches a start-end effectivity range e.g. 0001-0086
-_EFFECTIVITY_RE = re.compile(r"^(?P<start>\d{4})-(?P<end>\d{4})$")
+if TYPE_CHECKING:
+    from jira_tools.async_client import AsyncJiraClient
+    from jira_tools.jira_client import JiraClient
 
-def get_master_routing(client: JiraClient) -> List[Dict[str, Any]]:
-    mrouting_issue_key = client.config.master_routing_issue_key
-    attachment = client.get_nth_attachment(0, mrouting_issue_key)
+MASTER_ROUTING_LOOKUPS = metrics.counter(
+    "master_routing_lookups_total",
+    "Master routing cache activity: hit (served from memory), revalidation, refresh (record reloaded).",
+    ("result",))
+
+# How long a loaded master routing is trusted before we ask Jira whether the attachment changed
+DEFAULT_ROUTING_TTL = 60.0
+
+def _master_routing_from(attachment: Any) -> List[Dict[str, Any]]:
     master_routing = (attachment or {}).get("masterRoutingRecord")
     if not isinstance(master_routing, list) or not master_routing:
         raise ValueError("Master Routing Record attachment must contain non-empty 'masterRoutingRecord' array.")
     return master_routing
 
-def get_routing_for(robot_pid: str, master_routing: List[Dict[str, Any]]) -> Dict[str, Any]:
+def get_master_routing(client: JiraClient) -> List[Dict[str, Any]]:
+    """
+    Master routing list from the client's master data source (Jira attachment or local snapshot).
+    Snapshot loads are cached, so they return the same list. For lookups, use the
+    compiled index of `ROUTING_STORE.get(client)`, which is kept per attachment version.
+    """
+    return _master_routing_from(master_data.load_document(master_data.MASTER_ROUTING_RECORD, client))
+
+async def get_master_routing_async(client: "AsyncJiraClient") -> List[Dict[str, Any]]:
+    """asyncio version of `get_master_routing`."""
+    if master_data.data_source(client) == master_data.SOURCE_SNAPSHOT:
+        return get_master_routing(client)
+    mrouting_issue_key = client.config.master_routing_issue_key
+    return _master_routing_from(await client.get_nth_attachment(0, mrouting_issue_key))
+
+@dataclass
+class MasterRouting:
+    # (attachment id, created) in Jira mode, (attachment id, sha256) in snapshot mode
+    version: master_data.Version
+    # compiled applicability table in snapshot mode (when the snapshot has one), else a RoutingIndex
+    index: Union[RoutingIndex, RoutingTable]
+    checked_at: float
+
+@dataclass
+class RoutingStore:
+    """
+    Process-wide compiled master routing, revalidated like RobotIndex:
+    after `ttl` seconds only the attachment metadata is re-fetched, and the
+    record is re-downloaded and re-compiled only when the attachment changed.
+    """
+    ttl: float = DEFAULT_ROUTING_TTL
+    _entries: Dict[Optional[str], MasterRouting] = field(default_factory=dict, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def get(self, client: JiraClient) -> MasterRouting:
+        """Current compiled master routing and the version it was built from."""
+        issue_key = client.config.master_routing_issue_key
+        entry = self._entries.get(issue_key)
+        if entry is not None and time.monotonic() - entry.checked_at < self.ttl:
+            MASTER_ROUTING_LOOKUPS.inc(result="hit")
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(issue_key)
+            if entry is not None and time.monotonic() - entry.checked_at < self.ttl:
+                MASTER_ROUTING_LOOKUPS.inc(result="hit")
+                return entry
+            version = master_data.current_version(master_data.MASTER_ROUTING_RECORD, client)
+            if entry is not None and entry.version == version:
+                MASTER_ROUTING_LOOKUPS.inc(result="revalidation")
+                entry.checked_at = time.monotonic()
+                return entry
+            MASTER_ROUTING_LOOKUPS.inc(result="refresh")
+            index = master_data.open_routing_table(client)
+            if index is None:
+                doc = master_data.load_document(master_data.MASTER_ROUTING_RECORD, client, version)
+                index = RoutingIndex(_master_routing_from(doc))
+            entry = MasterRouting(version=version, index=index, checked_at=time.monotonic())
+            self._entries[issue_key] = entry
+            return entry
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+# Shared by every routing request in this process
+ROUTING_STORE = RoutingStore()
+
+def get_routing_for(robot_pid: str,
+                    master_routing: Union[List[Dict[str, Any]], RoutingIndex, RoutingTable]) -> Dict[str, Any]:
     """
     Given a robot_pid and the master routing list, we return the correct production routing
     Highest semantic version wins among effectivity matches
     Arguments:
         robot_pid: str                          e.g. JAG-0007
-        master_routing: List[Dict[str, Any]]
+        master_routing: List[Dict[str, Any]]    or a prebuilt RoutingIndex, or a bound RoutingTable
+                                                (a list is compiled on every call; reuse `ROUTING_STORE.get(client).index`)
     Returns:
         A dict of the applicable routing with highest semantic version
     """
-    # Create list to hold applicable routing candidates; we sort list later
-    candidates: List[Tuple[Tuple[int, int, int], Dict[str, Any]]] = []
-
-    # Get the numeric portion from `robot_pid`
-    seq = parse_robot_pid(robot_pid)
-
-    # Iterate through routing versions contained in master routing
-    # Append all applicable candidates with matching effectivity
-    # a - starting effectivity
-    # b - ending effectivity
-    for routing in master_routing:
-        eff = routing.get("effectivity", "")
-        m = _EFFECTIVITY_RE.match(eff)
-        if not m:
-            continue
-        a, b = int(m.group("start")), int(m.group("end"))
-        if a <= seq <= b:
-            ver = str(routing.get("version", "0.0.0"))
-            candidates.append((parse_semver(ver), routing))
-
-    if not candidates:
-        raise LookupError(f"No routing found that covers robot '{robot_pid}'.")
-
-    # Sort the candidates to get the highest semantic version
-    candidates.sort(key=lambda t: t[0], reverse=True)
-    # Return highest semantic version of routing applicable to the robot_pid
-    return candidates[0][1]
+    if isinstance(master_routing, (RoutingIndex, RoutingTable)):
+        return master_routing.resolve(robot_pid)
+    return RoutingIndex(master_routing).resolve(robot_pid)
@@ -0,0 +1,333 @@
+"""
+Static standard work site: the Markdown work instructions pre-rendered to HTML.
+
+`build_site` (CLI: `mes-standard-work build`) renders every .md under the source dir
+(default standard_work/) into the site dir, mirroring its layout:
+
+    <site_dir>/
+        index.html
+        jaeger-p2/base.html, jaeger-p2/tower.html, ...
+        assets/site.<hash>.css
+        assets/jaeger-p2/img/base-rails.<hash>.png, assets/jaeger-p2/bom/<name>.<hash>.csv, ...
+        assets/jaeger-p2/img/base-rails.<hash>.w640.webp, ...   (see image_derivatives)
+        manifest.json, images.json
+
+- Every linked file (images, BOM CSVs, ...) is copied under assets/ with its content hash in the
+  name, so it can be cached forever; a changed file gets a new name and the page links to it
+- Links between .md files point at the rendered .html pages
+- Images get resized and WebP variants, so a tablet downloads the size it displays instead of
+  the full-resolution screenshot: links to an image open its display-sized WebP, and embedded
+  images are offered through `<picture>`/`srcset`
+- Each page gets a table of contents from its headings
+- Text files are stored next to .gz (and .br, when `brotli` is installed) copies, so the API
+  serves them precompressed
+Rebuilds only rewrite files whose content changed, so unchanged pages keep their ETags.
+"""
+from __future__ import annotations
+import gzip
+import hashlib
+import html
+import json
+import os
+import posixpath
+import shutil
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import quote, unquote, urlsplit
+
+from jira_tools.services.image_derivatives import IMAGES_MANIFEST, RASTER, ImagePipeline, display_variant, srcset
+from jira_tools.utils.markdown import Heading, render_markdown
+
+DEFAULT_SOURCE_DIR = "standard_work"
+DEFAULT_SITE_DIR = "var/standard_work_site"
+ASSETS_DIR = "assets"
+MANIFEST = "manifest.json"
+
+# precompressed next to the original; images and PDFs are already compressed
+COMPRESSIBLE = frozenset({".html", ".css", ".js", ".csv", ".json", ".svg", ".txt"})
+# copies smaller than this are not worth a .gz/.br
+_MIN_COMPRESS_BYTES = 256
+
+_CSS = """\
+:root { color-scheme: dark; }
+body { margin: 0; background: #0d1117; color: #e6edf3; font: 16px/1.5 -apple-system, "Segoe UI", Helvetica, Arial, sans-serif; }
+main { max-width: 1280px; margin: 0 auto; padding: 24px 32px 64px; }
+a { color: #4493f8; }
+h1, h2 { border-bottom: 1px solid #30363d; padding-bottom: .3em; }
+table { border-collapse: collapse; margin: 16px 0; display: block; overflow-x: auto; }
+th, td { border: 1px solid #30363d; padding: 6px 13px; }
+tr:nth-child(2n) { background: #161b22; }
+code { background: #343942; border-radius: 6px; padding: .2em .4em; font-size: 85%; }
+pre { background: #161b22; border-radius: 6px; padding: 16px; overflow: auto; }
+pre code { background: none; padding: 0; }
+img { max-width: 100%; height: auto; }
+picture { display: block; }
+input[type=checkbox] { transform: scale(1.4); margin-right: .5em; }
+nav.toc { background: #161b22; border: 1px solid #30363d; border-radius: 6px; padding: 8px 16px; margin-bottom: 24px; }
+nav.toc ul { margin: 0; padding-left: 20px; }
+nav.toc .toc-3 { margin-left: 16px; font-size: 90%; }
+"""
+
+_PAGE = """\
+<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8" />
+<meta name="viewport" content="width=device-width, initial-scale=1" />
+<title>{title}</title>
+<link rel="stylesheet" href="{css}" />
+</head>
+<body>
+<main>
+{toc}
+{body}
+</main>
+</body>
+</html>
+"""
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:12]
+
+def hashed_name(rel: str, data: bytes) -> str:
+    """base-rails.png -> base-rails.<hash>.png (same directory)."""
+    stem, ext = posixpath.splitext(rel)
+    return f"{stem}.{content_hash(data)}{ext}"
+
+def _brotli():
+    # optional: `pip install '.[site]'`; gzip alone is used without it
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """Write `data` unless the file already holds it; returns True when written."""
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return True
+
+def precompress(path: Path, data: bytes, force: bool = False) -> List[Path]:
+    """Write .gz (and .br) copies of a text file; returns the files written."""
+    if path.suffix not in COMPRESSIBLE or len(data) < _MIN_COMPRESS_BYTES:
+        return []
+    variants = [(path.with_name(path.name + ".gz"), lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    brotli = _brotli()
+    if brotli is not None:
+        variants.append((path.with_name(path.name + ".br"), lambda d: brotli.compress(d, quality=11)))
+    written = []
+    for target, compress in variants:
+        if force or not target.exists():
+            write_if_changed(target, compress(data))
+            written.append(target)
+    return written
+
+def _mime(path: str) -> str:
+    return "image/jpeg" if path.lower().endswith((".jpg", ".jpeg")) else "image/png"
+
+def toc_html(headings: List[Heading], levels=(2, 3)) -> str:
+    items = [
+        f'<li class="toc-{h.level}"><a href="#{h.id}">{html.escape(h.text)}</a></li>'
+        for h in headings if h.level in levels
+    ]
+    if not items:
+        return ""
+    return '<nav class="toc">\n<strong>Contents</strong>\n<ul>\n' + "\n".join(items) + "\n</ul>\n</nav>"
+
+@dataclass
+class SiteBuilder:
+    """
+    One build of the site. `build()` returns the manifest:
+    { builtAt, pages: {source .md: page .html}, assets: {source file: hashed asset}, missing: [...] }
+    `jobs` processes resize images (default: one per CPU).
+    """
+    source: Path
+    out: Path
+    jobs: Optional[int] = None
+    pages: Dict[str, str] = field(default_factory=dict)
+    assets: Dict[str, str] = field(default_factory=dict)
+    images: Dict[str, Any] = field(default_factory=dict)
+    missing: Set[str] = field(default_factory=set)
+    written: int = 0
+    image_pipeline: Optional[ImagePipeline] = None
+    _names: Dict[str, str] = field(default_factory=dict)
+
+    def build(self) -> Dict[str, Any]:
+        self.source = Path(self.source).resolve()
+        self.out = Path(self.out)
+        self.out.mkdir(parents=True, exist_ok=True)
+        css = self._asset_bytes(f"{ASSETS_DIR}/site.css", _CSS.encode("utf-8"))
+        self._derive_images()
+
+        sources = sorted(p for p in self.source.rglob("*.md") if self._published(p))
+        for md in sources:
+            rel = md.relative_to(self.source).as_posix()
+            self.pages[rel] = posixpath.splitext(rel)[0] + ".html"
+        for md in sources:
+            self._render_page(md, css)
+        self._render_index(css)
+        self._prune()
+
+        manifest = {
+            "builtAt": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "pages": self.pages,
+            "assets": self.assets,
+            "missing": sorted(self.missing),
+        }
+        # builtAt changes every run; the manifest is not served, so rewriting it is harmless
+        (self.out / MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        return manifest
+
+    def _published(self, path: Path) -> bool:
+        rel = path.relative_to(self.source)
+        return not any(part.startswith(".") for part in rel.parts)
+
+    def _emit(self, rel: str, data: bytes) -> None:
+        path = self.out / rel
+        changed = write_if_changed(path, data)
+        self.written += changed
+        precompress(path, data, force=changed)
+
+    def _asset_bytes(self, rel: str, data: bytes) -> str:
+        """Store generated content as a hashed asset; returns its site path."""
+        name = hashed_name(rel, data)
+        self._emit(name, data)
+        self.assets[rel] = name
+        return name
+
+    def _asset_name(self, src: Path) -> str:
+        rel = src.relative_to(self.source).as_posix()
+        if rel not in self._names:
+            self._names[rel] = hashed_name(f"{ASSETS_DIR}/{rel}", src.read_bytes())
+        return self._names[rel]
+
+    def _derive_images(self) -> None:
+        """Resize every source image up front, so pages can reference the variants."""
+        rasters = {
+            self._asset_name(p): p
+            for p in sorted(self.source.rglob("*"))
+            if p.suffix.lower() in RASTER and p.is_file() and self._published(p)
+        }
+        self.image_pipeline = ImagePipeline(self.out, **({"jobs": self.jobs} if self.jobs else {}))
+        self.images = self.image_pipeline.run(rasters)
+
+    def _asset_file(self, src: Path) -> str:
+        """Copy a linked source file under assets/ by content hash; returns its site path."""
+        rel = src.relative_to(self.source).as_posix()
+        if rel not in self.assets:
+            data = src.read_bytes()
+            name = self._asset_name(src)
+            target = self.out / name
+            if not target.exists():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(src, target)
+                self.written += 1
+            precompress(target, data)
+            self.assets[rel] = name
+        return self.assets[rel]
+
+    def _target(self, page_rel: str, href: str) -> Optional[str]:
+        """Site path of the page or hashed asset a relative link points at; None for other links."""
+        parts = urlsplit(href)
+        if parts.scheme or parts.netloc or href.startswith(("#", "/")) or not parts.path:
+            return None
+        target_rel = posixpath.normpath(posixpath.join(posixpath.dirname(page_rel), unquote(parts.path)))
+        if target_rel.startswith("../") or target_rel == "..":
+            return None
+        target = self.source / target_rel
+        if target_rel in self.pages:
+            return self.pages[target_rel]
+        if target.is_file():
+            return self._asset_file(target)
+        self.missing.add(f"{page_rel}: {href}")
+        return None
+
+    @staticmethod
+    def _url(page_rel: str, site_path: str) -> str:
+        return quote(posixpath.relpath(site_path, posixpath.dirname(page_rel) or "."))
+
+    def _link(self, page_rel: str, href: str) -> str:
+        """
+        Rewrite a link on `page_rel` to the rendered page or hashed asset it points at;
+        a link to a derived image opens its display-sized variant.
+        """
+        site_path = self._target(page_rel, href)
+        if site_path is None:
+            return href
+        if site_path in self.images:
+            site_path = display_variant(self.images[site_path]) or site_path
+        fragment = urlsplit(href).fragment
+        return self._url(page_rel, site_path) + (f"#{fragment}" if fragment else "")
+
+    def _image(self, page_rel: str, href: str, alt: str, title: Optional[str]) -> Optional[str]:
+        """<picture> offering the WebP and resized variants of a derived image; None for a plain <img>."""
+        site_path = self._target(page_rel, href)
+        entry = self.images.get(site_path) if site_path else None
+        if not entry:
+            return None
+        url = lambda path: self._url(page_rel, path)
+        # main is 1280px wide with 32px padding
+        sizes = "(max-width: 1280px) calc(100vw - 64px), 1216px"
+        webp = srcset(entry, "image/webp", url)
+        fallback = srcset(entry, _mime(site_path), url, full=site_path)
+        title_attr = f' title="{title}"' if title else ""
+        return (
+            f'<picture><source type="image/webp" srcset="{webp}" sizes="{sizes}" />'
+            f'<img src="{url(site_path)}" srcset="{fallback}" '
+            f'sizes="{sizes}" width="{entry["width"]}" height="{entry["height"]}" alt="{alt}"{title_attr} '
+            f'loading="lazy" decoding="async" /></picture>'
+        )
+
+    def _render_page(self, md: Path, css: str) -> None:
+        rel = md.relative_to(self.source).as_posix()
+        body, headings = render_markdown(
+            md.read_text(encoding="utf-8"),
+            link=lambda href: self._link(rel, href),
+            image=lambda href, alt, title: self._image(rel, href, alt, title),
+        )
+        title = next((h.text for h in headings if h.level == 1), posixpath.splitext(md.name)[0])
+        page = self.pages[rel]
+        page_dir = posixpath.dirname(page)
+        self._emit(page, _PAGE.format(
+            title=html.escape(title),
+            css=quote(posixpath.relpath(css, page_dir or ".")),
+            toc=toc_html(headings),
+            body=body,
+        ).encode("utf-8"))
+
+    def _render_index(self, css: str) -> None:
+        items = "\n".join(
+            f'<li><a href="{quote(page)}">{html.escape(src)}</a></li>'
+            for src, page in sorted(self.pages.items())
+        )
+        self._emit("index.html", _PAGE.format(
+            title="Standard Work", css=quote(css), toc="",
+            body=f"<h1>Standard Work</h1>\n<ul>\n{items}\n</ul>",
+        ).encode("utf-8"))
+
+    def _prune(self) -> None:
+        """Drop assets and pages (and their .gz/.br) that this build no longer produces."""
+        keep = set(self.assets.values()) | set(self.pages.values()) | {"index.html", MANIFEST, IMAGES_MANIFEST}
+        keep.update(v["path"] for entry in self.images.values() for v in entry["variants"])
+        for path in self.out.rglob("*"):
+            if not path.is_file():
+                continue
+            rel = path.relative_to(self.out).as_posix()
+            base = rel[:-3] if rel.endswith((".gz", ".br")) else rel
+            if base not in keep and (rel.startswith(f"{ASSETS_DIR}/") or base.endswith(".html")):
+                path.unlink()
+
+def build_site(source: str | os.PathLike = DEFAULT_SOURCE_DIR,
+               out: str | os.PathLike = DEFAULT_SITE_DIR, jobs: Optional[int] = None) -> Dict[str, Any]:
+    """Render the standard work Markdown under `source` into a static site under `out`; returns the manifest."""
+    return SiteBuilder(Path(source), Path(out), jobs=jobs).build()
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 def build_adf_comment_body(text: str) -> Dict[str, Any]:
     """
@@ -18,46 +18,221 @@ def build_adf_comment_body(text: str) -> Dict[str, Any]:
         }
     }
 
+# Nodes that always end on their own line
+_BLOCK_NODES = frozenset({"paragraph", "heading", "codeBlock", "listItem"})
+_LIST_NODES = frozenset({"bulletList", "orderedList"})
+
+def _append_with_newlines(out: List[str], s: str, nl_run: int) -> int:
+    """Append text containing newlines, keeping at most 2 in a row. Returns the new trailing run."""
+    for i, part in enumerate(s.split("\n")):
+        if i:
+            if nl_run < 2:
+                out.append("\n")
+            nl_run += 1
+        if part:
+            out.append(part)
+            nl_run = 0
+    return nl_run
+
 def adf_to_text(doc: Optional[Dict[str, Any]]) -> str:
     """
     Convert a Jira/Atlassian ADF document into plain text.
 
-    Minimal but resilient:
-      - Supports 'doc' -> paragraphs with text nodes
-      - Supports 'hardBreak' as newline
-      - Ignores unrecognized node types without crashing
+    Single pass over an explicit stack into one output buffer:
+      - 'paragraph', 'heading', 'codeBlock' and list items end with a newline
+      - 'hardBreak' is a newline
+      - bullet lists render as "- item", ordered lists as "1. item", nested lists indented
+      - 'mention', 'emoji' and 'inlineCard' render their display text / URL
+      - unrecognized nodes are flattened without crashing
+    Runs of 3+ newlines are collapsed to 2 as they are emitted; edges are trimmed.
     """
     if not isinstance(doc, dict) or doc.get("type") != "doc":
         return ""
 
-    lines: List[str] = []
+    out: List[str] = []
+    append = out.append
+    raw_len = 0           # characters emitted before newline collapsing
+    raw_last_nl = False   # whether the last raw character was a newline
+    nl_run = 0            # newlines currently at the end of `out`
+    lists: List[List[Any]] = []  # open lists: [node type, next item number]
+
+    # items are nodes, or (node type, raw length at entry) exit markers for blocks and lists
+    stack: List[Any] = list(reversed(doc.get("content") or []))
+    pop = stack.pop
+    while stack:
+        node = pop()
+        if node.__class__ is tuple:
+            t, start = node
+            if t in _LIST_NODES:
+                lists.pop()
+            # block ends on its own line (raw check, matching the pre-collapse text)
+            elif raw_len == start or not raw_last_nl:
+                raw_len += 1
+                raw_last_nl = True
+                if nl_run < 2:
+                    append("\n")
+                nl_run += 1
+            continue
+        if node.__class__ is not dict:
+            continue
 
-    def text_from_node(node: Dict[str, Any]) -> str:
         t = node.get("type")
-        if t == "text":
-            return node.get("text", "")
+        if t == "paragraph" or t == "heading":
+            # fast path for the common shape: a block of plain text nodes, handled in one step
+            texts: Optional[List[str]] = []
+            for child in node.get("content") or ():
+                if child.__class__ is dict and child.get("type") == "text":
+                    texts.append(child.get("text", ""))
+                else:
+                    texts = None
+                    break
+            if texts is not None:
+                text = "".join(texts)
+                if text:
+                    raw_len += len(text)
+                    if "\n" in text:
+                        nl_run = _append_with_newlines(out, text, nl_run)
+                    else:
+                        append(text)
+                        nl_run = 0
+                if not text or text[-1] != "\n":
+                    raw_len += 1
+                    if nl_run < 2:
+                        append("\n")
+                    nl_run += 1
+                raw_last_nl = True
+                continue
+        elif t == "text" or t == "mention" or t == "emoji" or t == "inlineCard":
+            if t == "text":
+                text = node.get("text", "")
+            else:
+                attrs = node.get("attrs") or {}
+                if t == "mention":
+                    text = attrs.get("text") or f"@{attrs.get('id', '')}"
+                elif t == "emoji":
+                    text = attrs.get("text") or attrs.get("shortName", "")
+                else:
+                    text = attrs.get("url", "")
+            if text:
+                raw_len += len(text)
+                raw_last_nl = text[-1] == "\n"
+                if "\n" in text:
+                    nl_run = _append_with_newlines(out, text, nl_run)
+                else:
+                    append(text)
+                    nl_run = 0
+            continue
         if t == "hardBreak":
-            return "\n"
-        # Generic container: flatten children
-        buf = []
-        for child in node.get("content", []) or []:
-            buf.append(text_from_node(child))
-        s = "".join(buf)
-        # Treat block-ish nodes as line-producing
-        if t in {"paragraph", "heading"}:
-            if not s.endswith("\n"):
-                s += "\n"
-        return s
-
-    for block in doc.get("content", []) or []:
-        lines.append(text_from_node(block))
-
-    out = "".join(lines)
-
-    # Normalize: collapse triple newlines, trim edges
-    while "\n\n\n" in out:
-        out = out.replace("\n\n\n", "\n\n")
-    return out.strip()
+            raw_len += 1
+            raw_last_nl = True
+            if nl_run < 2:
+                append("\n")
+            nl_run += 1
+            continue
+
+        if t in _BLOCK_NODES:
+            stack.append((t, raw_len))
+            if t == "listItem":
+                indent = "  " * (len(lists) - 1) if lists else ""
+                if lists and lists[-1][0] == "orderedList":
+                    prefix = f"{indent}{lists[-1][1]}. "
+                    lists[-1][1] += 1
+                else:
+                    prefix = f"{indent}- "
+                raw_len += len(prefix)
+                raw_last_nl = False
+                append(prefix)
+                nl_run = 0
+        elif t in _LIST_NODES:
+            lists.append([t, (node.get("attrs") or {}).get("order", 1)])
+            stack.append((t, raw_len))
+
+        # Generic container: children are visited in order
+        children = node.get("content")
+        if children:
+            stack.extend(reversed(children))
+
+    return "".join(out).strip()
+
+def iter_adf_lines(doc: Optional[Dict[str, Any]]) -> Iterator[Tuple[Optional[str], str]]:
+    """
+    Yield the lines `adf_to_text` would produce, one at a time, without building the string.
+    Each item is (innermost block type, line); the block type is None for top-level inline nodes.
+    Blank lines are not yielded and newline runs are not collapsed.
+    """
+    if not isinstance(doc, dict) or doc.get("type") != "doc":
+        return
+
+    line: List[str] = []
+    blocks: List[str] = []
+    lists: List[List[Any]] = []  # open lists: [node type, next item number]
+    stack: List[Any] = list(reversed(doc.get("content") or []))
+    pop = stack.pop
+    while stack:
+        node = pop()
+        if node.__class__ is tuple:
+            t = node[0]
+            if t in _LIST_NODES:
+                lists.pop()
+                continue
+            if line:
+                yield t, "".join(line)
+                line.clear()
+            blocks.pop()
+            continue
+        if node.__class__ is not dict:
+            continue
+
+        t = node.get("type")
+        if t == "text" or t == "mention" or t == "emoji" or t == "inlineCard":
+            if t == "text":
+                text = node.get("text", "")
+            else:
+                attrs = node.get("attrs") or {}
+                if t == "mention":
+                    text = attrs.get("text") or f"@{attrs.get('id', '')}"
+                elif t == "emoji":
+                    text = attrs.get("text") or attrs.get("shortName", "")
+                else:
+                    text = attrs.get("url", "")
+            if "\n" in text:
+                parts = text.split("\n")
+                for part in parts[:-1]:
+                    line.append(part)
+                    if any(line):
+                        yield (blocks[-1] if blocks else None), "".join(line)
+                    line.clear()
+                text = parts[-1]
+            if text:
+                line.append(text)
+            continue
+        if t == "hardBreak":
+            if line:
+                yield (blocks[-1] if blocks else None), "".join(line)
+                line.clear()
+            continue
+
+        if t in _BLOCK_NODES:
+            # like adf_to_text, inline text right before a block shares the block's first line
+            stack.append((t,))
+            blocks.append(t)
+            if t == "listItem":
+                indent = "  " * (len(lists) - 1) if lists else ""
+                if lists and lists[-1][0] == "orderedList":
+                    line.append(f"{indent}{lists[-1][1]}. ")
+                    lists[-1][1] += 1
+                else:
+                    line.append(f"{indent}- ")
+        elif t in _LIST_NODES:
+            lists.append([t, (node.get("attrs") or {}).get("order", 1)])
+            stack.append((t,))
+
+        children = node.get("content")
+        if children:
+            stack.extend(reversed(children))
+
+    if line:
+        yield (blocks[-1] if blocks else None), "".join(line)
 
 def parse_adf_comment(comment: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -0,0 +1,325 @@
+"""
+Markdown -> HTML for the standard work instructions.
+
+Covers the GitHub-flavoured subset the work instructions are written in: ATX headings,
+paragraphs, nested bullet/ordered lists, fenced and indented code, tables with alignment,
+block quotes, horizontal rules, emphasis, code spans, links/images and inline HTML
+(e.g. `<font>` in headings, `<input type="checkbox" />` in steps), which is passed through.
+
+    html, headings = render_markdown(text, link=lambda href: href)
+
+`link` rewrites every link and image destination (e.g. to content-hashed asset URLs);
+`image` may render an image itself (e.g. as a <picture> with `srcset`).
+"""
+from __future__ import annotations
+import html
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+LinkResolver = Callable[[str], str]
+# (destination, escaped alt, escaped title or None) -> HTML, or None for the plain <img>
+ImageRenderer = Callable[[str, str, Optional[str]], Optional[str]]
+
+@dataclass
+class Heading:
+    level: int
+    html: str   # rendered inline HTML, as in the page
+    text: str   # plain text (tags stripped)
+    id: str
+
+_FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})\s*([\w+-]*)")
+_HEADING_RE = re.compile(r"^ {0,3}(#{1,6})(?:\s+(.*?))?(?:\s+#+)?\s*$")
+_HR_RE = re.compile(r"^ {0,3}(?:(?:\*\s*){3,}|(?:-\s*){3,}|(?:_\s*){3,})$")
+_LIST_RE = re.compile(r"^( {0,3})([-*+]|\d{1,9}[.)])(\s+|$)(.*)$")
+_TABLE_DELIM_RE = re.compile(r"^\s*\|?\s*:?-+:?\s*(?:\|\s*:?-+:?\s*)*\|?\s*$")
+_QUOTE_RE = re.compile(r"^ {0,3}> ?(.*)$")
+_HTML_BLOCK_RE = re.compile(
+    r"^ {0,3}</?(?:address|article|aside|blockquote|center|details|div|dl|fieldset|figure|footer|form|"
+    r"h[1-6]|header|hr|ol|p|pre|section|summary|table|ul)\b", re.I)
+
+_CODE_SPAN_RE = re.compile(r"(`+)(.+?)\1", re.S)
+_ESCAPE_RE = re.compile(r"\\([\\`*_{}\[\]()#+\-.!|<>~])")
+_AUTOLINK_RE = re.compile(r"<(https?://[^\s<>]+)>")
+_TAG_RE = re.compile(r"</?[A-Za-z][\w-]*(?:\s+[^<>]*?)?/?>|<!--.*?-->", re.S)
+_LINK_RE = re.compile(r"(!?)\[([^\]]*)\]\(\s*(&lt;.*?&gt;|[^)\s]+)(?:\s+&quot;(.*?)&quot;)?\s*\)")
+_STRONG_RE = re.compile(r"(\*\*|__)(?=\S)(.+?)(?<=\S)\1")
+_EM_RE = re.compile(r"(?<![\w*])\*(?=[^\s*])(.+?)(?<=[^\s*])\*(?!\*)|(?<![\w_])_(?=\S)(.+?)(?<=\S)_(?![\w_])")
+_DEL_RE = re.compile(r"~~(?=\S)(.+?)(?<=\S)~~")
+_PLACEHOLDER_RE = re.compile("\x00(\\d+)\x00")
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip(" "))
+
+def slugify(text: str) -> str:
+    """GitHub-style anchor: lowercase, punctuation dropped, spaces to hyphens."""
+    slug = re.sub(r"[^\w\- ]", "", text.strip().lower())
+    return slug.replace(" ", "-")
+
+class _Renderer:
+    def __init__(self, link: Optional[LinkResolver], image: Optional[ImageRenderer] = None):
+        self.link = link or (lambda href: href)
+        self.image = image
+        self.headings: List[Heading] = []
+        self._ids: Dict[str, int] = {}
+
+    # ---- inline ----------------------------------------------------------
+
+    def inline(self, text: str) -> str:
+        saved: List[str] = []
+
+        def stash(s: str) -> str:
+            saved.append(s)
+            return f"\x00{len(saved) - 1}\x00"
+
+        text = _CODE_SPAN_RE.sub(lambda m: stash(f"<code>{html.escape(m.group(2).strip())}</code>"), text)
+        text = _ESCAPE_RE.sub(lambda m: stash(html.escape(m.group(1))), text)
+        text = _AUTOLINK_RE.sub(lambda m: stash(self._anchor(m.group(1), html.escape(m.group(1)))), text)
+        text = _TAG_RE.sub(lambda m: stash(m.group(0)), text)
+        text = html.escape(text)
+        text = _LINK_RE.sub(lambda m: stash(self._link_html(m)), text)
+        text = _STRONG_RE.sub(r"<strong>\2</strong>", text)
+        text = _EM_RE.sub(lambda m: f"<em>{m.group(1) or m.group(2)}</em>", text)
+        text = _DEL_RE.sub(r"<del>\1</del>", text)
+        # hard line break: two trailing spaces or a backslash
+        text = re.sub(r"(?: {2,}|\\)\n", "<br />\n", text)
+        # placeholders can nest (code inside link text)
+        while "\x00" in text:
+            text = _PLACEHOLDER_RE.sub(lambda m: saved[int(m.group(1))], text)
+        return text
+
+    def _anchor(self, href: str, label: str, title: Optional[str] = None) -> str:
+        attrs = f' href="{html.escape(self.link(href))}"'
+        if title:
+            attrs += f' title="{title}"'
+        return f"<a{attrs}>{label}</a>"
+
+    def _link_html(self, m: re.Match) -> str:
+        bang, label, dest, title = m.groups()
+        if dest.startswith("&lt;"):
+            dest = dest[4:-4]
+        href = html.unescape(dest)
+        if bang:
+            alt = re.sub(r"<[^>]+>", "", label)
+            custom = self.image(href, alt, title) if self.image else None
+            if custom is not None:
+                return custom
+            title_attr = f' title="{title}"' if title else ""
+            return f'<img src="{html.escape(self.link(href))}" alt="{alt}"{title_attr} loading="lazy" />'
+        return self._anchor(href, label, title)
+
+    # ---- blocks ----------------------------------------------------------
+
+    def blocks(self, lines: List[str], tight: bool = False) -> str:
+        out: List[str] = []
+        i, n = 0, len(lines)
+        while i < n:
+            line = lines[i]
+            if not line.strip():
+                i += 1
+                continue
+
+            m = _FENCE_RE.match(line)
+            if m:
+                fence, lang = m.group(1), m.group(2)
+                body: List[str] = []
+                i += 1
+                while i < n and not lines[i].strip().startswith(fence[0] * len(fence)):
+                    body.append(lines[i])
+                    i += 1
+                i += 1
+                cls = f' class="language-{lang}"' if lang else ""
+                out.append(f"<pre><code{cls}>{html.escape(chr(10).join(body))}\n</code></pre>")
+                continue
+
+            m = _HEADING_RE.match(line)
+            if m:
+                out.append(self.heading(len(m.group(1)), m.group(2) or ""))
+                i += 1
+                continue
+
+            if _HR_RE.match(line):
+                out.append("<hr />")
+                i += 1
+                continue
+
+            if "|" in line and i + 1 < n and _TABLE_DELIM_RE.match(lines[i + 1]) and "-" in lines[i + 1]:
+                j = i + 2
+                while j < n and lines[j].strip() and "|" in lines[j]:
+                    j += 1
+                out.append(self.table(lines[i], lines[i + 1], lines[i + 2:j]))
+                i = j
+                continue
+
+            if _QUOTE_RE.match(line):
+                body = []
+                while i < n and lines[i].strip() and _QUOTE_RE.match(lines[i]):
+                    body.append(_QUOTE_RE.match(lines[i]).group(1))
+                    i += 1
+                out.append(f"<blockquote>\n{self.blocks(body)}\n</blockquote>")
+                continue
+
+            if _LIST_RE.match(line):
+                html_list, i = self.list(lines, i)
+                out.append(html_list)
+                continue
+
+            if _indent(line) >= 4:
+                body = []
+                while i < n and (not lines[i].strip() or _indent(lines[i]) >= 4):
+                    body.append(lines[i][4:])
+                    i += 1
+                while body and not body[-1].strip():
+                    body.pop()
+                out.append(f"<pre><code>{html.escape(chr(10).join(body))}\n</code></pre>")
+                continue
+
+            if _HTML_BLOCK_RE.match(line):
+                body = []
+                while i < n and lines[i].strip():
+                    body.append(lines[i])
+                    i += 1
+                out.append("\n".join(body))
+                continue
+
+            body = []
+            while i < n and lines[i].strip() and not (body and self._interrupts(lines, i)):
+                # keep trailing spaces: two of them mark a hard line break
+                body.append(lines[i].lstrip())
+                i += 1
+            text = self.inline("\n".join(body).rstrip())
+            out.append(text if tight else f"<p>{text}</p>")
+        return "\n".join(out)
+
+    def _interrupts(self, lines: List[str], i: int) -> bool:
+        """Whether line i starts a new block instead of continuing a paragraph."""
+        line = lines[i]
+        return bool(
+            _FENCE_RE.match(line) or _HEADING_RE.match(line) or _HR_RE.match(line)
+            or _QUOTE_RE.match(line) or _LIST_RE.match(line) or _HTML_BLOCK_RE.match(line)
+            or ("|" in line and i + 1 < len(lines) and _TABLE_DELIM_RE.match(lines[i + 1]) and "-" in lines[i + 1])
+        )
+
+    def heading(self, level: int, raw: str) -> str:
+        inner = self.inline(raw.strip())
+        text = html.unescape(re.sub(r"<[^>]+>", "", inner)).strip()
+        base = slugify(text) or f"section-{len(self.headings) + 1}"
+        seen = self._ids.get(base, 0)
+        self._ids[base] = seen + 1
+        hid = base if not seen else f"{base}-{seen}"
+        self.headings.append(Heading(level=level, html=inner, text=text, id=hid))
+        return f'<h{level} id="{hid}">{inner}</h{level}>'
+
+    def list(self, lines: List[str], i: int) -> Tuple[str, int]:
+        first = _LIST_RE.match(lines[i])
+        ordered = first.group(2)[0].isdigit()
+        base_indent = len(first.group(1))
+        items: List[List[str]] = []
+        loose = False
+        n = len(lines)
+        while i < n:
+            m = _LIST_RE.match(lines[i])
+            if not m or len(m.group(1)) > base_indent + 1 or m.group(2)[0].isdigit() != ordered:
+                break
+            content_indent = len(m.group(1)) + len(m.group(2)) + min(len(m.group(3)), 4) if m.group(4) else \
+                len(m.group(1)) + len(m.group(2)) + 1
+            item = [m.group(4)]
+            i += 1
+            while i < n:
+                line = lines[i]
+                if not line.strip():
+                    # a blank line continues the item only if indented content follows
+                    j = i + 1
+                    while j < n and not lines[j].strip():
+                        j += 1
+                    if j < n and _indent(lines[j]) > base_indent:
+                        item.extend([""] * (j - i))
+                        i = j
+                        if not _LIST_RE.match(lines[j]) or _indent(lines[j]) >= content_indent:
+                            loose = True
+                        continue
+                    if j < n and _LIST_RE.match(lines[j]) and _indent(lines[j]) <= base_indent + 1:
+                        # next item of this list after a blank line
+                        loose = True
+                        i = j
+                    break
+                if _indent(line) > base_indent:
+                    item.append(line[min(_indent(line), content_indent):])
+                    i += 1
+                    continue
+                # lazy paragraph continuation
+                if item[-1].strip() and not self._interrupts(lines, i):
+                    item.append(line.strip())
+                    i += 1
+                    continue
+                break
+            items.append(item)
+        tag = "ol" if ordered else "ul"
+        start = ""
+        if ordered:
+            num = int(first.group(2)[:-1])
+            start = f' start="{num}"' if num != 1 else ""
+        body = "\n".join(f"<li>{self.blocks(item, tight=not loose)}</li>" for item in items)
+        return f"<{tag}{start}>\n{body}\n</{tag}>", i
+
+    def table(self, header: str, delim: str, rows: List[str]) -> str:
+        aligns = []
+        for cell in _split_row(delim):
+            cell = cell.strip()
+            if cell.startswith(":") and cell.endswith(":"):
+                aligns.append("center")
+            elif cell.endswith(":"):
+                aligns.append("right")
+            elif cell.startswith(":"):
+                aligns.append("left")
+            else:
+                aligns.append(None)
+
+        def row_html(cells: List[str], tag: str) -> str:
+            cells = (cells + [""] * len(aligns))[:len(aligns)]
+            parts = []
+            for cell, align in zip(cells, aligns):
+                style = f' style="text-align: {align}"' if align else ""
+                parts.append(f"<{tag}{style}>{self.inline(cell.strip())}</{tag}>")
+            return "<tr>" + "".join(parts) + "</tr>"
+
+        head = row_html(_split_row(header), "th")
+        body = "\n".join(row_html(_split_row(r), "td") for r in rows)
+        return f"<table>\n<thead>\n{head}\n</thead>\n<tbody>\n{body}\n</tbody>\n</table>" if rows else \
+            f"<table>\n<thead>\n{head}\n</thead>\n</table>"
+
+def _split_row(row: str) -> List[str]:
+    """Cells of a table row; pipes inside code spans or escaped as \\| do not split."""
+    row = row.strip()
+    if row.startswith("|"):
+        row = row[1:]
+    if row.endswith("|") and not row.endswith("\\|"):
+        row = row[:-1]
+    cells, cur, in_code = [], [], False
+    i = 0
+    while i < len(row):
+        ch = row[i]
+        if ch == "\\" and i + 1 < len(row) and row[i + 1] == "|":
+            cur.append("|")
+            i += 2
+            continue
+        if ch == "`":
+            in_code = not in_code
+        if ch == "|" and not in_code:
+            cells.append("".join(cur))
+            cur = []
+        else:
+            cur.append(ch)
+        i += 1
+    cells.append("".join(cur))
+    return cells
+
+def render_markdown(text: str, link: Optional[LinkResolver] = None,
+                    image: Optional[ImageRenderer] = None) -> Tuple[str, List[Heading]]:
+    """
+    Render Markdown to an HTML fragment.
+    Returns (html, headings in document order, with their anchor ids).
+    """
+    r = _Renderer(link, image)
+    lines = text.replace("\r\n", "\n").expandtabs(4).split("\n")
+    return r.blocks(lines), r.headings
@@ -0,0 +1,358 @@
+"""
+Metrics in the Prometheus text exposition format.
+
+    JIRA_CALLS = metrics.counter("jira_requests_total", "Jira API calls", ("method", "endpoint", "status"))
+    JIRA_CALLS.inc(method="GET", endpoint="issue/{issueKey}", status="200")
+    print(metrics.REGISTRY.render())
+
+Each process keeps its own values. A scrape reaches only one process, so with several WSGI
+workers call `REGISTRY.share(directory)` in each of them (see app/gunicorn_conf.py): every
+process then writes its values to its own file there, and `render` merges all files.
+- Counters and histograms are summed. A process that exits keeps its totals: `retire` folds
+  its file into the directory's archive, so the merged counters never go backwards
+- Gauges take the largest value among the processes still running
+- A forked process counts only what happened after `share`; what it inherited was published
+  by its parent
+"""
+from __future__ import annotations
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+LabelValues = Tuple[str, ...]
+LabelPairs = Tuple[Tuple[str, str], ...]
+# (sample name, labels, value), e.g. ("latency_seconds_bucket", (("le", "0.1"),), 3)
+Sample = Tuple[str, LabelPairs, float]
+# {"name", "kind", "help", "samples"}: one metric as rendered or shared between processes
+Family = Dict[str, Any]
+
+# Prometheus client defaults, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+# For in-process work measured in microseconds (parsing one comment, one lookup)
+FAST_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _pairs(names: Sequence[str], values: Sequence[str], *extra: Tuple[str, str]) -> LabelPairs:
+    return (*zip(names, values), *extra)
+
+def _labels(pairs: Sequence[Sequence[str]]) -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in pairs]
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _num(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+def _format(families: Sequence[Family]) -> str:
+    lines: List[str] = []
+    for f in families:
+        lines.append(f"# HELP {f['name']} {f['help']}")
+        lines.append(f"# TYPE {f['name']} {f['kind']}")
+        lines.extend(f"{name}{_labels(labels)} {_num(value)}" for name, labels, value in f["samples"])
+    return "\n".join(lines) + "\n"
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Mapping[str, str]) -> LabelValues:
+        try:
+            return tuple(str(labels[n]) for n in self.labelnames)
+        except KeyError as e:
+            raise ValueError(f"Metric {self.name} needs labels {self.labelnames}.") from e
+
+    def family(self) -> Family:
+        return {"name": self.name, "kind": self.kind, "help": self.help, "samples": self.samples()}
+
+    @abstractmethod
+    def samples(self) -> List[Sample]:
+        """Current values, in exposition order."""
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [(self.name, _pairs(self.labelnames, k), v) for k, v in items]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts incl. +Inf, sum)
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][i] += 1
+            entry[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            items = sorted((k, (list(c), s[0])) for k, (c, s) in self._values.items())
+        out: List[Sample] = []
+        for key, (counts, total) in items:
+            running = 0
+            for bound, n in zip((*self.buckets, float("inf")), counts):
+                running += n
+                out.append((f"{self.name}_bucket", _pairs(self.labelnames, key, ("le", _num(bound))), running))
+            out.append((f"{self.name}_sum", _pairs(self.labelnames, key), total))
+            out.append((f"{self.name}_count", _pairs(self.labelnames, key), running))
+        return out
+
+class CallbackMetric(_Metric):
+    """Counter or gauge whose samples are read from `fn` at scrape time (e.g. an existing stats object)."""
+    def __init__(self, name: str, help: str, kind: str, fn: Callable[[], Union[float, Mapping[LabelValues, float]]],
+                 labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.kind = kind
+        self.fn = fn
+
+    def samples(self) -> List[Sample]:
+        values = self.fn()
+        if not isinstance(values, Mapping):
+            values = {(): values}
+        return [(self.name, _pairs(self.labelnames, k), v) for k, v in sorted(values.items())]
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self._shared: Optional[_SharedDir] = None
+
+    def register(self, metric: _Metric, replace: bool = False) -> _Metric:
+        """Add `metric`; an existing metric of the same name is returned instead unless `replace`."""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None and not replace:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def collect(self) -> List[Family]:
+        """This process's metrics, by name."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return [m.family() for m in metrics]
+
+    def render(self) -> str:
+        """Prometheus text: this process's values, or every process's once `share` was called."""
+        shared = self._shared
+        return _format(shared.merged() if shared is not None else self.collect())
+
+    def share(self, directory: Union[str, Path], interval: Optional[float] = 5.0) -> None:
+        """
+        Publish this process's values to `directory` (every `interval` seconds, on every render
+        and at exit) and render the values of all processes sharing it.
+        Call it in each process after fork; values inherited from a parent that shared the
+        same directory are left to the parent's file.
+        """
+        inherited = self._shared is not None and self._shared.pid != os.getpid()
+        baseline = _sample_map(self.collect(), cumulative_only=True) if inherited else {}
+        self._shared = _SharedDir(Path(directory), self, baseline, interval)
+
+    def publish(self) -> None:
+        """Write this process's file now (e.g. in gunicorn's master, right before it forks)."""
+        if self._shared is not None:
+            self._shared.publish()
+
+# ---- sharing between processes ------------------------------------------------
+
+_ARCHIVE = "archive.json"
+_CUMULATIVE = ("counter", "histogram")
+
+def _sample_map(families: Sequence[Family], cumulative_only: bool = False) -> Dict[Tuple[str, str, LabelPairs], float]:
+    return {
+        (f["name"], name, tuple(map(tuple, labels))): value
+        for f in families if not cumulative_only or f["kind"] in _CUMULATIVE
+        for name, labels, value in f["samples"]
+    }
+
+def _combine(snapshots: Sequence[Sequence[Family]], cumulative_only: bool = False) -> List[Family]:
+    """Sum counters and histograms across processes; gauges take the largest value."""
+    merged: Dict[str, Family] = {}
+    values: Dict[str, Dict[Tuple[str, LabelPairs], float]] = {}
+    for families in snapshots:
+        for f in families:
+            if cumulative_only and f["kind"] not in _CUMULATIVE:
+                continue
+            if f["name"] not in merged:
+                merged[f["name"]] = {"name": f["name"], "kind": f["kind"], "help": f["help"]}
+                values[f["name"]] = {}
+            samples = values[f["name"]]
+            for name, labels, value in f["samples"]:
+                key = (name, tuple(map(tuple, labels)))
+                if key not in samples:
+                    samples[key] = value
+                elif f["kind"] in _CUMULATIVE:
+                    samples[key] += value
+                else:
+                    samples[key] = max(samples[key], value)
+    return [
+        {**merged[n], "samples": [(name, labels, v) for (name, labels), v in values[n].items()]}
+        for n in sorted(merged)
+    ]
+
+def _read(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+
+def _write(path: Path, data: Dict[str, Any]) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class _SharedDir:
+    """This process's file `<pid>-<start>.json` in a directory shared by processes (see `Registry.share`)."""
+    def __init__(self, directory: Path, registry: Registry, baseline: Dict[Tuple[str, str, LabelPairs], float],
+                 interval: Optional[float]):
+        directory.mkdir(parents=True, exist_ok=True)
+        self.directory = directory
+        self.registry = registry
+        self.baseline = baseline
+        self.pid = os.getpid()
+        self.id = f"{self.pid}-{time.time_ns()}"
+        self.path = directory / f"{self.id}.json"
+        self._lock = threading.Lock()
+        self.publish()
+        atexit.register(self._publish_at_exit)
+        if interval:
+            threading.Thread(target=self._loop, args=(interval,), name="metrics-share", daemon=True).start()
+
+    def _loop(self, interval: float) -> None:
+        while self.registry._shared is self and self.pid == os.getpid():
+            time.sleep(interval)
+            self.publish()
+
+    def _publish_at_exit(self) -> None:
+        if self.registry._shared is self:
+            self.publish()
+
+    def publish(self) -> List[Family]:
+        """Write (and return) this process's values, minus what it inherited."""
+        if self.pid != os.getpid():
+            return []
+        families = self.registry.collect()
+        if self.baseline:
+            for f in families:
+                if f["kind"] in _CUMULATIVE:
+                    f["samples"] = [(name, labels, value - self.baseline.get((f["name"], name, labels), 0))
+                                    for name, labels, value in f["samples"]]
+        with self._lock:
+            _write(self.path, {"id": self.id, "pid": self.pid, "families": families})
+        return families
+
+    def merged(self) -> List[Family]:
+        """Every process's values; this process's are published first, so a scrape never shows more than is on disk."""
+        snapshots: Dict[str, Dict[str, Any]] = {self.id: {"pid": self.pid, "families": self.publish()}}
+        for path in sorted(self.directory.glob("*-*.json")):
+            if path != self.path:
+                data = _read(path)
+                if data is not None:
+                    snapshots[data["id"]] = data
+        # read last: a file retired after it was read above is then dropped, not counted twice
+        archive = _read(self.directory / _ARCHIVE) or {"retired": [], "families": []}
+        for retired in archive["retired"]:
+            snapshots.pop(retired, None)
+        return _combine([
+            archive["families"],
+            *(data["families"] for data in snapshots.values() if _alive(data["pid"])),
+            # an exited process that is not retired yet still counts, but its gauges no longer do
+            *(_combine([data["families"]], cumulative_only=True)
+              for data in snapshots.values() if not _alive(data["pid"])),
+        ])
+
+def retire(directory: Union[str, Path], pid: int) -> None:
+    """
+    Fold the counters and histograms of the exited process `pid` into the archive of a shared
+    metrics directory and remove its file. Run by one process only (gunicorn's master).
+    """
+    directory = Path(directory)
+    archive = _read(directory / _ARCHIVE) or {"retired": [], "families": []}
+    # ids stay listed only until their file is gone, which readers then no longer see either
+    archive["retired"] = [r for r in archive["retired"] if (directory / f"{r}.json").exists()]
+    paths = sorted(directory.glob(f"{pid}-*.json"))
+    for path in paths:
+        data = _read(path)
+        if data is not None:
+            archive["families"] = _combine([archive["families"], data["families"]], cumulative_only=True)
+            archive["retired"].append(data["id"])
+    if paths:
+        _write(directory / _ARCHIVE, archive)
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+# Shared by every module in this process; served at GET /metrics
+REGISTRY = Registry()
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help, labelnames))
+
+def histogram(name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, help, labelnames, buckets))
+
+def callback(name: str, help: str, kind: str, fn: Callable[[], Union[float, Mapping[LabelValues, float]]],
+             labelnames: Sequence[str] = ()) -> CallbackMetric:
+    """Register (or replace) a metric read from `fn` at scrape time; `kind` is "counter" or "gauge"."""
+    return REGISTRY.register(CallbackMetric(name, help, kind, fn, labelnames), replace=True)
@@ -1,5 +1,6 @@
 import re
-from typing import Any, Dict, List, Tuple
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
 
 # matches semantic version numbers e.g. 0.1.0
 _SEMVER_RE = re.compile(r"^(\d+)\.(\d+)\.(\d+)$")
@@ -27,3 +28,41 @@ def parse_robot_pid(robot_pid: str) -> int:
     if not m:
         raise ValueError(f"robotPid '{robot_pid}' must end with 4 digits (e.g., JAG-0007).")
     return int(m.group(1))
+
+
+# ISO-8601 / Jira timestamps: 2025-08-01T10:00:00Z, 2025-07-22T16:44:08.222+0000, 2025-08-01 10:00:00+02:00
+_TIMESTAMP_RE = re.compile(
+    r"^(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2}(?::\d{2})?)(?:\.(\d{1,6})\d*)?\s*(Z|[+-]\d{2}:?\d{2})?$"
+)
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """
+    Parse an event or Jira timestamp into an aware UTC datetime.
+    Timestamps without an offset are taken as UTC.
+    Returns None for missing or unparseable values.
+    """
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        m = _TIMESTAMP_RE.match(str(value or "").strip())
+        if not m:
+            return None
+        date, clock, frac, tz = m.groups()
+        # fromisoformat on 3.10 does not take "Z" or "+0000", so normalize first
+        text = f"{date}T{clock}" + (f".{frac.ljust(6, '0')}" if frac else "")
+        if tz and tz != "Z":
+            text += tz if ":" in tz else f"{tz[:3]}:{tz[3:]}"
+        try:
+            dt = datetime.fromisoformat(text)
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+def format_timestamp(dt: datetime) -> str:
+    """UTC timestamp in the event format, e.g. 2025-08-01T10:00:00Z (milliseconds kept when present)."""
+    dt = parse_timestamp(dt)
+    if dt.microsecond:
+        return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
@@ -0,0 +1,133 @@
+"""
+Compiled, memory-mapped RIN <-> robotPid registry.
+
+Layout (little endian):
+    header   8s magic, u32 format version, u32 count, u32 rin width, u32 pid width,
+             u64 rin table offset, u64 pid table offset, u64 reverse table offset
+    rins     `count` RINs, sorted, NUL-padded to `rin width` bytes
+    pids     `count` robotPids in RIN order, NUL-padded to `pid width` bytes
+    reverse  `count` u32 row numbers, ordered by robotPid (PID -> RIN lookups)
+
+Opening only maps the file and reads the header; every lookup is a binary search
+over the mapped pages, which the OS shares between worker processes.
+"""
+from __future__ import annotations
+import mmap
+import os
+import struct
+from typing import Iterator, Mapping, Optional
+
+_MAGIC = b"RBREG\x00\x00\x01"
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sIIIIQQQ")
+_ROW = struct.Struct("<I")
+
+def _pad(value: str, width: int) -> Optional[bytes]:
+    raw = value.encode("utf-8")
+    if len(raw) > width:
+        return None
+    # NUL sorts below every other byte, so padded keys keep their lexicographic order
+    return raw.ljust(width, b"\x00")
+
+def build_registry(rin_to_pid: Mapping[str, str], path: str | os.PathLike) -> None:
+    """
+    Compile a RIN -> robotPid map (the Master Robot Record JSON) into a registry file.
+    Written to a temp file and renamed, so readers never map a partial registry.
+    """
+    rins = sorted(rin_to_pid, key=lambda r: r.encode("utf-8"))
+    pids = [str(rin_to_pid[r]) for r in rins]
+    rin_w = max((len(r.encode("utf-8")) for r in rins), default=1)
+    pid_w = max((len(p.encode("utf-8")) for p in pids), default=1)
+    reverse = sorted(range(len(rins)), key=lambda i: (pids[i].encode("utf-8"), i))
+
+    rin_off = _HEADER.size
+    pid_off = rin_off + rin_w * len(rins)
+    rev_off = pid_off + pid_w * len(pids)
+
+    tmp = f"{os.fspath(path)}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, len(rins), rin_w, pid_w, rin_off, pid_off, rev_off))
+        f.write(b"".join(_pad(r, rin_w) for r in rins))
+        f.write(b"".join(_pad(p, pid_w) for p in pids))
+        f.write(b"".join(_ROW.pack(i) for i in reverse))
+    os.replace(tmp, path)
+
+class RobotRegistry(Mapping[str, str]):
+    """
+    Read-only RIN -> robotPid mapping over a compiled registry file.
+    Usable anywhere a dict from the Master Robot Record was (`[]`, `get`, `in`, `len`).
+    """
+    def __init__(self, path: str | os.PathLike):
+        self.path = os.fspath(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._count, self._rin_w, self._pid_w, self._rin_off, self._pid_off, self._rev_off = \
+            _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            self._mm.close()
+            raise ValueError(f"{self.path} is not a robot registry (format {_FORMAT_VERSION}).")
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def __enter__(self) -> "RobotRegistry":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _rin_at(self, i: int) -> bytes:
+        start = self._rin_off + i * self._rin_w
+        return self._mm[start:start + self._rin_w]
+
+    def _pid_at(self, i: int) -> bytes:
+        start = self._pid_off + i * self._pid_w
+        return self._mm[start:start + self._pid_w]
+
+    def _find_rin(self, rin: str) -> int:
+        key = _pad(rin, self._rin_w)
+        if key is None:
+            return -1
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._rin_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self._count and self._rin_at(lo) == key else -1
+
+    def __getitem__(self, rin: str) -> str:
+        i = self._find_rin(rin) if isinstance(rin, str) else -1
+        if i < 0:
+            raise KeyError(rin)
+        return self._pid_at(i).rstrip(b"\x00").decode("utf-8")
+
+    def __contains__(self, rin: object) -> bool:
+        return isinstance(rin, str) and self._find_rin(rin) >= 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._count):
+            yield self._rin_at(i).rstrip(b"\x00").decode("utf-8")
+
+    def rin_for(self, robot_pid: str) -> Optional[str]:
+        """Reverse lookup: the RIN assigned to `robot_pid` (lowest RIN if several), or None."""
+        key = _pad(robot_pid, self._pid_w)
+        if key is None:
+            return None
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            (row,) = _ROW.unpack_from(self._mm, self._rev_off + mid * _ROW.size)
+            if self._pid_at(row) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count:
+            (row,) = _ROW.unpack_from(self._mm, self._rev_off + lo * _ROW.size)
+            if self._pid_at(row) == key:
+                return self._rin_at(row).rstrip(b"\x00").decode("utf-8")
+        return None
@@ -0,0 +1,147 @@
+from __future__ import annotations
+import re
+import heapq
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from jira_tools.utils.parse import parse_robot_pid, parse_semver
+
+# matches a start-end effectivity range e.g. 0001-0086
+_EFFECTIVITY_RE = re.compile(r"^(?P<start>\d{4})-(?P<end>\d{4})$")
+
+class RoutingIndex:
+    """
+    Compiled effectivity index over a `masterRoutingRecord` list.
+
+    Effectivity ranges and versions are parsed once. The robot sequence axis is
+    then cut into disjoint segments, each holding the record that wins there
+    (highest semantic version; first listed on ties), so a lookup is one bisect.
+    Records with malformed or inverted effectivity never apply.
+    """
+    def __init__(self, records: List[Dict[str, Any]]):
+        self.records = records
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._winners: List[int] = []
+        self._build()
+
+    def _intervals(self) -> List[Tuple[int, int, Tuple[int, int, int], int]]:
+        """(start, end, semver, position) of every record with a valid effectivity, by start."""
+        intervals: List[Tuple[int, int, Tuple[int, int, int], int]] = []
+        for pos, rec in enumerate(self.records):
+            if not isinstance(rec, dict):
+                continue
+            eff = rec.get("effectivity", "")
+            m = _EFFECTIVITY_RE.match(eff) if isinstance(eff, str) else None
+            if not m:
+                continue
+            a, b = int(m.group("start")), int(m.group("end"))
+            if a > b:
+                continue
+            ver = parse_semver(str(rec.get("version", "0.0.0")))
+            intervals.append((a, b, ver, pos))
+        intervals.sort(key=lambda t: t[0])
+        return intervals
+
+    def _build(self) -> None:
+        intervals = self._intervals()
+        # every range start and every (end + 1) is a point where the winner may change
+        bounds = sorted({a for a, _, _, _ in intervals} | {b + 1 for _, b, _, _ in intervals})
+
+        # min-heap ordered by (negated semver, position): top is the highest version, first listed on ties
+        active: List[Tuple[Tuple[int, int, int], int, int]] = []
+        i = 0
+        for lo, hi in zip(bounds, bounds[1:]):
+            while i < len(intervals) and intervals[i][0] <= lo:
+                _, b, ver, pos = intervals[i]
+                heapq.heappush(active, ((-ver[0], -ver[1], -ver[2]), pos, b))
+                i += 1
+            # lazily drop ranges that ended before this segment
+            while active and active[0][2] < lo:
+                heapq.heappop(active)
+            if not active:
+                continue
+            winner = active[0][1]
+            if self._winners and self._winners[-1] == winner and self._ends[-1] == lo - 1:
+                self._ends[-1] = hi - 1
+            else:
+                self._starts.append(lo)
+                self._ends.append(hi - 1)
+                self._winners.append(winner)
+
+    def segments(self) -> List[Tuple[int, int, Dict[str, Any]]]:
+        """
+        Disjoint (start, end, winning record) segments in ascending order.
+        """
+        return [(a, b, self.records[w]) for a, b, w in zip(self._starts, self._ends, self._winners)]
+
+    def winners(self) -> List[Tuple[int, int, int]]:
+        """
+        Disjoint (start, end, winning record position) segments in ascending order.
+        """
+        return list(zip(self._starts, self._ends, self._winners))
+
+    def coverage(self) -> List[Tuple[int, int, List[int]]]:
+        """
+        Full sweep over the effectivity ranges: disjoint (start, end, positions) segments in
+        ascending order, where `positions` lists every record covering the segment, winner first.
+        Uncovered stretches are left out; neighbouring segments with the same records are merged.
+        """
+        intervals = self._intervals()
+        bounds = sorted({a for a, _, _, _ in intervals} | {b + 1 for _, b, _, _ in intervals})
+        out: List[Tuple[int, int, List[int]]] = []
+        # position -> (rank key, end); rank key sorts the winner first
+        active: Dict[int, Tuple[Tuple[int, int, int, int], int]] = {}
+        i = 0
+        for lo, hi in zip(bounds, bounds[1:]):
+            while i < len(intervals) and intervals[i][0] <= lo:
+                _, b, ver, pos = intervals[i]
+                active[pos] = ((-ver[0], -ver[1], -ver[2], pos), b)
+                i += 1
+            for pos in [p for p, (_, b) in active.items() if b < lo]:
+                del active[pos]
+            if not active:
+                continue
+            positions = [p for p, _ in sorted(active.items(), key=lambda kv: kv[1][0])]
+            if out and out[-1][2] == positions and out[-1][1] == lo - 1:
+                out[-1] = (out[-1][0], hi - 1, positions)
+            else:
+                out.append((lo, hi - 1, positions))
+        return out
+
+    def resolve_seq(self, seq: int) -> Optional[Dict[str, Any]]:
+        """
+        Return the applicable record for a robot sequence number, or None if uncovered.
+        """
+        k = bisect_right(self._starts, seq) - 1
+        if k < 0 or seq > self._ends[k]:
+            return None
+        return self.records[self._winners[k]]
+
+    def resolve(self, robot_pid: str) -> Dict[str, Any]:
+        """
+        Return the applicable record for a robot_pid (e.g. JAG-0007).
+        Raises:
+            ValueError: robot_pid does not end in 4 digits
+            LookupError: no effectivity range covers the robot
+        """
+        rec = self.resolve_seq(parse_robot_pid(robot_pid))
+        if rec is None:
+            raise LookupError(f"No routing found that covers robot '{robot_pid}'.")
+        return rec
+
+    def resolve_many(self, robot_pids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Resolve many robot_pids in one sweep over the segments.
+        Uncovered robots map to None.
+        """
+        seqs = sorted((parse_robot_pid(pid), pid) for pid in robot_pids)
+        out: Dict[str, Optional[Dict[str, Any]]] = {}
+        k, n = 0, len(self._starts)
+        for seq, pid in seqs:
+            while k < n and self._ends[k] < seq:
+                k += 1
+            if k < n and self._starts[k] <= seq:
+                out[pid] = self.records[self._winners[k]]
+            else:
+                out[pid] = None
+        return out
@@ -0,0 +1,191 @@
+"""
+Compiled routing applicability table: robot sequence number -> winning record index.
+
+Layout (little endian):
+    header   8s magic, u32 format version, u32 record count, u32 table length, u32 metadata length,
+             32s sha256 of the source records (see `routing_digest`),
+             32s sha256 of the source file (zero when compiled from records in memory)
+    table    `table length` u32 entries, one per sequence number 0000..9999:
+             winning record index + 1, or 0 where no effectivity range applies
+    metadata UTF-8 JSON: { schemaVersion, versions: [record version, ...], compiledAt }
+
+Built once when routing is released (`mes-snapshot routing-table`, or by `mes-snapshot sync`);
+a lookup is then one array index instead of compiling a RoutingIndex from the raw records.
+The table only stores indexes, so it is bound to the records it was compiled from (`bind`),
+which is refused unless the sha256 of the file they were read from matches the header. That
+hash is already known (the snapshot manifest records it and `SnapshotStore.load` verifies it),
+so binding costs nothing per record. The canonical records digest is for `verify_routing_table`
+(`mroute_validator --table`), which compares a table against a document from any file.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import struct
+import sys
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+from jira_tools.utils.parse import parse_robot_pid
+from jira_tools.utils.routing_index import RoutingIndex
+
+_MAGIC = b"RTTAB\x00\x00\x01"
+_FORMAT_VERSION = 2
+_HEADER = struct.Struct("<8sIIII32s32s")
+_NO_SOURCE = bytes(32)
+# robot sequence numbers are the 4 trailing digits of a robotPid
+TABLE_LENGTH = 10000
+
+class RoutingDigest:
+    """
+    sha256 of a record list in canonical JSON form (sorted keys, no whitespace), so key order
+    and formatting of the source file do not matter. Fed one record at a time, e.g. while streaming.
+    """
+    def __init__(self):
+        self._h = hashlib.sha256(b"[")
+        self._n = 0
+
+    def update(self, record: Any) -> None:
+        if self._n:
+            self._h.update(b",")
+        self._h.update(json.dumps(record, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+        self._n += 1
+
+    def hexdigest(self) -> str:
+        h = self._h.copy()
+        h.update(b"]")
+        return h.hexdigest()
+
+def routing_digest(records: Iterable[Any]) -> str:
+    """Digest of a whole record list; equals sha256 of `json.dumps(records, sort_keys=True, separators=(",", ":"))`."""
+    digest = RoutingDigest()
+    for rec in records:
+        digest.update(rec)
+    return digest.hexdigest()
+
+def _records_of(doc: Any) -> List[Any]:
+    records = doc.get("masterRoutingRecord") if isinstance(doc, dict) else doc
+    if not isinstance(records, list):
+        raise ValueError("Master routing must be a list or contain a 'masterRoutingRecord' array.")
+    return records
+
+def compile_table(records: List[Any]) -> array:
+    """Winner (index + 1, 0 for none) for every sequence number, from one pass over the index segments."""
+    table = array("I", bytes(4 * TABLE_LENGTH))
+    for start, end, pos in RoutingIndex(records).winners():
+        for seq in range(max(0, start), min(end, TABLE_LENGTH - 1) + 1):
+            table[seq] = pos + 1
+    return table
+
+def build_routing_table(doc: Any, path: str | os.PathLike, source_sha256: Optional[str] = None) -> str:
+    """
+    Compile a master routing document (or its `masterRoutingRecord` list) into a table file.
+    `source_sha256` is the sha256 of the file `doc` was read from; only a table that has it can be bound.
+    Written to a temp file and renamed, so readers never load a partial table.
+    Returns the records' digest.
+    """
+    records = _records_of(doc)
+    digest = routing_digest(records)
+    table = compile_table(records)
+    if sys.byteorder != "little":
+        table.byteswap()
+    meta = json.dumps({
+        "schemaVersion": doc.get("schemaVersion") if isinstance(doc, dict) else None,
+        "versions": [rec.get("version") if isinstance(rec, dict) else None for rec in records],
+        "compiledAt": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }).encode("utf-8")
+
+    tmp = f"{os.fspath(path)}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, len(records), TABLE_LENGTH, len(meta), bytes.fromhex(digest),
+                             bytes.fromhex(source_sha256) if source_sha256 else _NO_SOURCE))
+        f.write(table.tobytes())
+        f.write(meta)
+    os.replace(tmp, path)
+    return digest
+
+class RoutingTable:
+    """
+    Loaded applicability table. Once bound to its records it answers like a RoutingIndex
+    (`resolve`, `resolve_seq`, `resolve_many`).
+    """
+    def __init__(self, path: str | os.PathLike):
+        self.path = os.fspath(path)
+        with open(self.path, "rb") as f:
+            data = f.read()
+        if len(data) < _HEADER.size:
+            raise ValueError(f"{self.path} is not a routing table (format {_FORMAT_VERSION}).")
+        magic, version, self.record_count, length, meta_len, digest, source = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError(f"{self.path} is not a routing table (format {_FORMAT_VERSION}).")
+        end = _HEADER.size + 4 * length
+        if len(data) != end + meta_len:
+            raise ValueError(f"{self.path} is truncated.")
+        self.digest = digest.hex()
+        self.source_sha256: Optional[str] = source.hex() if source != _NO_SOURCE else None
+        self.table = array("I")
+        self.table.frombytes(data[_HEADER.size:end])
+        if sys.byteorder != "little":
+            self.table.byteswap()
+        self.metadata: Dict[str, Any] = json.loads(data[end:].decode("utf-8"))
+        self.records: Optional[List[Any]] = None
+
+    def bind(self, records: List[Any], source_sha256: str) -> "RoutingTable":
+        """
+        Attach the records the table was compiled from, read from a file whose sha256 is `source_sha256`.
+        Raises:
+            ValueError: the table was not compiled from that file
+        """
+        if self.source_sha256 is None or source_sha256 != self.source_sha256 or len(records) != self.record_count:
+            raise ValueError(f"{self.path} was not compiled from this master routing.")
+        self.records = records
+        return self
+
+    def winner(self, seq: int) -> Optional[int]:
+        """Index of the applicable record for a robot sequence number, or None if uncovered."""
+        if not 0 <= seq < len(self.table):
+            return None
+        w = self.table[seq]
+        return w - 1 if w else None
+
+    def resolve_seq(self, seq: int) -> Optional[Dict[str, Any]]:
+        if self.records is None:
+            raise RuntimeError("RoutingTable.bind() must be called before resolving.")
+        w = self.winner(seq)
+        return self.records[w] if w is not None else None
+
+    def resolve(self, robot_pid: str) -> Dict[str, Any]:
+        """
+        Return the applicable record for a robot_pid (e.g. JAG-0007).
+        Raises:
+            ValueError: robot_pid does not end in 4 digits
+            LookupError: no effectivity range covers the robot
+        """
+        rec = self.resolve_seq(parse_robot_pid(robot_pid))
+        if rec is None:
+            raise LookupError(f"No routing found that covers robot '{robot_pid}'.")
+        return rec
+
+    def resolve_many(self, robot_pids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Resolve many robot_pids; uncovered robots map to None."""
+        return {pid: self.resolve_seq(parse_robot_pid(pid)) for pid in robot_pids}
+
+def verify_routing_table(table: RoutingTable, doc: Any, digest: Optional[str] = None) -> List[str]:
+    """
+    Check that a compiled table agrees with a master routing document.
+    `digest` may be passed when it was computed elsewhere (e.g. while streaming the source);
+    the records then only need their version and effectivity.
+    Returns a list of problems (empty when the table is current).
+    """
+    records = _records_of(doc)
+    errs: List[str] = []
+    if table.record_count != len(records):
+        errs.append(f"table has {table.record_count} records, source has {len(records)}")
+    if table.digest != (digest or routing_digest(records)):
+        errs.append("table digest does not match the source records (recompile the table)")
+    expected = compile_table(records)
+    mismatched = [seq for seq in range(TABLE_LENGTH) if table.winner(seq) != (expected[seq] - 1 if expected[seq] else None)]
+    if mismatched:
+        errs.append(f"{len(mismatched)} sequence number(s) select a different record than the source, "
+                    f"first at {mismatched[0]:04d}")
+    return errs
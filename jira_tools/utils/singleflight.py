@@ -0,0 +1,91 @@
+"""
+Single-flight call coalescing: concurrent calls with the same key share one execution.
+
+    flight = SingleFlight()
+    result, shared = flight.do(("GET", endpoint), lambda: fetch(endpoint))
+
+Only calls that overlap in time are merged; nothing is cached once the call returns.
+Every caller receives the same result object, so results must be treated as read-only.
+"""
+from __future__ import annotations
+import threading
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+if TYPE_CHECKING:
+    import asyncio
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    """
+    Thread version. The first caller for a key runs `fn`; callers arriving while it runs
+    wait for it and get its result (or its exception).
+    Attributes:
+        executed: calls that actually ran
+        deduplicated: calls answered by another caller's in-flight execution
+    """
+    def __init__(self):
+        self.executed = 0
+        self.deduplicated = 0
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Returns (result, shared); `shared` is True when another caller's execution was reused."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.deduplicated += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # later callers start a fresh execution
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+class AsyncSingleFlight:
+    """
+    asyncio version of SingleFlight, for use on one event loop.
+    The shared call runs as its own task, so a cancelled caller does not cancel it for the others.
+    """
+    def __init__(self):
+        self.executed = 0
+        self.deduplicated = 0
+        self._calls: Dict[Hashable, "asyncio.Task[Any]"] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Returns (result, shared); `shared` is True when another caller's execution was reused."""
+        # imported here so thread-only users (JiraClient) never load asyncio
+        import asyncio
+        task = self._calls.get(key)
+        shared = task is not None
+        if shared:
+            self.deduplicated += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self.executed += 1
+            task.add_done_callback(lambda t: self._calls.pop(key, None) if self._calls.get(key) is t else None)
+        return await asyncio.shield(task), shared
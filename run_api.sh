@@ -1,6 +1,12 @@
 #!/bin/bash
+# Usage: ./run_api.sh          # production: gunicorn, preloaded master data, multiple workers
+#        ./run_api.sh --dev    # Flask debug server with reloader (single process)
 
 export JIRA_MASTER_ROBOT_ISSUE_KEY="POPS-2632"
 export JIRA_MASTER_ROUTING_ISSUE_KEY="POPS-2633"
 
-python -m app.main
+if [ "$1" == "--dev" ]; then
+    python -m app.main
+else
+    exec gunicorn -c python:app.gunicorn_conf app.wsgi:app
+fi
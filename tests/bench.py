@@ -0,0 +1,22 @@
+"""
+Timing helper shared by the benchmark tests (`pytest -m benchmark`).
+Budgets scale with BENCH_BUDGET_SCALE for slow CI runners.
+"""
+import os, time, logging, statistics
+
+log = logging.getLogger("benchmark")
+
+_SCALE = float(os.getenv("BENCH_BUDGET_SCALE", "1"))
+
+def bench(name: str, fn, repeat: int = 5, budget: float = None) -> float:
+    """Run `fn` `repeat` times; log and return the median wall time in seconds."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    median = statistics.median(samples)
+    log.info(f"{name}: median {median * 1e3:.2f} ms over {repeat} runs (min {min(samples) * 1e3:.2f} ms)")
+    if budget is not None:
+        assert median <= budget * _SCALE, f"{name} took {median * 1e3:.1f} ms; budget {budget * _SCALE * 1e3:.1f} ms"
+    return median
@@ -0,0 +1,337 @@
+"""
+Local stand-in for the Jira REST endpoints used by JiraClient / AsyncJiraClient.
+
+    with FakeJira(latency=0.002) as jira:
+        jira.add_issue("POPS-2632", attachments=[synthetic_master_robot_record(5000)])
+        client = jira.client()
+
+Serves issue (fields=attachment), paginated comments, attachment content and JQL search
+over plain HTTP on 127.0.0.1, with configurable per-request latency and max page size.
+"""
+from __future__ import annotations
+import base64
+import json
+import posixpath
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from jira_tools.config.config import Config
+from jira_tools.jira_client import JiraClient
+from jira_tools.services.http import JiraTransport
+
+_API = "/rest/api/3/"
+_EPOCH = datetime(2025, 8, 1, tzinfo=timezone.utc)
+
+def jira_timestamp(dt: datetime) -> str:
+    """Jira's timestamp shape, e.g. 2025-07-22T16:44:08.222+0000"""
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}" + dt.strftime("%z")
+
+def adf_doc(text: str) -> Dict[str, Any]:
+    """One paragraph per line, the way Jira stores plain-text comments."""
+    return {
+        "type": "doc",
+        "version": 1,
+        "content": [
+            {"type": "paragraph", "content": [{"type": "text", "text": line}]} if line else {"type": "paragraph"}
+            for line in text.split("\n")
+        ],
+    }
+
+def synthetic_event_text(n: int, when: datetime) -> str:
+    return "\n".join([
+        "## OPERATION_COMPLETE",
+        f"- timestamp: {when.strftime('%Y-%m-%dT%H:%M:%SZ')}",
+        f"- operationSeq: {n % 40 + 1}",
+        f"- operationName: Operation {n % 40 + 1}",
+        "- operationStatus: PASS",
+        "- operator: operator@example.com",
+        "- productionStatus: IN_PRODUCTION",
+        f"- operatorComment: synthetic event {n}",
+    ])
+
+def synthetic_robot_comments(n: int, non_event_every: int = 10) -> List[Dict[str, Any]]:
+    """`n` comments; every `non_event_every`-th one is free text, the rest are events."""
+    comments = []
+    for i in range(n):
+        when = _EPOCH + timedelta(minutes=i)
+        text = f"Shift note {i}: nothing to report." if non_event_every and i % non_event_every == 0 \
+            else synthetic_event_text(i, when)
+        comments.append({"body": adf_doc(text), "created": jira_timestamp(when)})
+    return comments
+
+def synthetic_master_robot_record(n: int, prefix: str = "JAG") -> Dict[str, str]:
+    """Flat RIN -> robotPid map shaped like mes_master_data/master_robot_record_v1.0.0.json"""
+    return {f"BC033W{i:06d}XX": f"{prefix}-{i % 10000:04d}" for i in range(1, n + 1)}
+
+def synthetic_master_routing(n_versions: int, span: int = 9999) -> Dict[str, Any]:
+    """
+    Master routing document with `n_versions` overlapping records across 0001..span.
+    The first (lowest) version covers the whole span, so every robot resolves.
+    """
+    records = []
+    step = max(1, span // max(1, n_versions))
+    for i in range(n_versions):
+        start = 1 + (i * step) % span
+        end = span if i == 0 else min(span, start + 3 * step)
+        records.append({
+            "version": f"{i // 100}.{(i // 10) % 10}.{i % 10}",
+            "effectivity": f"{start:04d}-{end:04d}",
+            "eco": f"ECO-{i:06d}",
+            "releasedAt": jira_timestamp(_EPOCH + timedelta(days=i)),
+            "releasedBy": "releaser@example.com",
+            "operations": [
+                {"sequence": s, "operationId": f"OP-{s:03d}", "operationName": f"Operation {s}",
+                 "standardWork": f"https://link.to/standard-work/op-{s}"}
+                for s in range(1, 11)
+            ],
+        })
+    return {"schemaVersion": "1.0", "masterRoutingRecord": records}
+
+@dataclass
+class _Issue:
+    key: str
+    attachments: List[Dict[str, Any]] = field(default_factory=list)
+    comments: List[Dict[str, Any]] = field(default_factory=list)
+
+class FakeJira:
+    """
+    Threaded in-process Jira. Not a full emulation: just the endpoints this repo calls.
+    Attributes:
+        latency: seconds slept before every response
+        max_page_size: Jira clamps `maxResults` for comments to this
+        requests: count of requests served, by "METHOD endpoint-kind"
+        connections: TCP connections accepted
+        get_failures: statuses returned (one each, in order) by the next GETs, whatever their endpoint
+        post_failures: statuses returned (one each, in order) by the next comment POSTs
+        post_failures_after_create: same, but the comment is created first (a response lost on the way back)
+        api_token: when set, requests with any other basic-auth token get 401
+    """
+    def __init__(self, latency: float = 0.0, max_page_size: int = 100):
+        self.latency = latency
+        self.max_page_size = max_page_size
+        self.requests: Dict[str, int] = {}
+        self.connections = 0
+        self.get_failures: List[int] = []
+        self.post_failures: List[int] = []
+        self.post_failures_after_create: List[int] = []
+        self.api_token: Optional[str] = None
+        self._issues: Dict[str, _Issue] = {}
+        self._attachments: Dict[str, bytes] = {}
+        self._next_id = 10000
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    # ---- data setup -------------------------------------------------------
+
+    def _new_id(self) -> str:
+        with self._lock:
+            self._next_id += 1
+            return str(self._next_id)
+
+    def add_issue(self, key: str, attachments: Optional[List[Any]] = None,
+                  comments: Optional[List[Dict[str, Any]]] = None) -> None:
+        self._issues.setdefault(key, _Issue(key))
+        for doc in attachments or []:
+            self.add_attachment(key, doc)
+        for c in comments or []:
+            self.add_comment(key, c["body"], created=c.get("created"))
+
+    def add_attachment(self, key: str, doc: Any, filename: str = "attachment.json") -> str:
+        """Attachments are prepended, so index 0 is always the newest (as Jira lists them here)."""
+        issue = self._issues.setdefault(key, _Issue(key))
+        att_id = self._new_id()
+        self._attachments[att_id] = json.dumps(doc).encode()
+        issue.attachments.insert(0, {
+            "id": att_id,
+            "filename": filename,
+            "created": jira_timestamp(datetime.now(timezone.utc)),
+            "size": len(self._attachments[att_id]),
+            "mimeType": "application/json",
+        })
+        return att_id
+
+    def add_comment(self, key: str, body: Dict[str, Any], created: Optional[str] = None) -> Dict[str, Any]:
+        issue = self._issues.setdefault(key, _Issue(key))
+        created = created or jira_timestamp(datetime.now(timezone.utc))
+        comment = {
+            "id": self._new_id(),
+            "author": {"displayName": "Fake Operator", "emailAddress": "operator@example.com"},
+            "body": body,
+            "created": created,
+            "updated": created,
+            "jsdPublic": True,
+        }
+        comment["self"] = f"{self.base_url}{key}/comment/{comment['id']}" if self._server else None
+        issue.comments.append(comment)
+        return comment
+
+    # ---- server lifecycle -------------------------------------------------
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{_API}issue/"
+
+    def start(self) -> "FakeJira":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(self))
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeJira":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def config(self, **overrides) -> Config:
+        cfg = Config(jira_email="fake@example.com", jira_api_token="fake-token", jira_domain="jira.invalid")
+        for k, v in overrides.items():
+            setattr(cfg, k, v)
+        return cfg
+
+    def client(self, max_retries: int = 0, **config_overrides) -> JiraClient:
+        cfg = self.config(**config_overrides)
+        return JiraClient(cfg, transport=JiraTransport(cfg, base_url=self.base_url, max_retries=max_retries,
+                                                       backoff_factor=0.01, backoff_jitter=0.0))
+
+    def async_client(self, max_retries: int = 0, **config_overrides):
+        from jira_tools.async_client import AsyncJiraClient
+        return AsyncJiraClient(self.config(**config_overrides), base_url=self.base_url, max_retries=max_retries,
+                               backoff_factor=0.01, backoff_jitter=0.0)
+
+    # ---- request handling -------------------------------------------------
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.requests[name] = self.requests.get(name, 0) + 1
+
+    def handle(self, method: str, raw_path: str, body: Optional[Any]):
+        """Returns (status, json-able body or raw bytes)."""
+        url = urlparse(raw_path)
+        path = posixpath.normpath(url.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if not path.startswith(_API.rstrip("/")):
+            return 404, {"errorMessages": ["not found"]}
+        if method == "GET":
+            with self._lock:
+                failure = self.get_failures.pop(0) if self.get_failures else None
+            if failure:
+                self._count("GET failure")
+                return failure, {"errorMessages": [f"injected {failure}"]}
+        parts = path[len(_API):].split("/")
+
+        if parts[:2] == ["attachment", "content"] and method == "GET":
+            self._count("GET attachment")
+            data = self._attachments.get(parts[2])
+            return (200, data) if data is not None else (404, {"errorMessages": ["no attachment"]})
+
+        if parts[:2] == ["search", "jql"] and method == "GET":
+            self._count("GET search")
+            keys = sorted(self._issues)
+            start = int(query.get("nextPageToken") or 0)
+            size = int(query.get("maxResults", 50))
+            page = keys[start:start + size]
+            out: Dict[str, Any] = {"issues": [{"key": k} for k in page]}
+            if start + size < len(keys):
+                out["nextPageToken"] = str(start + size)
+            return 200, out
+
+        if parts[0] != "issue" or len(parts) < 2:
+            return 404, {"errorMessages": ["not found"]}
+        issue = self._issues.get(parts[1])
+        if issue is None:
+            return 404, {"errorMessages": ["Issue does not exist or you do not have permission to see it."]}
+
+        if len(parts) == 2 and method == "GET":
+            self._count("GET issue")
+            return 200, {"key": issue.key, "fields": {"attachment": issue.attachments}}
+
+        if parts[2:3] == ["comment"]:
+            if len(parts) == 3 and method == "GET":
+                self._count("GET comments")
+                start = int(query.get("startAt", 0))
+                size = min(int(query.get("maxResults", self.max_page_size)), self.max_page_size)
+                ordered = sorted(issue.comments, key=lambda c: c["created"],
+                                 reverse=query.get("orderBy") == "-created")
+                return 200, {"startAt": start, "maxResults": size, "total": len(ordered),
+                             "comments": ordered[start:start + size]}
+            if len(parts) == 3 and method == "POST":
+                self._count("POST comment")
+                with self._lock:
+                    failure = self.post_failures.pop(0) if self.post_failures else None
+                if failure:
+                    return failure, {"errorMessages": [f"injected {failure}"]}
+                created = self.add_comment(issue.key, (body or {}).get("body"))
+                with self._lock:
+                    failure = self.post_failures_after_create.pop(0) if self.post_failures_after_create else None
+                if failure:
+                    return failure, {"errorMessages": [f"injected {failure} after create"]}
+                return 201, created
+            if len(parts) == 4 and method == "DELETE":
+                self._count("DELETE comment")
+                before = len(issue.comments)
+                issue.comments = [c for c in issue.comments if c["id"] != parts[3]]
+                return (204, b"") if len(issue.comments) < before else (404, {"errorMessages": ["no comment"]})
+
+        return 405, {"errorMessages": ["method not allowed"]}
+
+def _make_handler(jira: FakeJira):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like Jira
+        # headers and body go out as separate writes; without this, Nagle + delayed ACK adds ~40 ms per call
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            with jira._lock:
+                jira.connections += 1
+
+        def _serve(self, method: str) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length)) if length else None
+            if jira.latency:
+                time.sleep(jira.latency)
+            if jira.api_token is not None and not self._authorized():
+                jira._count("401")
+                status, payload = 401, {"errorMessages": ["Client must be authenticated to access this resource."]}
+            else:
+                status, payload = jira.handle(method, self.path, body)
+            data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _authorized(self) -> bool:
+            scheme, _, encoded = (self.headers.get("Authorization") or "").partition(" ")
+            if scheme != "Basic":
+                return False
+            token = base64.b64decode(encoded).decode().partition(":")[2]
+            return token == jira.api_token
+
+        def do_GET(self):
+            self._serve("GET")
+
+        def do_POST(self):
+            self._serve("POST")
+
+        def do_DELETE(self):
+            self._serve("DELETE")
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
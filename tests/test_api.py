@@ -0,0 +1,111 @@
+import json, pytest
+from types import SimpleNamespace
+from app.api import create_app
+from jira_tools.services import events as events_service
+from jira_tools.services import robot_lookup
+from jira_tools.services.http import JiraHttpError
+from jira_tools.services.outbox import EventOutbox
+
+def _comment(cid, text):
+    return {"id": cid, "created": "2025-08-01T10:00:00.000+0000", "updated": "2025-08-01T10:00:00.000+0000",
+            "body": {"type": "doc", "version": 1, "content": [{"type": "paragraph", "content": [{"type": "text", "text": text}]}]}}
+
+class FakeJira:
+    """Just enough of JiraClient for the robot routes."""
+    def __init__(self, comments_by_issue, master_robot_record):
+        self.config = SimpleNamespace(master_robot_issue_key="POPS-2632")
+        self.comments_by_issue = comments_by_issue
+        self.master_robot_record = master_robot_record
+
+    def get_attachments(self, issue_key):
+        return [{"id": "10001", "created": "2025-08-13T17:30:00.000-0700"}]
+
+    def get_attachment_content(self, attachment_id):
+        return self.master_robot_record
+
+    def get_comment_page(self, issue_key, start_at=0, max_results=100, order="created"):
+        if issue_key not in self.comments_by_issue:
+            raise JiraHttpError(f"Jira API GET request failed: 404", response=SimpleNamespace(status_code=404))
+        comments = self.comments_by_issue[issue_key]
+        return {"startAt": start_at, "total": len(comments), "comments": comments[start_at:start_at + max_results]}
+
+    def iter_comments(self, issue_key, page_size=100, order="created", prefetch=False, raw=False):
+        yield from self.get_comment_page(issue_key)["comments"]
+
+    def search_issue_keys(self, jql, max_results=1000):
+        return sorted(self.comments_by_issue)[:max_results]
+
+@pytest.fixture
+def api(tmp_path):
+    events_service.EVENT_HISTORY.invalidate()
+    robot_lookup.ROBOT_INDEX.invalidate()
+    app = create_app()
+    app.extensions["jira_client"] = FakeJira({
+        "POPS-1": [_comment("1", "## OPERATION_COMPLETE")],
+        "POPS-2": [_comment("2", "not an event")],
+    }, {"BC033W000002RX": "JAG-0001", "BC033W000003DZ": "JAG-0002"})
+    # workers not started: events stay queued
+    app.extensions["event_outbox"] = EventOutbox(tmp_path / "outbox.sqlite3", app.extensions["jira_client"])
+    return app.test_client()
+
+def test_events_batch_partial_results(api):
+    resp = api.post("/v1/robots/events:batch", json={"issueKeys": ["POPS-1", "POPS-2", "POPS-404"]})
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["results"]["POPS-1"][0]["eventType"] == "OPERATION_COMPLETE"
+    assert body["results"]["POPS-2"] == []
+    assert body["errors"]["POPS-404"]["error"] == "NotFound"
+
+def test_events_batch_jql(api):
+    resp = api.post("/v1/robots/events:batch", json={"jql": "project = POPS"})
+    assert sorted(resp.get_json()["results"]) == ["POPS-1", "POPS-2"]
+
+def test_events_batch_jql_over_limit_is_rejected(api):
+    api.application.config["EVENTS_BATCH_MAX_KEYS"] = 1
+    resp = api.post("/v1/robots/events:batch", json={"jql": "project = POPS"})
+    assert resp.status_code == 400
+    assert "more than 1 issues" in resp.get_json()["detail"]
+
+def test_events_batch_rejects_bad_body(api):
+    assert api.post("/v1/robots/events:batch", json={}).status_code == 400
+    assert api.post("/v1/robots/events:batch", json={"issueKeys": "POPS-1"}).status_code == 400
+
+def test_resolve_single(api):
+    assert api.post("/v1/robots/resolve", json={"rin": "BC033W000002RX"}).get_json() == {"robotPid": "JAG-0001"}
+    assert api.post("/v1/robots/resolve", json={"rin": "NOPE"}).status_code == 404
+
+def test_resolve_batch(api):
+    body = api.post("/v1/robots/resolve:batch", json={"rins": ["BC033W000002RX", "NOPE"]}).get_json()
+    assert body["BC033W000002RX"] == "JAG-0001"
+    assert body["NOPE"]["error"] == "NotFound"
+
+def test_resolve_master_data_faults_are_server_errors(api):
+    # a malformed Master Robot Record is not "RIN not found"
+    api.application.extensions["jira_client"].master_robot_record = ["not", "a", "map"]
+    for resp in (
+        api.post("/v1/robots/resolve", json={"rin": "BC033W000002RX"}),
+        api.get("/v1/robots/resolve?rin=BC033W000002RX"),
+        api.post("/v1/robots/resolve:batch", json={"rins": ["BC033W000002RX"]}),
+    ):
+        assert resp.status_code == 500
+        assert resp.get_json()["error"] == "MasterDataError"
+
+def test_resolve_batch_streams_json_lines(api):
+    resp = api.post("/v1/robots/resolve:batch", json={"rins": ["BC033W000003DZ", "NOPE"]},
+                    headers={"Accept": "application/x-ndjson"})
+    assert resp.mimetype == "application/x-ndjson"
+    rows = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert rows[0] == {"rin": "BC033W000003DZ", "robotPid": "JAG-0002"}
+    assert rows[1]["error"] == "NotFound"
+
+def test_post_event_is_queued(api):
+    event = {"eventType": "OPERATION_COMPLETE", "timestamp": "2025-08-01T10:00:00Z", "operationStatus": "PASS"}
+    first = api.post("/v1/robots/POPS-1/events", json=event)
+    second = api.post("/v1/robots/POPS-1/events", json=event)
+    assert first.status_code == 202
+    assert second.get_json()["queueDepth"] == 2
+    assert api.get("/v1/robots/events:outbox").get_json()["pending"] == 2
+
+def test_post_event_rejects_invalid(api):
+    assert api.post("/v1/robots/POPS-1/events", json=["x"]).status_code == 400
+    assert api.post("/v1/robots/POPS-1/events", json={"eventType": "bad type"}).status_code == 422
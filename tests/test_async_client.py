@@ -0,0 +1,83 @@
+import asyncio, pytest
+from fake_jira import FakeJira
+from jira_tools.config import credentials
+from jira_tools.config.config import Config
+from jira_tools.services.http import JiraHttpError
+
+pytest.importorskip("httpx")
+from jira_tools.async_client import AsyncJiraClient
+
+@pytest.fixture
+def env_creds(monkeypatch):
+    monkeypatch.setenv("JIRA_EMAIL", "ops@example.com")
+    monkeypatch.setenv("JIRA_API_TOKEN", "token-1")
+    monkeypatch.setenv("JIRA_DOMAIN", "jira.invalid")
+    credentials.invalidate_credentials()
+    yield monkeypatch
+    credentials.invalidate_credentials()
+
+def _run(client, call):
+    async def run():
+        async with client:
+            return await call(client)
+    return asyncio.run(run())
+
+def test_get_is_retried_once_after_a_5xx():
+    with FakeJira() as jira:
+        jira.add_issue("POPS-1")
+        jira.get_failures = [503]
+        issue = _run(jira.async_client(max_retries=3), lambda c: c.get_issue_data("POPS-1"))
+        assert issue["key"] == "POPS-1"
+        assert jira.requests["GET failure"] == 1
+        assert jira.requests["GET issue"] == 1
+
+def test_get_gives_up_after_max_retries():
+    with FakeJira() as jira:
+        jira.add_issue("POPS-1")
+        jira.get_failures = [502, 504, 500, 503]
+        with pytest.raises(JiraHttpError) as e:
+            _run(jira.async_client(max_retries=2), lambda c: c.get_issue_data("POPS-1"))
+        assert e.value.response.status_code == 500
+        assert jira.requests["GET failure"] == 3
+        assert jira.get_failures == [503]
+
+def test_post_is_not_retried():
+    with FakeJira() as jira:
+        jira.add_issue("POPS-1")
+        jira.post_failures = [503]
+        with pytest.raises(JiraHttpError) as e:
+            _run(jira.async_client(max_retries=3), lambda c: c.add_comment("POPS-1", "hello"))
+        assert e.value.response.status_code == 503
+        assert jira.requests["POST comment"] == 1
+        assert jira._issues["POPS-1"].comments == []
+
+def test_401_re_resolves_rotated_credentials(env_creds):
+    with FakeJira() as jira:
+        jira.add_issue("POPS-1")
+        jira.api_token = "token-1"
+
+        async def run():
+            async with AsyncJiraClient(base_url=jira.base_url, max_retries=0) as client:
+                assert (await client.get_issue_data("POPS-1"))["key"] == "POPS-1"
+                # token rotated in the store; the client still holds the cached one
+                env_creds.setenv("JIRA_API_TOKEN", "token-2")
+                jira.api_token = "token-2"
+                assert (await client.get_issue_data("POPS-1"))["key"] == "POPS-1"
+                return client.config.jira_api_token
+
+        assert asyncio.run(run()) == "token-2"
+        assert jira.requests["401"] == 1
+
+def test_401_with_explicit_config_raises():
+    with FakeJira() as jira:
+        jira.add_issue("POPS-1")
+        jira.api_token = "other"
+        with pytest.raises(JiraHttpError) as e:
+            _run(jira.async_client(), lambda c: c.get_issue_data("POPS-1"))
+        assert e.value.response.status_code == 401
+        assert jira.requests["401"] == 1
+
+def test_explicit_config_is_never_refreshed():
+    client = AsyncJiraClient(Config(jira_email="e", jira_api_token="t", jira_domain="jira.invalid"))
+    assert asyncio.run(client.refresh_credentials("t")) is False
+    asyncio.run(client.aclose())
@@ -0,0 +1,73 @@
+"""
+End-to-end benchmarks for the client hot paths, run against the local FakeJira.
+No credentials needed. Budgets are deliberately loose (catch regressions, not noise);
+scale them for slow CI runners with BENCH_BUDGET_SCALE, or skip with `-m "not benchmark"`.
+"""
+import pytest
+from bench import bench
+from fake_jira import (
+    FakeJira, adf_doc, synthetic_event_text, synthetic_master_robot_record,
+    synthetic_master_routing, synthetic_robot_comments, _EPOCH,
+)
+from jira_tools.services.events import EventHistoryStore, get_event_history_for
+from jira_tools.services.robot_lookup import RobotIndex, lookup_robot_pid
+from jira_tools.services.routing import RoutingStore, get_routing_for
+from jira_tools.utils.adf import adf_to_text
+from jira_tools.utils.robot_registry import RobotRegistry, build_registry
+
+pytestmark = pytest.mark.benchmark
+
+_LATENCY = 0.002  # per Jira call; keeps network cost visible without slowing the suite
+
+@pytest.fixture(scope="module")
+def jira():
+    with FakeJira(latency=_LATENCY, max_page_size=100) as fake:
+        fake.add_issue("POPS-2632", attachments=[synthetic_master_robot_record(20000)])
+        fake.add_issue("POPS-2633", attachments=[synthetic_master_routing(300)])
+        fake.add_issue("POPS-1", comments=synthetic_robot_comments(3000))
+        yield fake
+
+@pytest.fixture(scope="module")
+def client(jira):
+    client = jira.client(master_robot_issue_key="POPS-2632", master_routing_issue_key="POPS-2633")
+    yield client
+    client.close()
+
+def test_bench_lookup_robot_pid(client):
+    rins = list(synthetic_master_robot_record(20000))
+    bench("lookup_robot_pid cold (20k RINs)",
+          lambda: lookup_robot_pid({"rin": rins[-1]}, client, RobotIndex()), budget=0.5)
+    index = RobotIndex()
+    lookup_robot_pid({"rin": rins[0]}, client, index)
+    bench("lookup_robot_pid warm x1000",
+          lambda: [lookup_robot_pid({"rin": r}, client, index) for r in rins[:1000]], budget=0.05)
+
+def test_bench_robot_registry(tmp_path):
+    record = synthetic_master_robot_record(200000)
+    path = tmp_path / "robots.reg"
+    build_registry(record, path)
+    rins = list(record)[::200]
+    bench("RobotRegistry open (200k RINs)", lambda: RobotRegistry(path).close(), budget=0.01)
+    with RobotRegistry(path) as reg:
+        bench("RobotRegistry lookup x1000", lambda: [reg[r] for r in rins], budget=0.1)
+
+def test_bench_get_routing_for(client):
+    master_routing = RoutingStore().get(client).index
+    pids = [f"JAG-{n:04d}" for n in range(1, 10000, 7)]
+    bench("get_routing_for x1428 (300 versions)",
+          lambda: [get_routing_for(pid, master_routing) for pid in pids], budget=0.1)
+
+def test_bench_get_event_history_for(jira, client):
+    bench("get_event_history_for cold (3000 comments)",
+          lambda: get_event_history_for("POPS-1", client, EventHistoryStore()), repeat=3, budget=3.0)
+    store = EventHistoryStore()
+    get_event_history_for("POPS-1", client, store)
+
+    def one_new_event():
+        jira.add_comment("POPS-1", adf_doc(synthetic_event_text(0, _EPOCH)))
+        get_event_history_for("POPS-1", client, store)
+    bench("get_event_history_for incremental (+1 comment)", one_new_event, budget=0.2)
+
+def test_bench_adf_to_text():
+    doc = adf_doc("\n".join(synthetic_event_text(i, _EPOCH) for i in range(2000)))
+    bench("adf_to_text (16k paragraphs)", lambda: adf_to_text(doc), budget=0.5)
@@ -0,0 +1,89 @@
+import pytest
+from fake_jira import FakeJira, synthetic_master_robot_record
+from jira_tools.config import credentials
+from jira_tools.config.config import Config
+from jira_tools.jira_client import JiraClient
+from jira_tools.services.http import JiraHttpError, JiraTransport
+
+@pytest.fixture
+def env_creds(monkeypatch):
+    monkeypatch.setenv("JIRA_EMAIL", "ops@example.com")
+    monkeypatch.setenv("JIRA_API_TOKEN", "token-1")
+    monkeypatch.setenv("JIRA_DOMAIN", "jira.invalid")
+    credentials.invalidate_credentials()
+    yield monkeypatch
+    credentials.invalidate_credentials()
+
+def test_credentials_resolved_once_per_process(env_creds):
+    calls = []
+    original = credentials.EnvProvider.load
+    env_creds.setattr(credentials.EnvProvider, "load", lambda self: calls.append(1) or original(self))
+    first = JiraClient().config
+    second = JiraClient().config
+    assert (first.jira_api_token, second.jira_api_token) == ("token-1", "token-1")
+    assert len(calls) == 1
+    assert credentials.load_credentials(refresh=True).api_token == "token-1"
+    assert len(calls) == 2
+
+def _client(jira):
+    client = JiraClient()
+    client.transport = JiraTransport(client.config, base_url=jira.base_url, max_retries=0)
+    return client
+
+def test_401_re_resolves_rotated_credentials(env_creds):
+    with FakeJira() as jira:
+        jira.add_issue("POPS-2632", attachments=[synthetic_master_robot_record(3)])
+        jira.api_token = "token-1"
+        client = _client(jira)
+        assert client.get_attachments("POPS-2632")
+
+        # token rotated in the store; the client still holds the cached one
+        env_creds.setenv("JIRA_API_TOKEN", "token-2")
+        jira.api_token = "token-2"
+        assert client.get_attachments("POPS-2632")
+        assert client.config.jira_api_token == "token-2"
+        assert jira.requests["401"] == 1
+        # the process cache now holds the new token too
+        assert JiraClient().config.jira_api_token == "token-2"
+
+def test_401_with_unchanged_credentials_raises(env_creds):
+    with FakeJira() as jira:
+        jira.add_issue("POPS-2632", attachments=[synthetic_master_robot_record(3)])
+        jira.api_token = "other"
+        with pytest.raises(JiraHttpError):
+            _client(jira).get_attachments("POPS-2632")
+        assert jira.requests["401"] == 1
+
+def test_explicit_config_is_never_refreshed():
+    client = JiraClient(Config(jira_email="e", jira_api_token="t", jira_domain="jira.invalid"))
+    assert client.refresh_credentials("t") is False
+
+def test_prompt_does_not_hold_the_cache_lock(monkeypatch):
+    import threading
+    for name in ("JIRA_EMAIL", "JIRA_API_TOKEN", "JIRA_DOMAIN"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(credentials, "_dotenv_loaded", True)
+    prompting, typed = threading.Event(), threading.Event()
+
+    def slow_prompt(self):
+        prompting.set()
+        typed.wait(5)
+        return credentials.Credentials(email="ops@example.com", api_token="typed", domain="jira.invalid")
+    monkeypatch.setattr(credentials.PromptProvider, "load", slow_prompt)
+    monkeypatch.setattr(credentials.PromptProvider, "save", lambda self, creds: None)
+    credentials.invalidate_credentials()
+
+    result = []
+    login = threading.Thread(target=lambda: result.append(credentials.load_credentials(allow_prompt=True)))
+    login.start()
+    try:
+        assert prompting.wait(5)
+        # another thread is not blocked behind the prompt
+        assert credentials._cache_lock.acquire(timeout=1)
+        credentials._cache_lock.release()
+    finally:
+        typed.set()
+        login.join(5)
+    assert result[0].api_token == "typed"
+    assert credentials.load_credentials().api_token == "typed"
+    credentials.invalidate_credentials()
@@ -0,0 +1,221 @@
+from jira_tools.config.config import Config
+from jira_tools.jira_client import JiraClient
+import time
+import pytest
+from jira_tools.services.events import (
+    EventHistoryStore,
+    build_event_comment_body,
+    get_event_history_for,
+    parse_event_adf,
+    parse_event_comment,
+    post_event,
+)
+from jira_tools.utils.adf import parse_adf_comment
+from fake_jira import FakeJira, adf_doc, synthetic_robot_comments
+
+def _adf(text):
+    lines = text.split("\n")
+    content = []
+    for i, line in enumerate(lines):
+        content.append({"type": "text", "text": line})
+        if i < len(lines) - 1:
+            content.append({"type": "hardBreak"})
+    return {"type": "doc", "version": 1, "content": [{"type": "paragraph", "content": content}]}
+
+def _event(n, status="PASS"):
+    return _adf(f"## OPERATION_COMPLETE\n- timestamp: 2025-08-{n:02d}T10:00:00Z\n- operationSeq: {n}\n- operationStatus: {status}")
+
+class PagedClient(JiraClient):
+    """JiraClient whose comment endpoint is served from memory, with Jira-style paging."""
+    def __init__(self):
+        super().__init__(Config(jira_email="e", jira_api_token="t", jira_domain="jira.invalid"))
+        self.comments = []
+        self.pages_served = 0
+        self.orders = []
+
+    def add(self, n, status="PASS"):
+        cid = str(len(self.comments) + 1000)
+        created = f"2025-08-{n:02d}T10:00:00.000+0000"
+        self.comments.append({"id": cid, "body": _event(n, status), "created": created, "updated": created})
+        return cid
+
+    def get_comment_page(self, issue_key, start_at=0, max_results=100, order="created"):
+        self.pages_served += 1
+        self.orders.append(order)
+        ordered = sorted(self.comments, key=lambda c: c["created"], reverse=(order == "-created"))
+        return {"startAt": start_at, "maxResults": max_results, "total": len(ordered),
+                "comments": ordered[start_at:start_at + max_results]}
+
+def test_iter_comments_walks_every_page():
+    client = PagedClient()
+    for n in range(1, 26):
+        client.add(n)
+    comments = list(client.iter_comments("POPS-1", page_size=7, prefetch=True))
+    assert len(comments) == 25
+    assert client.pages_served == 4
+
+def test_incremental_history_picks_up_new_edited_and_deleted():
+    client = PagedClient()
+    for n in range(1, 21):
+        client.add(n)
+    store = EventHistoryStore(page_size=5)
+    assert len(store.get_history("POPS-1", client)) == 20
+
+    # a new event costs one small page
+    client.add(21)
+    client.pages_served = 0
+    events = store.get_history("POPS-1", client)
+    assert [e["operationSeq"] for e in events][-1] == "21"
+    assert client.pages_served == 1
+
+    # an edit on a recent comment is seen through its `updated`
+    newest = client.comments[-1]
+    newest["body"] = _event(21, "FAIL")
+    newest["updated"] = "2025-09-01T00:00:00.000+0000"
+    assert store.get_history("POPS-1", client)[-1]["operationStatus"] == "FAIL"
+
+    # a delete makes Jira's total disagree and forces a full walk
+    del client.comments[3]
+    assert len(store.get_history("POPS-1", client)) == 20
+
+def test_old_edits_are_seen_after_full_resync_seconds(monkeypatch):
+    client = PagedClient()
+    for n in range(1, 21):
+        client.add(n)
+    store = EventHistoryStore(page_size=5, full_resync_seconds=60)
+    assert store.get_history("POPS-1", client)[0]["operationStatus"] == "PASS"
+
+    # an edit far below the first page is not visible to the incremental sync
+    oldest = client.comments[0]
+    oldest["body"] = _event(1, "FAIL")
+    oldest["updated"] = "2025-09-01T00:00:00.000+0000"
+    assert store.get_history("POPS-1", client)[0]["operationStatus"] == "PASS"
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+    assert store.get_history("POPS-1", client)[0]["operationStatus"] == "FAIL"
+
+def test_incremental_history_with_mixed_utc_offsets():
+    client = PagedClient()
+    for n in range(1, 11):
+        client.add(n)
+    # Jira answers in the user's zone; 01:00-1000 is 11:00 UTC, after every comment above
+    client.comments[-1]["created"] = client.comments[-1]["updated"] = "2025-08-10T01:00:00.000-1000"
+    client.comments[0]["created"] = client.comments[0]["updated"] = "2025-08-01T19:00:00.000+0900"
+    store = EventHistoryStore(page_size=3)
+    assert len(store.get_history("POPS-1", client)) == 10
+    client.add(11)
+    client.pages_served = 0
+    assert store.get_history("POPS-1", client)[-1]["operationSeq"] == "11"
+    assert client.pages_served == 1
+
+def test_history_store_keeps_the_most_recent_robots():
+    client = PagedClient()
+    for n in range(1, 4):
+        client.add(n)
+    store = EventHistoryStore(page_size=5, max_robots=2)
+    for key in ("POPS-1", "POPS-2", "POPS-1", "POPS-3"):
+        store.get_history(key, client)
+    assert list(store._slots) == ["POPS-1", "POPS-3"]
+    # POPS-1 was used after POPS-2, so POPS-2 was dropped and is walked in full (oldest first) again
+    client.orders = []
+    store.get_history("POPS-1", client)
+    store.get_history("POPS-2", client)
+    assert client.orders == ["-created", "created"]
+    assert list(store._slots) == ["POPS-1", "POPS-2"]
+
+def test_parse_event_adf_matches_text_path():
+    docs = [c["body"] for c in synthetic_robot_comments(30, non_event_every=3)]
+    docs += [_event(5), _adf("no header\n- key: value"), _adf("##\nOPERATION_COMPLETE\n- operator: a"),
+             _adf("## OPERATION_COMPLETE\n- operator:\n   someone"), adf_doc("## NOTE\n\n- a: 1\n- b:: 2"),
+             {"type": "doc", "content": []}, None]
+    for doc in docs:
+        expected = parse_event_comment(parse_adf_comment({"id": "1", "body": doc}))
+        assert parse_event_adf(doc) == expected
+
+def test_parse_event_adf_accepts_heading_node():
+    doc = {"type": "doc", "content": [
+        {"type": "heading", "attrs": {"level": 2}, "content": [{"type": "text", "text": "OPERATION_COMPLETE"}]},
+        {"type": "bulletList", "content": [
+            {"type": "listItem", "content": [{"type": "paragraph", "content": [
+                {"type": "text", "text": "operationStatus: PASS"}]}]},
+        ]},
+    ]}
+    evt = parse_event_adf(doc)
+    assert evt["eventType"] == "OPERATION_COMPLETE"
+    assert evt["operationStatus"] == "PASS"
+
+def test_parse_event_adf_ignores_caps_heading_without_fields():
+    def heading(text):
+        return {"type": "heading", "attrs": {"level": 2}, "content": [{"type": "text", "text": text}]}
+
+    def para(text):
+        return {"type": "paragraph", "content": [{"type": "text", "text": text}]}
+
+    note = {"type": "doc", "content": [heading("WARNING"), para("Battery swap pending, do not power on.")]}
+    assert parse_event_adf(note) is None
+    # a field line before the heading does not count either
+    assert parse_event_adf({"type": "doc", "content": [para("- owner: a"), heading("WARNING"), para("text")]}) is None
+    # the text fallback applies the same rule
+    assert parse_event_adf({"type": "doc", "content": [heading("WARNING"), para("- owner:")]}) is None
+
+@pytest.mark.parametrize("body", [
+    "plain text", 5, ["x"], {"type": "doc", "content": "abc"}, {"type": "doc", "content": ["x"]},
+    {"type": "doc", "content": [{"type": "codeBlock", "content": ["y", None]}]},
+])
+def test_parse_event_adf_ignores_malformed_bodies(body):
+    assert parse_event_adf(body) is None
+
+def test_malformed_comment_does_not_break_history():
+    client = PagedClient()
+    client.add(1)
+    client.comments.append({"id": "9", "body": "plain text", "created": "2025-08-02T10:00:00.000+0000",
+                            "updated": "2025-08-02T10:00:00.000+0000"})
+    assert [e["operationSeq"] for e in EventHistoryStore().get_history("POPS-1", client)] == ["1"]
+
+def test_structured_event_round_trips_and_reads_like_legacy_text():
+    body = build_event_comment_body({
+        "eventType": "operation_complete",
+        "timestamp": "2025-08-01T12:00:00+02:00",
+        "operationSeq": 3,
+        "operatorComment": "line one\nline two",
+        "extra": "dropped",
+    })["body"]
+    evt = parse_event_adf(body)
+    assert evt["eventType"] == "OPERATION_COMPLETE"
+    assert evt["timestamp"] == "2025-08-01T10:00:00Z"
+    assert evt["operationSeq"] == "3"
+    assert evt["operatorComment"] == "line one\nline two"
+    assert "extra" not in evt
+    # the readable part still parses with the legacy text parser
+    legacy = parse_event_comment(parse_adf_comment({"body": body}))
+    assert legacy == dict(evt, operatorComment="line one line two")
+
+def test_broken_payload_falls_back_to_text():
+    body = build_event_comment_body({"eventType": "OPERATION_COMPLETE", "timestamp": "2025-08-01T10:00:00Z"})["body"]
+    body["content"][-1]["content"][0]["text"] = '{"mesEvent":1,'
+    assert parse_event_adf(body)["timestamp"] == "2025-08-01T10:00:00Z"
+
+@pytest.mark.parametrize("event", [{"eventType": "not valid"}, {"eventType": "OK", "timestamp": "yesterday"}])
+def test_build_event_rejects_invalid(event):
+    with pytest.raises(ValueError):
+        build_event_comment_body(event)
+
+def test_history_sorts_by_parsed_timestamp():
+    client = PagedClient()
+    for n, ts in enumerate(["2025-08-01T12:00:00+02:00", "2025-08-01T09:30:00Z", "2025-08-01T09:45:00.5Z"]):
+        created = f"2025-08-0{n + 1}T10:00:00.000+0000"
+        client.comments.append({"id": str(n), "created": created, "updated": created,
+                                "body": _adf(f"## OPERATION_COMPLETE\n- timestamp: {ts}\n- operationSeq: {n}")})
+    events = EventHistoryStore().get_history("POPS-1", client)
+    # as strings, "...12:00:00+02:00" would sort last
+    assert [e["operationSeq"] for e in events] == ["1", "2", "0"]
+
+def test_post_event_is_read_back_from_history():
+    with FakeJira() as jira:
+        jira.add_issue("ROBOT-1")
+        client = jira.client()
+        post_event("ROBOT-1", {"eventType": "OPERATION_COMPLETE", "timestamp": "2025-08-01T10:00:00Z",
+                               "operationStatus": "PASS"}, client)
+        events = get_event_history_for("ROBOT-1", client, store=EventHistoryStore())
+    assert [(e["eventType"], e["operationStatus"]) for e in events] == [("OPERATION_COMPLETE", "PASS")]
@@ -0,0 +1,44 @@
+import asyncio, pytest
+from fake_jira import FakeJira, synthetic_master_robot_record, synthetic_master_routing, synthetic_robot_comments
+from jira_tools.services.events import EventHistoryStore, get_event_history_for, get_event_history_for_async
+from jira_tools.services.http import JiraHttpError
+from jira_tools.services.robot_lookup import RobotIndex, lookup_robot_pid, lookup_robot_pid_async
+from jira_tools.services.routing import get_master_routing, get_master_routing_async
+
+@pytest.fixture
+def jira():
+    with FakeJira(max_page_size=50) as fake:
+        fake.add_issue("POPS-2632", attachments=[synthetic_master_robot_record(500)])
+        fake.add_issue("POPS-2633", attachments=[synthetic_master_routing(20)])
+        fake.add_issue("POPS-1", comments=synthetic_robot_comments(230))
+        yield fake
+
+def test_sync_client_against_fake(jira):
+    client = jira.client(master_robot_issue_key="POPS-2632", master_routing_issue_key="POPS-2633")
+    assert lookup_robot_pid({"rin": "BC033W000007XX"}, client, RobotIndex()) == "JAG-0007"
+    assert len(get_master_routing(client)) == 20
+    # 230 comments, every 10th is not an event; Jira clamps pages at 50
+    assert len(get_event_history_for("POPS-1", client, EventHistoryStore())) == 207
+    assert jira.requests["GET comments"] == 5
+    with pytest.raises(JiraHttpError) as e:
+        client.get_issue_data("POPS-404")
+    assert e.value.response.status_code == 404
+
+def test_add_and_delete_comment(jira):
+    client = jira.client()
+    client.add_comment("POPS-1", "hello")
+    assert client.get_comments("POPS-1")[-1]["text"] == "hello"
+    client.delete_last_comment("POPS-1")
+    assert len(client.get_comments("POPS-1")) == 230
+
+def test_async_client_against_fake(jira):
+    async def run():
+        async with jira.async_client(master_robot_issue_key="POPS-2632", master_routing_issue_key="POPS-2633") as client:
+            pid = await lookup_robot_pid_async({"rin": "BC033W000007XX"}, client, RobotIndex())
+            routing = await get_master_routing_async(client)
+            histories = await asyncio.gather(*(get_event_history_for_async("POPS-1", client) for _ in range(4)))
+            return pid, routing, histories
+    pid, routing, histories = asyncio.run(run())
+    assert pid == "JAG-0007"
+    assert len(routing) == 20
+    assert all(len(h) == 207 for h in histories)
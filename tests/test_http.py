@@ -0,0 +1,43 @@
+import pytest
+from fake_jira import FakeJira
+from jira_tools.services.http import JiraHttpError
+
+def test_get_is_retried_once_after_a_5xx():
+    with FakeJira() as jira:
+        jira.add_issue("POPS-1")
+        jira.get_failures = [503]
+        client = jira.client(max_retries=3)
+        assert client.get_issue_data("POPS-1")["key"] == "POPS-1"
+        assert jira.requests["GET failure"] == 1
+        assert jira.requests["GET issue"] == 1
+
+def test_get_gives_up_after_max_retries():
+    with FakeJira() as jira:
+        jira.add_issue("POPS-1")
+        jira.get_failures = [502, 504, 500, 503]
+        with pytest.raises(JiraHttpError) as e:
+            jira.client(max_retries=2).get_issue_data("POPS-1")
+        assert e.value.response.status_code == 500
+        assert jira.requests["GET failure"] == 3
+        assert jira.get_failures == [503]
+
+def test_post_is_not_retried():
+    with FakeJira() as jira:
+        jira.add_issue("POPS-1")
+        jira.post_failures = [503]
+        with pytest.raises(JiraHttpError) as e:
+            jira.client(max_retries=3).add_comment("POPS-1", "hello")
+        assert e.value.response.status_code == 503
+        assert jira.requests["POST comment"] == 1
+        assert jira._issues["POPS-1"].comments == []
+
+def test_calls_share_one_pooled_connection():
+    with FakeJira() as jira:
+        jira.add_issue("POPS-1")
+        client = jira.client()
+        for _ in range(5):
+            client.get_issue_data("POPS-1")
+        client.add_comment("POPS-1", "hello")
+        assert jira.connections == 1
+        adapter = client.transport.session.get_adapter(jira.base_url)
+        assert adapter.poolmanager.connection_pool_kw["maxsize"] == client.transport.pool_size
@@ -0,0 +1,73 @@
+import pytest
+from app.api import create_app
+from fake_jira import FakeJira, synthetic_master_robot_record, synthetic_master_routing
+from jira_tools.services import robot_lookup, routing
+
+@pytest.fixture
+def jira():
+    robot_lookup.ROBOT_INDEX.invalidate()
+    routing.ROUTING_STORE.invalidate()
+    with FakeJira() as jira:
+        jira.add_issue("POPS-2632", attachments=[synthetic_master_robot_record(20)])
+        jira.add_issue("POPS-2633", attachments=[synthetic_master_routing(5, span=100)])
+        yield jira
+
+@pytest.fixture
+def api(jira):
+    client = jira.client(master_robot_issue_key="POPS-2632", master_routing_issue_key="POPS-2633")
+    return create_app(jira_client=client).test_client()
+
+def test_routing_etag_and_304(api, jira):
+    resp = api.get("/v1/routing/JAG-0007")
+    assert resp.status_code == 200
+    assert resp.get_json()["effectivity"]
+    etag = resp.headers["ETag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+    assert "max-age=" in resp.headers["Cache-Control"]
+
+    downloads = jira.requests["GET attachment"]
+    again = api.get("/v1/routing/JAG-0007", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.headers["ETag"] == etag
+    assert jira.requests["GET attachment"] == downloads
+
+    assert api.get("/v1/routing/JAG-0007", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+def test_routing_if_none_match_uses_weak_comparison(api):
+    etag = api.get("/v1/routing/JAG-0007").headers["ETag"]
+    # e.g. after a compressing proxy weakened the validator
+    assert api.get("/v1/routing/JAG-0007", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+    assert api.get("/v1/routing/JAG-0007", headers={"If-None-Match": f'"x", W/{etag}'}).status_code == 304
+
+def test_routing_master_data_fault_is_a_server_error(api, jira):
+    jira.add_attachment("POPS-2633", {"masterRoutingRecord": []})
+    routing.ROUTING_STORE.invalidate()
+    resp = api.get("/v1/routing/JAG-0007")
+    assert resp.status_code == 500
+    assert resp.get_json()["error"] == "MasterDataError"
+
+def test_routing_etag_changes_with_new_attachment(api, jira):
+    etag = api.get("/v1/routing/JAG-0007").headers["ETag"]
+    jira.add_attachment("POPS-2633", synthetic_master_routing(5))
+    routing.ROUTING_STORE.invalidate()
+    resp = api.get("/v1/routing/JAG-0007", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
+
+def test_routing_errors(api):
+    assert api.get("/v1/routing/JAG-XYZ").status_code == 400
+    assert api.get("/v1/routing/JAG-0500").status_code == 404
+
+def test_resolve_get_conditional(api):
+    resp = api.get("/v1/robots/resolve?rin=BC033W000001XX")
+    assert resp.get_json() == {"robotPid": "JAG-0001"}
+    etag = resp.headers["ETag"]
+    assert api.get("/v1/robots/resolve?rin=BC033W000001XX", headers={"If-None-Match": etag}).status_code == 304
+    # another RIN never shares the validator
+    other = api.get("/v1/robots/resolve?rin=BC033W000002XX", headers={"If-None-Match": etag})
+    assert other.status_code == 200 and other.headers["ETag"] != etag
+    # POST carries the same validator, so clients can revalidate with GET
+    assert api.post("/v1/robots/resolve", json={"rin": "BC033W000001XX"}).headers["ETag"] == etag
+    assert api.get("/v1/robots/resolve?rin=NOPE").status_code == 404
+    assert api.get("/v1/robots/resolve").status_code == 400
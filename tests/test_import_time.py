@@ -0,0 +1,61 @@
+"""
+Startup budgets for CLI entry points and hot modules, measured with `python -X importtime`
+in a fresh interpreter per module. Budgets are cumulative import time; scale with BENCH_BUDGET_SCALE.
+"""
+import os, subprocess, sys, pytest
+from pathlib import Path
+
+pytestmark = pytest.mark.benchmark
+
+_SCALE = float(os.getenv("BENCH_BUDGET_SCALE", "1"))
+_ROOT = Path(__file__).resolve().parents[1]
+
+# module -> cumulative import budget in milliseconds
+IMPORT_BUDGETS_MS = {
+    "jira_tools.scripts.jira_auth": 25,
+    "jira_tools.scripts.mes_snapshot": 80,
+    "jira_tools.config.credentials": 50,
+    "jira_tools.config.config": 60,
+    "jira_tools.utils.adf": 20,
+    "jira_tools.utils.routing_index": 40,
+    "jira_tools.services.routing": 80,
+    "jira_tools.services.robot_lookup": 100,
+    "jira_tools.jira_client": 500,
+}
+
+def _importtime(code: str, env=None):
+    """Run `code` under -X importtime; returns {module: cumulative microseconds}."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+def _clean_env(**extra):
+    env = {k: v for k, v in os.environ.items() if not k.startswith("JIRA_")}
+    env.update(extra)
+    return env
+
+@pytest.mark.parametrize("module", sorted(IMPORT_BUDGETS_MS))
+def test_import_budget(module):
+    # best of 3 fresh interpreters; the first may pay for a cold disk cache
+    best = min(_importtime(f"import {module}")[module] for _ in range(3)) / 1000
+    budget = IMPORT_BUDGETS_MS[module] * _SCALE
+    assert best <= budget, f"import {module} took {best:.1f} ms; budget {budget:.1f} ms"
+
+def test_cli_import_skips_heavy_dependencies():
+    loaded = _importtime("import jira_tools.scripts.jira_auth", env=_clean_env())
+    assert not {"requests", "keyring", "dotenv"} & set(loaded)
+
+def test_status_with_env_credentials_skips_keyring_and_requests():
+    code = "import sys; sys.argv = ['jira-auth', 'status']; from jira_tools.scripts.jira_auth import main; main()"
+    env = _clean_env(JIRA_EMAIL="ops@example.com", JIRA_API_TOKEN="t", JIRA_DOMAIN="jira.invalid")
+    loaded = _importtime(code, env=env)
+    assert "jira_tools.config.credentials" in loaded
+    assert not {"requests", "keyring"} & set(loaded)
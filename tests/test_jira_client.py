@@ -96,3 +96,37 @@ def test_comments(jira_test_data, client):
     # Test `delete_last_comment`
     client.delete_last_comment(jira_test_data.ok_issue)
     client.delete_last_comment(jira_test_data.ok_issue)
+
+# ---- against the local fake Jira (no credentials needed) ----------------------
+
+@pytest.fixture
+def fake():
+    from fake_jira import FakeJira, synthetic_robot_comments
+    with FakeJira(max_page_size=7) as jira:
+        jira.add_issue("POPS-1", comments=synthetic_robot_comments(23))
+        yield jira
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_iter_comments_walks_clamped_pages_in_order(fake, prefetch):
+    client = fake.client()
+    oldest_first = list(client.iter_comments("POPS-1", page_size=100, prefetch=prefetch, raw=True))
+    # Jira clamps pages to 7, so `total` (not the page size asked for) decides when to stop
+    assert [c["id"] for c in oldest_first] == [c["id"] for c in fake._issues["POPS-1"].comments]
+    assert fake.requests["GET comments"] == 4
+    newest_first = list(client.iter_comments("POPS-1", order="-created", prefetch=prefetch, raw=True))
+    assert newest_first == oldest_first[::-1]
+
+def test_iter_comments_parses_unless_raw(fake):
+    parsed = next(fake.client().iter_comments("POPS-1"))
+    assert parsed["text"].startswith("Shift note 0") and "body" not in parsed
+
+def test_iter_comments_prefetches_at_most_one_page_ahead(fake):
+    comments = fake.client().iter_comments("POPS-1", prefetch=True)
+    next(comments)
+    comments.close()
+    assert fake.requests["GET comments"] <= 2
+
+def test_get_comment_page_rejects_unknown_order(fake):
+    with pytest.raises(ValueError):
+        fake.client().get_comment_page("POPS-1", order="updated")
+    assert "GET comments" not in fake.requests
@@ -0,0 +1,38 @@
+from jira_tools.utils.markdown import render_markdown, slugify
+
+def test_headings_get_unique_ids():
+    out, headings = render_markdown("# Tower\n\n## Parts\n\ntext\n\n## Parts\n\n### <font color=red>Step 1</font>")
+    assert [(h.level, h.id) for h in headings] == [(1, "tower"), (2, "parts"), (2, "parts-1"), (3, "step-1")]
+    assert '<h2 id="parts-1">Parts</h2>' in out
+    assert '<h3 id="step-1"><font color=red>Step 1</font></h3>' in out
+    assert slugify("Base & Rails: Torque") == "base--rails-torque"
+
+def test_table_with_alignment_and_inline():
+    out, _ = render_markdown("| Part | Qty |\n|:-----|----:|\n| `M4\\|M5` bolt | **4** |\n")
+    assert "<thead>\n<tr><th style=\"text-align: left\">Part</th><th style=\"text-align: right\">Qty</th></tr>" in out
+    assert "<td style=\"text-align: left\"><code>M4|M5</code> bolt</td>" in out
+    assert "<strong>4</strong>" in out
+
+def test_nested_lists_checkboxes_and_code():
+    md = (
+        "1. Mount the base\n"
+        "    - <input type=\"checkbox\" /> torque to 3 Nm\n"
+        "    - check *alignment*\n"
+        "2. Next\n"
+        "\n"
+        "```yaml\n"
+        "a: <b>\n"
+        "```\n"
+    )
+    out, _ = render_markdown(md)
+    assert out.startswith("<ol>\n<li>Mount the base\n<ul>\n<li><input type=\"checkbox\" /> torque to 3 Nm</li>")
+    assert "<li>check <em>alignment</em></li>" in out
+    assert '<pre><code class="language-yaml">a: &lt;b&gt;\n</code></pre>' in out
+
+def test_links_and_images_are_rewritten():
+    out, _ = render_markdown("See [BOM](<bom/a b.csv>) and ![rails](img/rails.png \"Rails\")",
+                             link=lambda href: "/assets/" + href)
+    assert '<a href="/assets/bom/a b.csv">BOM</a>' in out
+    assert '<img src="/assets/img/rails.png" alt="rails" title="Rails" loading="lazy" />' in out
+    out, _ = render_markdown("<https://x.io/a?b=1&c>")
+    assert out == '<p><a href="https://x.io/a?b=1&amp;c">https://x.io/a?b=1&amp;c</a></p>'
@@ -0,0 +1,70 @@
+import json
+from fake_jira import FakeJira, synthetic_master_robot_record, synthetic_master_routing
+from jira_tools.services.master_data import SnapshotStore, MASTER_ROBOT_RECORD, MASTER_ROUTING_RECORD
+from jira_tools.services.robot_lookup import RobotIndex, lookup_robot_pid
+from jira_tools.services.routing import RoutingStore, get_master_routing
+from jira_tools.utils.routing_table import RoutingTable, build_routing_table
+
+def test_sync_then_serve_from_snapshot_without_jira(tmp_path):
+    with FakeJira() as jira:
+        jira.add_issue("POPS-2632", attachments=[synthetic_master_robot_record(50)])
+        jira.add_issue("POPS-2633", attachments=[synthetic_master_routing(5)])
+        client = jira.client(master_robot_issue_key="POPS-2632", master_routing_issue_key="POPS-2633")
+        store = SnapshotStore(tmp_path)
+        first = store.sync(client)
+        # unchanged attachments do not produce new files
+        assert store.sync(client) == first
+        jira.add_attachment("POPS-2632", synthetic_master_robot_record(60))
+        store.sync(client)
+
+    manifest = json.loads((tmp_path / "manifest.json").read_text())["snapshots"]
+    assert len(manifest) == 3
+    assert store.latest(MASTER_ROBOT_RECORD)["sha256"] != first[0]["sha256"]
+
+    # Jira is gone; snapshot mode still answers
+    client.config.master_data_source = "snapshot"
+    client.config.snapshot_dir = str(tmp_path)
+    assert lookup_robot_pid({"rin": "BC033W000060XX"}, client, RobotIndex()) == "JAG-0060"
+    routing = get_master_routing(client)
+    assert len(routing) == 5
+    assert get_master_routing(client) is routing
+
+    # the routing snapshot comes with a compiled applicability table
+    master = RoutingStore().get(client)
+    assert isinstance(master.index, RoutingTable)
+    assert master.index.resolve("JAG-0007") is routing[master.index.winner(7)]
+
+def test_sync_recompiles_a_table_not_built_from_its_snapshot(tmp_path):
+    with FakeJira() as jira:
+        jira.add_issue("POPS-2633", attachments=[synthetic_master_routing(5)])
+        client = jira.client(master_routing_issue_key="POPS-2633")
+        store = SnapshotStore(tmp_path)
+        entry, = store.sync(client, kinds=(MASTER_ROUTING_RECORD,))
+        # e.g. a table written by an older format, which carried no source hash
+        build_routing_table(store.load(entry), tmp_path / entry["table"])
+        store.sync(client, kinds=(MASTER_ROUTING_RECORD,))
+    table = store.open_routing_table(store.latest(MASTER_ROUTING_RECORD))
+    assert table.source_sha256 == entry["sha256"]
+
+def test_superseded_registries_and_tables_are_released(tmp_path):
+    with FakeJira() as jira:
+        jira.add_issue("POPS-2632", attachments=[synthetic_master_robot_record(50)])
+        jira.add_issue("POPS-2633", attachments=[synthetic_master_routing(5)])
+        client = jira.client(master_robot_issue_key="POPS-2632", master_routing_issue_key="POPS-2633")
+        store = SnapshotStore(tmp_path)
+        old_robots, old_routing = store.sync(client)
+        old_reg = store.open_registry(old_robots)
+        old_table = store.open_routing_table(old_routing)
+        jira.add_attachment("POPS-2632", synthetic_master_robot_record(60))
+        jira.add_attachment("POPS-2633", synthetic_master_routing(3))
+        new_robots, new_routing = store.sync(client)
+
+    reg = store.open_registry(new_robots)
+    assert reg["BC033W000060XX"] == "JAG-0060"
+    assert store.open_routing_table(new_routing) is not old_table
+    assert set(store._registries) == {new_robots["sha256"]}
+    assert set(store._tables) == {new_routing["sha256"]}
+    assert old_reg._mm.closed
+    # opening a superseded snapshot again keeps the newest one mapped
+    assert store.open_registry(old_robots) is not old_reg
+    assert store.open_registry(new_robots) is reg
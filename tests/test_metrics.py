@@ -0,0 +1,121 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from app.api import create_app
+from fake_jira import FakeJira, synthetic_master_robot_record
+from jira_tools.services import robot_lookup
+from jira_tools.services.http import endpoint_label
+from jira_tools.utils import metrics
+from jira_tools.utils.metrics import CallbackMetric, Counter, Histogram, Registry
+
+@pytest.fixture(autouse=True)
+def cold_robot_index():
+    # the routes hold the process-wide index, so reset it rather than swapping it out
+    robot_lookup.ROBOT_INDEX.invalidate()
+
+def _registry(gauge=0):
+    reg = Registry()
+    reg.register(Counter("calls_total", "Calls.", ("status",)))
+    reg.register(Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0)))
+    reg.register(CallbackMetric("queue_depth", "Depth.", "gauge", lambda: gauge))
+    return reg
+
+def test_render_prometheus_text():
+    reg = Registry()
+    c = reg.register(Counter("calls_total", "Calls.", ("status",)))
+    h = reg.register(Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0)))
+    c.inc(status='a"b')
+    c.inc(2, status="200")
+    h.observe(0.05)
+    h.observe(0.5)
+    text = reg.render()
+    assert 'calls_total{status="a\\"b"} 1' in text
+    assert 'calls_total{status="200"} 2' in text
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 2' in text
+    assert "latency_seconds_count 2" in text
+
+def test_endpoint_label_folds_keys_and_ids():
+    assert endpoint_label("POPS-12/comment?startAt=0&maxResults=100") == "issue/{issueKey}/comment"
+    assert endpoint_label("POPS-12/comment/10042") == "issue/{issueKey}/comment/{id}"
+    assert endpoint_label("POPS-12?fields=attachment") == "issue/{issueKey}"
+    assert endpoint_label("../attachment/content/10001") == "attachment/content/{id}"
+    assert endpoint_label("../search/jql?jql=x") == "search/jql"
+
+def test_shared_directory_merges_processes(tmp_path):
+    # two registries stand in for two WSGI workers
+    first, second = _registry(gauge=3), _registry(gauge=5)
+    first.share(tmp_path, interval=None)
+    second.share(tmp_path, interval=None)
+    first.get("calls_total").inc(status="200")
+    second.get("calls_total").inc(2, status="200")
+    second.get("calls_total").inc(status="500")
+    first.get("latency_seconds").observe(0.05)
+    second.get("latency_seconds").observe(0.5)
+    # what the other worker's publishing thread would do
+    second.publish()
+    for reg in (first, second):
+        text = reg.render()
+        assert 'calls_total{status="200"} 3' in text
+        assert 'calls_total{status="500"} 1' in text
+        assert 'latency_seconds_bucket{le="0.1"} 1' in text
+        assert "latency_seconds_count 2" in text
+        assert "queue_depth 5" in text
+        assert text.count("# TYPE calls_total counter") == 1
+
+def test_exited_process_keeps_its_counts(tmp_path):
+    code = (
+        "from jira_tools.utils import metrics\n"
+        "c = metrics.counter('calls_total', 'Calls.', ('status',))\n"
+        "metrics.callback('queue_depth', 'Depth.', 'gauge', lambda: 9)\n"
+        f"metrics.REGISTRY.share({str(tmp_path)!r}, interval=None)\n"
+        "c.inc(5, status='200')\n"
+        "import os; print(os.getpid())\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).parents[1],
+                         capture_output=True, text=True, check=True)
+    reg = _registry()
+    reg.share(tmp_path, interval=None)
+    reg.get("calls_total").inc(status="200")
+    text = reg.render()
+    assert 'calls_total{status="200"} 6' in text
+    # the exited process's gauge no longer counts
+    assert "queue_depth 0" in text
+
+    metrics.retire(tmp_path, int(out.stdout))
+    assert sorted(p.name for p in tmp_path.iterdir() if not p.name.startswith(reg._shared.id)) == ["archive.json"]
+    assert 'calls_total{status="200"} 6' in reg.render()
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_forked_process_counts_only_what_it_did(tmp_path):
+    reg = _registry()
+    reg.share(tmp_path, interval=None)
+    reg.get("calls_total").inc(2, status="200")
+    pid = os.fork()
+    if pid == 0:
+        try:
+            reg.share(tmp_path, interval=None)
+            reg.get("calls_total").inc(status="200")
+            reg.publish()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    assert 'calls_total{status="200"} 3' in reg.render()
+
+def test_metrics_endpoint_reports_routes_jira_calls_and_cache():
+    with FakeJira() as jira:
+        jira.add_issue("POPS-2632", attachments=[synthetic_master_robot_record(10)])
+        app = create_app()
+        app.extensions["jira_client"] = jira.client(master_robot_issue_key="POPS-2632")
+        api = app.test_client()
+        for _ in range(2):
+            assert api.post("/v1/robots/resolve", json={"rin": "BC033W000001XX"}).status_code == 200
+        text = api.get("/metrics").get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{method="POST",route="/v1/robots/resolve",status="200"}' in text
+    assert 'jira_requests_total{method="GET",endpoint="attachment/content/{id}",status="200"}' in text
+    assert 'jira_response_bytes_total{endpoint="attachment/content/{id}"}' in text
+    assert 'robot_index_lookups_total{result="hit"}' in text
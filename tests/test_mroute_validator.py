@@ -0,0 +1,125 @@
+import json, subprocess, sys
+from pathlib import Path
+import pytest
+from fake_jira import synthetic_master_routing
+from jira_tools.utils.routing_table import build_routing_table
+
+ROOT = Path(__file__).resolve().parent.parent
+VALIDATOR = ROOT / "utilities" / "mroute_validator.py"
+
+# utilities/ is a folder of scripts, not a package; importable by name so --jobs can pickle its tasks
+sys.path.insert(0, str(VALIDATOR.parent))
+import mroute_validator
+
+def _routing_file(tmp_path, doc, indent=None):
+    path = tmp_path / "routing.json"
+    path.write_text(json.dumps(doc, indent=indent), encoding="utf-8")
+    return path
+
+def _broken_routing():
+    doc = synthetic_master_routing(40, span=400)
+    recs = doc["masterRoutingRecord"]
+    recs[3]["version"] = "v1"
+    recs[17]["effectivity"] = "0300-0100"
+    recs[25]["operations"][2]["standardWork"] = "ftp://nope"
+    recs.insert(30, "not a record")
+    return doc
+
+@pytest.mark.parametrize("chunk_size", [7, 64, 1 << 16])
+def test_stream_yields_the_same_records(tmp_path, chunk_size):
+    doc = _broken_routing()
+    doc["trailer"] = {"n": 12345678901234567890, "x": [1.5e-3, None, True]}
+    path = _routing_file(tmp_path, doc, indent=2)
+    top = {}
+    records = list(mroute_validator.iter_routing_records(str(path), top, chunk_size=chunk_size))
+    assert records == doc["masterRoutingRecord"]
+    assert top == {"schemaVersion": "1.0", "masterRoutingRecord": [], "trailer": doc["trailer"]}
+
+@pytest.mark.parametrize("scalar", ["17423.75", "-0.5e-12", "1E+400", "12345678901234567890", "true", '"a\\u00e9b"'])
+def test_stream_decodes_a_scalar_split_at_every_offset(tmp_path, scalar):
+    head = '{"masterRoutingRecord": [], "v": '
+    path = tmp_path / "routing.json"
+    path.write_text(head + scalar + "}", encoding="utf-8")
+    for offset in range(1, len(scalar)):
+        top = {}
+        # the first chunk ends `offset` characters into the scalar
+        list(mroute_validator.iter_routing_records(str(path), top, chunk_size=len(head) + offset))
+        assert top["v"] == json.loads(scalar), offset
+
+@pytest.mark.parametrize("stream,jobs", [(False, 1), (True, 1), (True, 2)])
+def test_check_file_matches_in_memory_validation(tmp_path, stream, jobs):
+    doc = _broken_routing()
+    path = _routing_file(tmp_path, doc)
+    expected, _ = mroute_validator.validate_document(doc)
+    result = mroute_validator.check_file(str(path), stream=stream, jobs=jobs)
+    assert result["errors"] == expected
+    assert result["records"] == len(doc["masterRoutingRecord"])
+    assert not result["valid"]
+
+@pytest.mark.parametrize("doc", [
+    {"schemaVersion": "1.0"},
+    {"schemaVersion": "1.0", "masterRoutingRecord": {"version": "0.1.0"}},
+    {"schemaVersion": "1.0", "masterRoutingRecord": None},
+])
+def test_stream_reports_a_bad_record_list_like_in_memory(tmp_path, doc):
+    path = _routing_file(tmp_path, doc)
+    streamed = mroute_validator.check_file(str(path), stream=True)["errors"]
+    assert streamed == mroute_validator.check_file(str(path))["errors"]
+    assert "saw (list)" not in " ".join(streamed)
+
+def test_stream_falls_back_for_invalid_json(tmp_path):
+    path = tmp_path / "routing.json"
+    path.write_text('{"schemaVersion": "1.0", "masterRoutingRecord": [{"version": "0.1.0",}]}', encoding="utf-8")
+    with pytest.raises(json.JSONDecodeError):
+        mroute_validator.check_file(str(path), stream=True)
+
+def test_report_segments_overlaps_gaps_and_shadowed():
+    records = [
+        {"version": "0.1.0", "effectivity": "0001-0050", "eco": "ECO-1"},
+        {"version": "0.2.0", "effectivity": "0040-0060", "eco": "ECO-2"},
+        {"version": "0.1.5", "effectivity": "0045-0055", "eco": "ECO-3"},   # always beaten by 0.2.0
+        {"version": "1.0.0", "effectivity": "0100-0200", "eco": "ECO-4"},
+    ]
+    report = mroute_validator.effectivity_report(records)
+    assert [(s["start"], s["end"], s["winner"]["version"]) for s in report["segments"]] == [
+        (1, 39, "0.1.0"), (40, 44, "0.2.0"), (45, 50, "0.2.0"), (51, 55, "0.2.0"), (56, 60, "0.2.0"), (100, 200, "1.0.0"),
+    ]
+    assert [(o["start"], o["end"], [r["index"] for r in o["records"]]) for o in report["overlaps"]] == [
+        (40, 44, [1, 0]), (45, 50, [1, 2, 0]), (51, 55, [1, 2]),
+    ]
+    assert report["gaps"] == [{"start": 61, "end": 99}, {"start": 201, "end": 9999}]
+    assert [r["index"] for r in report["shadowed"]] == [2]
+
+def test_cli_json_output(tmp_path):
+    path = _routing_file(tmp_path, synthetic_master_routing(10, span=200))
+    out = subprocess.run(
+        [sys.executable, str(VALIDATOR), str(path), "--stream", "--json", "--report",
+         "--robot-id", "JAG-0007", "--robot-id", "JAG-0300"],
+        capture_output=True, text=True, cwd=ROOT,
+    )
+    assert out.returncode == 1
+    result = json.loads(out.stdout)
+    assert result["applicable"]["JAG-0007"]["version"]
+    assert result["applicable"]["JAG-0300"] is None
+    assert result["errors"] == ["--robot-id JAG-0300: not covered by any effectivity range"]
+    assert result["report"]["gaps"][-1] == {"start": 201, "end": 9999}
+
+    bad = tmp_path / "bad.json"
+    bad.write_text("{", encoding="utf-8")
+    out = subprocess.run([sys.executable, str(VALIDATOR), str(bad), "--stream", "--json"],
+                         capture_output=True, text=True, cwd=ROOT)
+    assert out.returncode == 3
+    assert json.loads(out.stdout)["valid"] is False
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_table_check(tmp_path, stream):
+    doc = synthetic_master_routing(20, span=500)
+    path = _routing_file(tmp_path, doc, indent=2)
+    build_routing_table(doc, tmp_path / "routing.rtab")
+    assert mroute_validator.check_file(str(path), stream=stream, table=str(tmp_path / "routing.rtab"))["valid"]
+
+    doc["masterRoutingRecord"][5]["version"] = "9.0.0"
+    path = _routing_file(tmp_path, doc)
+    result = mroute_validator.check_file(str(path), stream=stream, table=str(tmp_path / "routing.rtab"))
+    assert not result["valid"]
+    assert all(e.startswith("--table ") for e in result["errors"])
@@ -0,0 +1,163 @@
+import json
+import sqlite3
+
+from fake_jira import FakeJira
+from jira_tools.services.events import EventHistoryStore, build_event_comment_body, parse_event_adf
+from jira_tools.services.http import post_json
+from jira_tools.services.outbox import OUTBOX_DB_ERRORS, EventOutbox
+
+def _event(seq):
+    return {"eventType": "OPERATION_COMPLETE", "timestamp": f"2025-08-01T10:{seq:02d}:00Z", "operationSeq": seq}
+
+def _posted_seqs(jira, key):
+    return [parse_event_adf(c["body"])["operationSeq"] for c in jira._issues[key].comments]
+
+def test_events_post_in_order_per_issue(tmp_path):
+    with FakeJira(latency=0.002) as jira:
+        for key in ("ROBOT-1", "ROBOT-2", "ROBOT-3"):
+            jira.add_issue(key)
+        outbox = EventOutbox(tmp_path / "outbox.sqlite3", jira.client(), workers=3)
+        for seq in range(10):
+            for key in ("ROBOT-1", "ROBOT-2", "ROBOT-3"):
+                outbox.enqueue_event(key, _event(seq))
+        assert outbox.depth() == 30
+        outbox.start()
+        try:
+            assert outbox.drain(timeout=10)
+        finally:
+            outbox.close()
+        for key in ("ROBOT-1", "ROBOT-2", "ROBOT-3"):
+            assert _posted_seqs(jira, key) == [str(s) for s in range(10)]
+
+def test_retryable_failure_holds_the_issue_back(tmp_path):
+    with FakeJira() as jira:
+        jira.add_issue("ROBOT-1")
+        jira.post_failures = [503, 503]
+        outbox = EventOutbox(tmp_path / "outbox.sqlite3", jira.client(), workers=2, backoff_base=0.01)
+        outbox.enqueue_event("ROBOT-1", _event(1))
+        outbox.enqueue_event("ROBOT-1", _event(2))
+        outbox.start()
+        try:
+            assert outbox.drain(timeout=10)
+        finally:
+            outbox.close()
+        assert _posted_seqs(jira, "ROBOT-1") == ["1", "2"]
+        assert jira.requests["POST comment"] == 4
+
+def test_retry_after_lost_response_does_not_duplicate(tmp_path):
+    with FakeJira() as jira:
+        jira.add_issue("ROBOT-1")
+        # Jira created the comment, but the answer never made it back
+        jira.post_failures_after_create = [504]
+        outbox = EventOutbox(tmp_path / "outbox.sqlite3", jira.client(), backoff_base=0.01)
+        outbox.enqueue_event("ROBOT-1", _event(1))
+        outbox.enqueue_event("ROBOT-1", _event(2))
+        outbox.start()
+        try:
+            assert outbox.drain(timeout=10)
+        finally:
+            outbox.close()
+        assert _posted_seqs(jira, "ROBOT-1") == ["1", "2"]
+        assert jira.requests["POST comment"] == 2
+
+def test_expired_lease_does_not_duplicate(tmp_path):
+    path = tmp_path / "outbox.sqlite3"
+    with FakeJira() as jira:
+        jira.add_issue("ROBOT-1")
+        # a worker leased the row and created the comment, then died before recording it
+        dead = EventOutbox(path, jira.client(), lease=0.0)
+        dead.enqueue_event("ROBOT-1", _event(1))
+        _, issue_key, body, attempts, claims = dead._claim()
+        assert (attempts, claims) == (0, 0)
+        post_json(f"{issue_key}/comment", json.loads(body), jira.client())
+        dead.close()
+        outbox = EventOutbox(path, jira.client()).start()
+        try:
+            assert outbox.drain(timeout=10)
+        finally:
+            outbox.close()
+        assert _posted_seqs(jira, "ROBOT-1") == ["1"]
+        assert jira.requests["POST comment"] == 1
+
+def test_worker_survives_database_errors(tmp_path, monkeypatch):
+    with FakeJira() as jira:
+        jira.add_issue("ROBOT-1")
+        outbox = EventOutbox(tmp_path / "outbox.sqlite3", jira.client(), backoff_base=0.01)
+        claim = outbox._claim
+        failures = [sqlite3.OperationalError("database is locked")] * 2
+
+        def flaky_claim():
+            if failures:
+                raise failures.pop()
+            return claim()
+
+        monkeypatch.setattr(outbox, "_claim", flaky_claim)
+        before = OUTBOX_DB_ERRORS.value(step="claim")
+        outbox.enqueue_event("ROBOT-1", _event(1))
+        outbox.start()
+        try:
+            assert outbox.drain(timeout=10)
+        finally:
+            outbox.close()
+        assert _posted_seqs(jira, "ROBOT-1") == ["1"]
+        assert OUTBOX_DB_ERRORS.value(step="claim") == before + 2
+
+def test_history_keeps_one_event_per_event_id():
+    with FakeJira() as jira:
+        jira.add_issue("ROBOT-1")
+        body = build_event_comment_body(_event(1), event_id="abc")["body"]
+        jira.add_comment("ROBOT-1", body)
+        jira.add_comment("ROBOT-1", body)
+        jira.add_comment("ROBOT-1", build_event_comment_body(_event(1))["body"])
+        events = EventHistoryStore().get_history("ROBOT-1", jira.client())
+        assert [e["operationSeq"] for e in events] == ["1", "1"]
+
+def test_rejected_event_is_parked(tmp_path):
+    with FakeJira() as jira:
+        jira.add_issue("ROBOT-1")
+        jira.post_failures = [400]
+        outbox = EventOutbox(tmp_path / "outbox.sqlite3", jira.client())
+        outbox.enqueue_event("ROBOT-1", _event(1))
+        outbox.enqueue_event("ROBOT-1", _event(2))
+        outbox.start()
+        try:
+            assert outbox.drain(timeout=10)
+            assert outbox.stats()["failed"] == 1
+            assert outbox.failed()[0]["issueKey"] == "ROBOT-1"
+        finally:
+            outbox.close()
+        assert _posted_seqs(jira, "ROBOT-1") == ["2"]
+
+def test_pending_events_survive_a_restart(tmp_path):
+    path = tmp_path / "outbox.sqlite3"
+    with FakeJira() as jira:
+        jira.add_issue("ROBOT-1")
+        EventOutbox(path, jira.client()).enqueue_event("ROBOT-1", _event(1))
+        outbox = EventOutbox(path, jira.client()).start()
+        try:
+            assert outbox.drain(timeout=10)
+        finally:
+            outbox.close()
+        assert _posted_seqs(jira, "ROBOT-1") == ["1"]
+
+def test_two_outboxes_on_one_file_keep_per_issue_order(tmp_path):
+    # e.g. two WSGI worker processes sharing the outbox file
+    path = tmp_path / "outbox.sqlite3"
+    with FakeJira(latency=0.002) as jira:
+        keys = ("ROBOT-1", "ROBOT-2")
+        for key in keys:
+            jira.add_issue(key)
+        first = EventOutbox(path, jira.client(), workers=2)
+        second = EventOutbox(path, jira.client(), workers=2)
+        for seq in range(10):
+            for key in keys:
+                (first if seq % 2 else second).enqueue_event(key, _event(seq))
+        first.start()
+        second.start()
+        try:
+            assert first.drain(timeout=10)
+        finally:
+            first.close()
+            second.close()
+        for key in keys:
+            assert _posted_seqs(jira, key) == [str(s) for s in range(10)]
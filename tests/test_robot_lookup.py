@@ -0,0 +1,48 @@
+import pytest
+from types import SimpleNamespace
+from jira_tools.services.errors import NotFoundError
+from jira_tools.services.robot_lookup import RobotIndex, lookup_robot_pid
+
+class FakeClient:
+    """Stands in for JiraClient; counts attachment metadata and content fetches."""
+    def __init__(self, record, attachment_id="10001"):
+        self.config = SimpleNamespace(master_robot_issue_key="POPS-2632")
+        self.record = record
+        self.attachment_id = attachment_id
+        self.meta_calls = 0
+        self.content_calls = 0
+
+    def get_attachments(self, issue_key):
+        self.meta_calls += 1
+        return [{"id": self.attachment_id, "created": "2025-08-13T17:30:00.000-0700"}]
+
+    def get_attachment_content(self, attachment_id):
+        self.content_calls += 1
+        return dict(self.record)
+
+def test_lookup_served_from_index():
+    client = FakeClient({"BC033W000002RX": "JAG-0001", "BC033W000003DZ": "JAG-0002"})
+    index = RobotIndex(ttl=60)
+    assert lookup_robot_pid({"rin": "BC033W000002RX"}, client, index) == "JAG-0001"
+    assert lookup_robot_pid({"rin": "BC033W000003DZ"}, client, index) == "JAG-0002"
+    assert client.content_calls == 1
+    assert (index.stats.hits, index.stats.misses, index.stats.refreshes) == (1, 1, 1)
+
+def test_revalidation_only_downloads_changed_attachment():
+    client = FakeClient({"BC033W000002RX": "JAG-0001"})
+    index = RobotIndex(ttl=0)
+    lookup_robot_pid({"rin": "BC033W000002RX"}, client, index)
+    lookup_robot_pid({"rin": "BC033W000002RX"}, client, index)
+    assert client.content_calls == 1
+    assert index.stats.revalidations == 1
+
+    client.record = {"BC033W000002RX": "JAG-0042"}
+    client.attachment_id = "10002"
+    assert lookup_robot_pid({"rin": "BC033W000002RX"}, client, index) == "JAG-0042"
+    assert client.content_calls == 2
+    assert index.stats.refreshes == 2
+
+def test_unknown_rin_raises():
+    client = FakeClient({"BC033W000002RX": "JAG-0001"})
+    with pytest.raises(NotFoundError):
+        lookup_robot_pid({"rin": "NOPE"}, client, RobotIndex())
@@ -0,0 +1,28 @@
+import json, pytest
+from pathlib import Path
+from jira_tools.utils.robot_registry import RobotRegistry, build_registry
+
+MASTER_ROBOT = Path(__file__).resolve().parent.parent / "mes_master_data" / "master_robot_record_v1.0.0.json"
+
+@pytest.fixture
+def record():
+    return json.loads(MASTER_ROBOT.read_text())
+
+def test_registry_matches_json(tmp_path, record):
+    path = tmp_path / "robots.reg"
+    build_registry(record, path)
+    with RobotRegistry(path) as reg:
+        assert len(reg) == len(record)
+        for rin, pid in record.items():
+            assert reg[rin] == pid
+            assert reg.rin_for(pid) == rin
+        assert list(reg) == sorted(record)
+        assert reg.get("NOT-A-RIN") is None
+        assert "BC033W000002RXX" not in reg  # longer than any key
+        assert reg.rin_for("JAG-99999") is None
+
+def test_rejects_foreign_file(tmp_path):
+    path = tmp_path / "junk.reg"
+    path.write_bytes(b"x" * 64)
+    with pytest.raises(ValueError):
+        RobotRegistry(path)
@@ -0,0 +1,82 @@
+import json, random, pytest
+from pathlib import Path
+from fake_jira import FakeJira, synthetic_master_routing
+from jira_tools.utils.parse import parse_semver
+from jira_tools.utils.routing_index import RoutingIndex
+from jira_tools.services.routing import RoutingStore, get_routing_for
+
+MASTER_ROUTING = Path(__file__).resolve().parent.parent / "mes_master_data" / "master_routing_record_v0.1.0.json"
+
+def _linear_pick(records, seq):
+    """Reference selection: the original scan + stable sort by semver."""
+    candidates = []
+    for rec in records:
+        a, b = (int(x) for x in rec["effectivity"].split("-"))
+        if a <= seq <= b:
+            candidates.append((parse_semver(rec["version"]), rec))
+    candidates.sort(key=lambda t: t[0], reverse=True)
+    return candidates[0][1] if candidates else None
+
+def _random_records(n, seed):
+    rng = random.Random(seed)
+    records = []
+    for i in range(n):
+        a = rng.randint(1, 400)
+        b = rng.randint(a, min(9999, a + rng.randint(0, 150)))
+        ver = f"{rng.randint(0, 2)}.{rng.randint(0, 3)}.{rng.randint(0, 3)}"
+        records.append({"version": ver, "effectivity": f"{a:04d}-{b:04d}", "eco": f"ECO-{i:06d}"})
+    return records
+
+@pytest.mark.parametrize("seed", range(5))
+def test_index_matches_linear_selection(seed):
+    records = _random_records(60, seed)
+    index = RoutingIndex(records)
+    for seq in range(0, 600):
+        assert index.resolve_seq(seq) is _linear_pick(records, seq)
+
+def test_resolve_many_matches_resolve():
+    records = _random_records(80, 42)
+    index = RoutingIndex(records)
+    pids = [f"JAG-{n:04d}" for n in random.Random(1).sample(range(1, 600), 200)]
+    bulk = index.resolve_many(pids)
+    for pid in pids:
+        expected = _linear_pick(records, int(pid[-4:]))
+        assert bulk[pid] is expected
+
+def test_get_routing_for_master_data():
+    records = json.loads(MASTER_ROUTING.read_text())["masterRoutingRecord"]
+    assert get_routing_for("JAG-0007", records)["version"] == "0.1.0"
+    with pytest.raises(LookupError):
+        get_routing_for("JAG-9999", records)
+
+def test_routing_store_compiles_once_per_attachment_version():
+    with FakeJira() as jira:
+        jira.add_issue("POPS-2633", attachments=[synthetic_master_routing(5)])
+        client = jira.client(master_routing_issue_key="POPS-2633")
+        store = RoutingStore(ttl=0)
+        first = store.get(client).index
+        # revalidated, not re-downloaded or recompiled
+        assert store.get(client).index is first
+        assert jira.requests["GET attachment"] == 1
+
+        jira.add_attachment("POPS-2633", synthetic_master_routing(3))
+        second = store.get(client).index
+        assert second is not first
+        assert len(second.records) == 3
+
+@pytest.mark.parametrize("seed", range(3))
+def test_coverage_lists_every_covering_record_winner_first(seed):
+    records = _random_records(40, seed)
+    index = RoutingIndex(records)
+    covered = {}
+    for start, end, positions in index.coverage():
+        for seq in range(start, end + 1):
+            covered[seq] = positions
+    for seq in range(0, 600):
+        expected = [i for i, rec in enumerate(records)
+                    if int(rec["effectivity"][:4]) <= seq <= int(rec["effectivity"][5:])]
+        if not expected:
+            assert seq not in covered
+            continue
+        assert sorted(covered[seq]) == expected
+        assert records[covered[seq][0]] is index.resolve_seq(seq)
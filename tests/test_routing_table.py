@@ -0,0 +1,56 @@
+import json, pytest
+from fake_jira import synthetic_master_routing
+from jira_tools.utils.routing_index import RoutingIndex
+from jira_tools.utils.routing_table import RoutingTable, build_routing_table, routing_digest, verify_routing_table
+
+@pytest.fixture
+def doc():
+    return synthetic_master_routing(60, span=2000)
+
+SOURCE_SHA = "ab" * 32
+
+def test_table_matches_index(tmp_path, doc):
+    path = tmp_path / "routing.rtab"
+    digest = build_routing_table(doc, path, SOURCE_SHA)
+    records = doc["masterRoutingRecord"]
+    table = RoutingTable(path).bind(records, SOURCE_SHA)
+    assert table.digest == digest == routing_digest(records)
+    assert table.metadata["versions"] == [r["version"] for r in records]
+    index = RoutingIndex(records)
+    for seq in range(0, 10000, 7):
+        assert table.resolve_seq(seq) is index.resolve_seq(seq)
+    assert table.resolve("JAG-0007") is index.resolve("JAG-0007")
+    with pytest.raises(LookupError):
+        table.resolve("JAG-2500")
+
+def test_bind_rejects_other_sources(tmp_path, doc):
+    path = tmp_path / "routing.rtab"
+    build_routing_table(doc, path, SOURCE_SHA)
+    records = doc["masterRoutingRecord"]
+    with pytest.raises(ValueError):
+        RoutingTable(path).bind(records, "cd" * 32)
+    with pytest.raises(ValueError):
+        RoutingTable(path).bind(records[:-1], SOURCE_SHA)
+    # a table compiled from records in memory has no source to bind to
+    build_routing_table(doc, tmp_path / "unbound.rtab")
+    with pytest.raises(ValueError):
+        RoutingTable(tmp_path / "unbound.rtab").bind(records, SOURCE_SHA)
+
+def test_verify_compares_records(tmp_path, doc):
+    path = tmp_path / "routing.rtab"
+    build_routing_table(doc, path)
+    # key order does not matter, content does
+    reordered = json.loads(json.dumps(doc, sort_keys=True))
+    assert verify_routing_table(RoutingTable(path), doc) == []
+    assert verify_routing_table(RoutingTable(path), reordered) == []
+    changed = json.loads(json.dumps(doc))["masterRoutingRecord"]
+    changed[3]["version"] = "9.9.9"
+    problems = verify_routing_table(RoutingTable(path), changed)
+    assert any("digest" in p for p in problems)
+    assert any("different record" in p for p in problems)
+
+def test_rejects_non_table(tmp_path):
+    path = tmp_path / "junk.rtab"
+    path.write_bytes(b"not a table at all, definitely not" * 3)
+    with pytest.raises(ValueError):
+        RoutingTable(path)
@@ -0,0 +1,72 @@
+import pytest
+from app.api import create_app
+from app.warmup import warm_caches, warmup_state
+from fake_jira import FakeJira, synthetic_master_robot_record, synthetic_master_routing
+from jira_tools.services import robot_lookup, routing
+from jira_tools.utils import metrics
+
+@pytest.fixture(autouse=True)
+def cold_caches():
+    # the routes hold the process-wide singletons, so reset them rather than swapping them out
+    robot_lookup.ROBOT_INDEX.invalidate()
+    routing.ROUTING_STORE.invalidate()
+
+def _app(jira, **config):
+    client = jira.client(master_robot_issue_key="POPS-2632", master_routing_issue_key="POPS-2633")
+    app = create_app(jira_client=client)
+    app.config.update(config)
+    return app
+
+def test_readyz_goes_green_once_master_data_is_warm():
+    with FakeJira() as jira:
+        jira.add_issue("POPS-2632", attachments=[synthetic_master_robot_record(50)])
+        jira.add_issue("POPS-2633", attachments=[synthetic_master_routing(5)])
+        app = _app(jira)
+        assert warm_caches(app)
+        downloads = jira.requests["GET attachment"]
+        body = app.test_client().get("/readyz")
+        assert body.status_code == 200 and body.get_json()["ready"] is True
+        # the scan path is served from the warm caches
+        resp = app.test_client().post("/v1/robots/resolve", json={"rin": "BC033W000001XX"})
+        assert resp.get_json() == {"robotPid": "JAG-0001"}
+        assert jira.requests["GET attachment"] == downloads
+        # warmup compiled the routing index; the store serves it without another download
+        assert routing.ROUTING_STORE.get(app.extensions["jira_client"]).index is not None
+        assert jira.requests["GET attachment"] == downloads
+
+def test_readyz_reports_failure_and_retries():
+    with FakeJira() as jira:
+        app = _app(jira, READY_RETRY_SECONDS=0)
+        assert not warm_caches(app)
+        resp = app.test_client().get("/readyz")
+        assert resp.status_code == 503
+        assert "JiraHttpError" in resp.get_json()["error"]
+
+        # master data shows up; the next readiness probe warms the process
+        jira.add_issue("POPS-2632", attachments=[synthetic_master_robot_record(5)])
+        jira.add_issue("POPS-2633", attachments=[synthetic_master_routing(2)])
+        assert app.test_client().get("/readyz").status_code == 200
+        assert warmup_state(app).error is None
+
+def test_warmup_keeps_the_shared_client_open(monkeypatch):
+    with FakeJira() as jira:
+        app = _app(jira)
+        client = app.extensions["jira_client"]
+        closed = []
+        monkeypatch.setattr(client, "close", lambda: closed.append(True))
+        warm_caches(app)
+        # a /readyz retry in a serving worker must not drop the pool its requests use
+        assert closed == []
+
+def test_post_fork_without_a_client_does_not_build_one(monkeypatch, tmp_path):
+    monkeypatch.setenv("API_PRELOAD_MASTER_DATA", "0")
+    import app.gunicorn_conf as gunicorn_conf
+    import app.wsgi
+    monkeypatch.setattr(gunicorn_conf, "_METRICS_DIR", str(tmp_path))
+    monkeypatch.setattr(metrics.REGISTRY, "_shared", None)
+    app.wsgi.app.extensions.pop("jira_client", None)
+    def no_credentials(*args, **kwargs):
+        raise RuntimeError("no Jira credentials")
+    monkeypatch.setattr("app.jira.JiraClient", no_credentials)
+    gunicorn_conf.post_fork(None, None)
+    assert "jira_client" not in app.wsgi.app.extensions
@@ -0,0 +1,77 @@
+import asyncio
+import threading
+import time
+import pytest
+from fake_jira import FakeJira, synthetic_master_robot_record
+from jira_tools.utils.singleflight import SingleFlight
+
+def test_concurrent_identical_gets_share_one_call():
+    with FakeJira(latency=0.05) as jira:
+        jira.add_issue("POPS-2632", attachments=[synthetic_master_robot_record(100)])
+        client = jira.client()
+        barrier = threading.Barrier(8)
+        results = []
+
+        def scan():
+            barrier.wait()
+            results.append(client.get_nth_attachment(0, "POPS-2632"))
+
+        threads = [threading.Thread(target=scan) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    assert len(results) == 8 and all(r is results[0] for r in results)
+    assert jira.requests == {"GET issue": 1, "GET attachment": 1}
+    assert client.single_flight.deduplicated == 14
+
+def test_sequential_calls_are_not_cached():
+    with FakeJira() as jira:
+        jira.add_issue("POPS-2632", attachments=[synthetic_master_robot_record(10)])
+        client = jira.client()
+        client.get_attachments("POPS-2632")
+        client.get_attachments("POPS-2632")
+    assert jira.requests["GET issue"] == 2
+
+def test_error_is_shared_with_waiters():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    errors = []
+
+    def fail():
+        started.set()
+        release.wait()
+        raise ValueError("boom")
+
+    def call():
+        try:
+            flight.do("k", fail)
+        except ValueError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=call)
+    follower.start()
+    while flight.deduplicated == 0:
+        time.sleep(0.001)
+    release.set()
+    leader.join()
+    follower.join()
+    assert len(errors) == 2 and flight.executed == 1
+
+def test_async_identical_gets_share_one_call():
+    pytest.importorskip("httpx")
+
+    async def main(jira):
+        async with jira.async_client() as client:
+            docs = await asyncio.gather(*(client.get_nth_attachment(0, "POPS-2632") for _ in range(8)))
+            return docs, client.single_flight.deduplicated
+
+    with FakeJira(latency=0.05) as jira:
+        jira.add_issue("POPS-2632", attachments=[synthetic_master_robot_record(100)])
+        docs, deduplicated = asyncio.run(main(jira))
+    assert all(d is docs[0] for d in docs)
+    assert jira.requests == {"GET issue": 1, "GET attachment": 1}
+    assert deduplicated == 14
@@ -0,0 +1,185 @@
+import gzip, json, posixpath, re, struct, zlib, pytest
+from pathlib import Path
+from app.api import create_app
+from jira_tools.services import image_derivatives
+from jira_tools.services.image_derivatives import IMAGES_MANIFEST, ImagePipeline
+from jira_tools.services.standard_work import MANIFEST, SiteBuilder, build_site
+
+def _png(rgb):
+    """A valid 1x1 RGB PNG, so the real image pipeline can decode it."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(b"\x00" + bytes(rgb))) + chunk(b"IEND", b""))
+
+PNG = _png((200, 40, 40))
+
+@pytest.fixture
+def source(tmp_path):
+    src = tmp_path / "standard_work"
+    (src / "jaeger" / "img").mkdir(parents=True)
+    (src / "jaeger" / "bom").mkdir()
+    (src / "jaeger" / "img" / "base rails.png").write_bytes(PNG)
+    (src / "jaeger" / "bom" / "base.csv").write_text("part,qty\n" + "M4 bolt,4\n" * 40)
+    (src / "jaeger" / "base.md").write_text(
+        "# Base\n\n## Parts\n\n- [BOM](bom/base.csv)\n\n## Steps\n\n"
+        "![rails](<img/base rails.png>)\n\nNext: [tower](tower.md#parts), [gone](img/gone.png)\n"
+        + "\nfiller text for compression.\n" * 20
+    )
+    (src / "jaeger" / "tower.md").write_text(
+        "# Tower\n\n## Parts\n\nBack to [base](base.md).\n\n- [Install rails](<img/base rails.png>)\n")
+    return src
+
+def test_build_hashes_assets_and_links_pages(source, tmp_path):
+    out = tmp_path / "site"
+    manifest = build_site(source, out)
+    assert manifest["pages"] == {"jaeger/base.md": "jaeger/base.html", "jaeger/tower.md": "jaeger/tower.html"}
+    png = manifest["assets"]["jaeger/img/base rails.png"]
+    assert png.startswith("assets/jaeger/img/base rails.") and png.endswith(".png")
+    assert (out / png).read_bytes() == PNG
+    assert manifest["missing"] == ["jaeger/base.md: img/gone.png"]
+
+    page = (out / "jaeger" / "base.html").read_text()
+    assert 'src="../assets/jaeger/img/base%20rails.' in page
+    assert 'href="tower.html#parts"' in page
+    assert '<nav class="toc">' in page and '<a href="#steps">Steps</a>' in page
+    assert gzip.decompress((out / "jaeger" / "base.html.gz").read_bytes()) == page.encode()
+    csv = manifest["assets"]["jaeger/bom/base.csv"]
+    assert (out / (csv + ".gz")).exists()
+    assert not (out / (png + ".gz")).exists()  # images are already compressed
+    assert json.loads((out / MANIFEST).read_text())["assets"] == manifest["assets"]
+
+def test_rebuild_is_incremental_and_prunes(source, tmp_path):
+    out = tmp_path / "site"
+    first = build_site(source, out)
+    index = (out / "index.html").stat().st_mtime_ns
+    (source / "jaeger" / "img" / "base rails.png").write_bytes(_png((40, 40, 200)))
+    second = build_site(source, out)
+
+    old_png, new_png = first["assets"]["jaeger/img/base rails.png"], second["assets"]["jaeger/img/base rails.png"]
+    assert old_png != new_png
+    assert not (out / old_png).exists() and (out / new_png).exists()
+    assert new_png.rsplit("/", 1)[1].replace(" ", "%20") in (out / "jaeger" / "base.html").read_text()
+    # pages that did not change are not rewritten
+    assert (out / "index.html").stat().st_mtime_ns == index
+
+def _fake_derive(src, out, name, widths=image_derivatives.WIDTHS):
+    """Stands in for Pillow: writes placeholder variants of an 800x600 image."""
+    base, ext = posixpath.splitext(name)
+    variants = [
+        {"path": f"{base}.w320{ext}", "width": 320, "type": "image/png"},
+        {"path": f"{base}.w320.webp", "width": 320, "type": "image/webp"},
+        {"path": f"{base}.webp", "width": 800, "type": "image/webp"},
+    ]
+    for v in variants:
+        (Path(out) / v["path"]).parent.mkdir(parents=True, exist_ok=True)
+        (Path(out) / v["path"]).write_bytes(b"derived")
+    return {"version": image_derivatives.PIPELINE_VERSION, "width": 800, "height": 600, "variants": variants}
+
+@pytest.fixture
+def fake_pillow(monkeypatch):
+    monkeypatch.setattr(image_derivatives, "_pillow", lambda: object())
+    monkeypatch.setattr(image_derivatives, "derive_image", _fake_derive)
+
+def test_images_get_srcset_and_are_derived_incrementally(source, tmp_path, fake_pillow):
+    out = tmp_path / "site"
+    builder = SiteBuilder(source, out, jobs=1)
+    manifest = builder.build()
+    assert (builder.image_pipeline.derived, builder.image_pipeline.reused) == (1, 0)
+    png = manifest["assets"]["jaeger/img/base rails.png"]
+    base = png[:-4].rsplit("/", 1)[1].replace(" ", "%20")
+    page = (out / "jaeger" / "base.html").read_text()
+    assert (f'<picture><source type="image/webp" srcset="../assets/jaeger/img/{base}.w320.webp 320w, '
+            f'../assets/jaeger/img/{base}.webp 800w"') in page
+    assert f'srcset="../assets/jaeger/img/{base}.w320.png 320w, ../assets/jaeger/img/{base}.png 800w"' in page
+    assert 'width="800" height="600" alt="rails"' in page
+    # a link to the image (how the real instructions show screenshots) opens the display-sized WebP
+    tower = (out / "jaeger" / "tower.html").read_text()
+    assert f'<a href="../assets/jaeger/img/{base}.webp">Install rails</a>' in tower
+    images = json.loads((out / IMAGES_MANIFEST).read_text())
+    assert list(images) == [png]
+
+    builder = SiteBuilder(source, out, jobs=1)
+    builder.build()
+    assert (builder.image_pipeline.derived, builder.image_pipeline.reused) == (0, 1)
+
+    (source / "jaeger" / "img" / "base rails.png").write_bytes(_png((40, 40, 200)))
+    builder = SiteBuilder(source, out, jobs=1)
+    builder.build()
+    assert (builder.image_pipeline.derived, builder.image_pipeline.reused) == (1, 0)
+    # variants of the old content are pruned with it
+    assert not any((out / v["path"]).exists() for v in images[png]["variants"])
+
+def test_real_instructions_link_display_sized_images(tmp_path, fake_pillow):
+    source = Path(__file__).resolve().parents[1] / "standard_work"
+    out = tmp_path / "site"
+    manifest = SiteBuilder(source, out, jobs=1).build()
+    page = (out / "jaeger-p2" / "base.html").read_text()
+    rails = manifest["assets"]["jaeger-p2/img/base-rails.png"]
+    assert rails[:-4].rsplit("/", 1)[1] + ".webp" in page
+    # every linked screenshot that exists opens a derived variant, never the full-size PNG
+    assert not re.search(r'href="[^"]*assets/[^"]*\.png"', page)
+    assert 'Install FN-31 battery rails' in page
+
+def test_images_without_pillow_stay_full_size(source, tmp_path, monkeypatch):
+    monkeypatch.setattr(image_derivatives, "_pillow", lambda: None)
+    out = tmp_path / "site"
+    builder = SiteBuilder(source, out, jobs=1)
+    builder.build()
+    assert builder.image_pipeline.skipped == 1 and builder.images == {}
+    page = (out / "jaeger" / "base.html").read_text()
+    assert "<picture>" not in page and 'loading="lazy" />' in page
+
+def test_pillow_derivatives(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    out = tmp_path / "site"
+    images = {}
+    for i in range(3):
+        src = tmp_path / f"shot{i}.png"
+        Image.new("RGB", (1000, 500), (i * 80, 20, 20)).save(src)
+        images[f"assets/img/shot{i}.abc{i}.png"] = src
+    pipeline = ImagePipeline(out, jobs=2)
+    result = pipeline.run(images)
+    assert pipeline.derived == 3
+    entry = result["assets/img/shot0.abc0.png"]
+    assert (entry["width"], entry["height"]) == (1000, 500)
+    assert [(v["width"], v["type"]) for v in entry["variants"]] == [
+        (320, "image/png"), (320, "image/webp"), (640, "image/png"), (640, "image/webp"), (1000, "image/webp")]
+    with Image.open(out / "assets/img/shot0.abc0.w640.webp") as im:
+        assert im.size == (640, 320)
+    again = ImagePipeline(out, jobs=2)
+    assert again.run(images) == result and again.reused == 3
+
+@pytest.fixture
+def api(source, tmp_path):
+    out = tmp_path / "site"
+    build_site(source, out)
+    app = create_app()
+    app.config["STANDARD_WORK_SITE_DIR"] = str(out)
+    return app.test_client()
+
+def test_serves_pages_and_immutable_assets(api, tmp_path):
+    manifest = json.loads((tmp_path / "site" / MANIFEST).read_text())
+    index = api.get("/sw/")
+    assert index.status_code == 200 and b"jaeger/base.html" in index.data
+
+    page = api.get("/sw/jaeger/base.html")
+    assert page.mimetype == "text/html" and page.headers["Cache-Control"] == "no-cache"
+    assert page.headers.get("Content-Encoding") is None
+    assert api.get("/sw/jaeger/base.html", headers={"If-None-Match": page.headers["ETag"]}).status_code == 304
+
+    css = api.get("/sw/" + manifest["assets"]["assets/site.css"])
+    assert css.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+    png = api.get("/sw/" + manifest["assets"]["jaeger/img/base rails.png"])
+    assert png.status_code == 200 and png.mimetype == "image/png"
+
+def test_serves_precompressed(api):
+    resp = api.get("/sw/jaeger/base.html", headers={"Accept-Encoding": "gzip, deflate"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert resp.mimetype == "text/html"
+    assert b"<h1 id=\"base\">Base</h1>" in gzip.decompress(resp.data)
+
+def test_hidden_and_unknown_paths(api):
+    for path in ("/sw/manifest.json", "/sw/images.json", "/sw/jaeger/base.html.gz", "/sw/nope.html", "/sw/../secret"):
+        assert api.get(path).status_code == 404
@@ -3,13 +3,23 @@
 mroute_validator.py — Strict validator for Master Routing Record (MRoute) JSON.
 
 Usage:
-  python mroute_validator_strict.py /path/to/master_routing_record.json [--robot-id JAG-0007] [--strict] [--debug]
+  python mroute_validator_strict.py /path/to/master_routing_record.json [--robot-id JAG-0007 ...] [--strict] [--debug]
+                                    [--stream] [--jobs N] [--report] [--table FILE.rtab] [--json]
 
 Behavior:
  - Strict by default: schema must match exactly; no silent coercions.
  - Overlapping effectivity ranges are allowed.
  - Applicability for --robot-id is chosen by highest semantic version only (releasedAt ignored).
+   Repeat --robot-id to resolve several robots in one sweep.
  - --debug prints key fields and types to help diagnose issues without relaxing validation.
+ - --stream validates masterRoutingRecord entries as they are parsed, keeping only the
+   fields needed for applicability in memory; --jobs N validates batches in N processes.
+ - --report adds a sweep-line analysis of all effectivity ranges: the winning version for
+   every segment, overlaps (segments covered by several records), gaps in 0001-9999, and
+   records that never win anywhere.
+ - --table checks that a compiled applicability table (`mes-snapshot routing-table`) was built
+   from this file and selects the same record for every robot sequence number.
+ - --json prints one machine-readable JSON object instead of text (same exit codes).
 
 Exit codes:
   0 valid, 1 invalid (schema/semantics), 2 file read error, 3 JSON parse error
@@ -19,14 +29,36 @@ import re
 import sys
 import json
 import argparse
-from typing import Any, Dict, List, Tuple, Optional
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Optional
+from pathlib import Path
 from urllib.parse import urlparse
 
+try:
+    from jira_tools.utils.routing_index import RoutingIndex
+    from jira_tools.utils.routing_table import RoutingDigest, RoutingTable, verify_routing_table
+except ImportError:
+    # running as a plain script from a checkout without `pip install -e .`
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from jira_tools.utils.routing_index import RoutingIndex
+    from jira_tools.utils.routing_table import RoutingDigest, RoutingTable, verify_routing_table
+
 SEMVER_RE = re.compile(r"^[0-9]+\.[0-9]+\.[0-9]+$")
 SCHEMAVER_RE = re.compile(r"^[0-9]+\.[0-9]+$")
 EFFECTIVITY_RE = re.compile(r"^(?P<start>[0-9]{4})-(?P<end>[0-9]{4})$")
 EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 ROBOT_ID_RE = re.compile(r"^[A-Za-z]+-(?P<num>[0-9]{4})$")
+_WS_RE = re.compile(r"[ \t\n\r]*")
+# what may still follow the digits read so far, e.g. "17423" of "17423.75" or "1.5" of "1.5e+3"
+_NUMBER_TAIL_RE = re.compile(r"[0-9.eE+-]*\Z")
+
+# robot sequence numbers an effectivity range can cover; gaps are reported within this span
+SEQ_MIN, SEQ_MAX = 1, 9999
+# fields kept per record once it is validated (enough for applicability and the report)
+_SUMMARY_FIELDS = ("version", "effectivity", "eco", "releasedBy")
+# records per validation task
+BATCH_SIZE = 256
 
 def _type_val(v):
     return f"({type(v).__name__}) {v!r}"
@@ -147,34 +179,206 @@ def validate_top_level(doc: Dict[str, Any]) -> List[str]:
 
     return errs
 
-def semver_tuple(v: str) -> Tuple[int, int, int]:
-    try:
-        x, y, z = (int(p) for p in v.split("."))
-        return x, y, z
-    except Exception:
-        return (0, 0, 0)
+class StreamError(ValueError):
+    """The file is not valid JSON, or not an object the streaming reader can walk."""
+
+class _JsonStream:
+    """Decodes JSON values one at a time from a file, holding only a sliding window of its text."""
+    def __init__(self, f, chunk_size: int):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _more(self) -> bool:
+        if self._eof:
+            return False
+        data = self._f.read(self._chunk_size)
+        if not data:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at end of file)."""
+        while True:
+            self._pos = _WS_RE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._more():
+                return ""
+
+    def expect(self, ch: str) -> None:
+        if self.peek() != ch:
+            raise StreamError(f"expected '{ch}'")
+        self._pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                val, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as e:
+                # most likely cut off at the end of the window
+                if self._more():
+                    continue
+                raise StreamError(str(e)) from e
+            # a number cut off by the end of the window decodes as a shorter number (or leaves
+            # its "." or exponent behind); decode it again with the next chunk
+            if (isinstance(val, (int, float)) and not isinstance(val, bool)
+                    and _NUMBER_TAIL_RE.match(self._buf, end) and self._more()):
+                continue
+            self._pos = end
+            return val
+
+def iter_routing_records(path: str, top: Dict[str, Any], chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """
+    Yield the masterRoutingRecord entries of a routing file as they are parsed.
+    Every other top-level member is stored in `top`. When masterRoutingRecord is an array,
+    `top["masterRoutingRecord"]` is set to an empty list for callers to fill with whatever they
+    kept of the records; any other value is stored as-is, and a missing key stays missing.
+    Raises:
+        StreamError: invalid JSON, or a top level the stream cannot walk (e.g. not an object)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        s = _JsonStream(f, chunk_size)
+        s.expect("{")
+        if s.peek() == "}":
+            s.expect("}")
+        else:
+            while True:
+                key = s.value()
+                if not isinstance(key, str):
+                    raise StreamError("object keys must be strings")
+                s.expect(":")
+                if key == "masterRoutingRecord" and s.peek() == "[":
+                    top[key] = []
+                    s.expect("[")
+                    if s.peek() == "]":
+                        s.expect("]")
+                    else:
+                        while True:
+                            yield s.value()
+                            if s.peek() != ",":
+                                break
+                            s.expect(",")
+                        s.expect("]")
+                else:
+                    top[key] = s.value()
+                if s.peek() != ",":
+                    break
+                s.expect(",")
+            s.expect("}")
+        if s.peek() != "":
+            raise StreamError("extra data after the top-level object")
+
+def _summary(rec: Any) -> Any:
+    if not isinstance(rec, dict):
+        return rec
+    return {k: rec[k] for k in _SUMMARY_FIELDS if k in rec}
+
+def _validate_batch(batch: Tuple[int, List[Any]]) -> List[str]:
+    start, records = batch
+    errs: List[str] = []
+    for offset, rec in enumerate(records):
+        errs.extend(validate_record(rec, start + offset))
+    return errs
+
+def _batches(records: Iterable[Any], kept: List[Any]) -> Iterator[Tuple[int, List[Any]]]:
+    """(first index, records) batches; the summary of every record is appended to `kept`."""
+    batch: List[Any] = []
+    for rec in records:
+        batch.append(rec)
+        kept.append(_summary(rec))
+        if len(batch) == BATCH_SIZE:
+            yield len(kept) - len(batch), batch
+            batch = []
+    if batch:
+        yield len(kept) - len(batch), batch
+
+def validate_records(records: Iterable[Any], jobs: int = 1) -> Tuple[List[str], List[Any]]:
+    """
+    Validate routing records in order, consuming `records` lazily.
+    With jobs > 1, batches are validated in a process pool while parsing continues;
+    errors are still reported in record order.
+    Returns (errors, per-record summaries with the fields applicability needs).
+    """
+    kept: List[Any] = []
+    errs: List[str] = []
+    if jobs <= 1:
+        for batch in _batches(records, kept):
+            errs.extend(_validate_batch(batch))
+        return errs, kept
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        # bounded window, so a huge file is never fully parsed ahead of validation
+        pending = deque()
+        for batch in _batches(records, kept):
+            pending.append(pool.submit(_validate_batch, batch))
+            if len(pending) >= 2 * jobs:
+                errs.extend(pending.popleft().result())
+        while pending:
+            errs.extend(pending.popleft().result())
+    return errs, kept
+
+def _record_ref(records: List[Any], pos: int) -> Dict[str, Any]:
+    rec = records[pos]
+    return {"index": pos, "version": rec.get("version"), "effectivity": rec.get("effectivity"), "eco": rec.get("eco")}
+
+def effectivity_report(records: List[Any], index: Optional[RoutingIndex] = None) -> Dict[str, Any]:
+    """
+    Sweep-line analysis of all effectivity ranges, in one pass over their endpoints.
+    Returns:
+        segments: every maximal range with the same covering records, with its winner
+        overlaps: segments covered by more than one record (all of them, winner first)
+        gaps:     ranges in 0001-9999 no record covers
+        shadowed: records that apply nowhere, because higher versions cover their whole range
+    """
+    index = index or RoutingIndex(records)
+    coverage = index.coverage()
+    segments, overlaps, gaps = [], [], []
+    winners = set()
+    prev_end = SEQ_MIN - 1
+    for start, end, positions in coverage:
+        if start > prev_end + 1:
+            gaps.append({"start": prev_end + 1, "end": start - 1})
+        prev_end = end
+        winners.add(positions[0])
+        segments.append({"start": start, "end": end, "winner": _record_ref(records, positions[0]),
+                         "candidates": len(positions)})
+        if len(positions) > 1:
+            overlaps.append({"start": start, "end": end, "records": [_record_ref(records, p) for p in positions]})
+    if prev_end < SEQ_MAX:
+        gaps.append({"start": prev_end + 1, "end": SEQ_MAX})
+    covering = {p for _, _, positions in coverage for p in positions}
+    shadowed = [_record_ref(records, p) for p in sorted(covering - winners)]
+    return {"segments": segments, "overlaps": overlaps, "gaps": gaps, "shadowed": shadowed}
+
+def applicable_records(records: List[Any], robot_ids: Iterable[str],
+                       index: Optional[RoutingIndex] = None) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Applicable record for every robot id, from one sweep over the compiled segments.
+    Raises:
+        ValueError: a robot id is not like PREFIX-0001
+    """
+    robot_ids = list(robot_ids)
+    for robot_id in robot_ids:
+        extract_robot_seq(robot_id)
+    return (index or RoutingIndex(records)).resolve_many(robot_ids)
 
-def applicable_record(records: List[Dict[str, Any]], robot_id: str) -> Optional[Dict[str, Any]]:
+def applicable_record(records: List[Dict[str, Any]], robot_id: str,
+                      index: Optional[RoutingIndex] = None) -> Optional[Dict[str, Any]]:
     """
     Pick the applicable routing solely by highest semantic version among
     records whose effectivity covers the robotId's numeric segment.
+    Selection is delegated to RoutingIndex so it matches the routing service exactly;
+    pass `index` when resolving several ids against the same records.
     """
-    seq = extract_robot_seq(robot_id)
-    candidates = []
-    for rec in records:
-        eff = rec.get("effectivity", "")
-        if not isinstance(eff, str) or not EFFECTIVITY_RE.match(eff):
-            continue
-        a, b = parse_effectivity(eff)
-        if a <= seq <= b:
-            ver = rec.get("version") if isinstance(rec.get("version"), str) else "0.0.0"
-            candidates.append((semver_tuple(ver), rec))
-
-    if not candidates:
-        return None
-
-    candidates.sort(key=lambda x: x[0], reverse=True)
-    return candidates[0][1]
+    return applicable_records(records, [robot_id], index)[robot_id]
 
 def validate_document(doc: Dict[str, Any], robot_id: str = None):
     errs = validate_top_level(doc)
@@ -191,6 +395,77 @@ def validate_document(doc: Dict[str, Any], robot_id: str = None):
 
     return errs, chosen
 
+def _digesting(records: Iterable[Any], digest: Optional[RoutingDigest]) -> Iterator[Any]:
+    for rec in records:
+        if digest is not None:
+            digest.update(rec)
+        yield rec
+
+def check_file(path: str, robot_ids: Iterable[str] = (), stream: bool = False, jobs: int = 1,
+               report: bool = False, debug: bool = False, table: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Validate a routing file and resolve `robot_ids` against it.
+    `table` is a compiled applicability table to check against the file.
+    Returns { valid, errors, records, applicable: {robotId: record summary | None}, report? }.
+    Raises:
+        OSError: the file cannot be read
+        json.JSONDecodeError: the file is not valid JSON
+    """
+    doc: Any = None
+    digest: Optional[RoutingDigest] = None
+    if stream:
+        top: Dict[str, Any] = {}
+        digest = RoutingDigest() if table else None
+        try:
+            errs, records = validate_records(_digesting(iter_routing_records(path, top), digest), jobs)
+            # a missing or non-array masterRoutingRecord stays as it was, for validate_top_level
+            if isinstance(top.get("masterRoutingRecord"), list):
+                top["masterRoutingRecord"] = records
+            doc = top
+        except StreamError:
+            # not walkable as a stream: the in-memory path reports the exact problem
+            doc = None
+    if doc is None:
+        with open(path, "r", encoding="utf-8") as f:
+            doc = json.loads(f.read())
+        mrr = doc.get("masterRoutingRecord") if isinstance(doc, dict) else None
+        digest = RoutingDigest() if table else None
+        errs, records = validate_records(_digesting(mrr if isinstance(mrr, list) else [], digest), jobs)
+
+    if debug:
+        rec0 = records[0] if records else None
+        print("[DEBUG] schemaVersion:", _type_val(doc.get("schemaVersion") if isinstance(doc, dict) else None))
+        if isinstance(rec0, dict):
+            print("[DEBUG] version:", _type_val(rec0.get("version")))
+            print("[DEBUG] releasedBy:", _type_val(rec0.get("releasedBy")))
+        else:
+            print("[DEBUG] first record missing or not an object")
+
+    errs = validate_top_level(doc) + errs
+    result: Dict[str, Any] = {"valid": False, "errors": errs, "records": len(records), "applicable": {}}
+    robot_ids = list(robot_ids)
+    index = RoutingIndex(records) if records and (robot_ids or report) else None
+    if robot_ids and index is not None:
+        try:
+            chosen = applicable_records(records, robot_ids, index)
+        except ValueError as e:
+            errs.append(f"--robot-id: {e}")
+            chosen = {}
+        for robot_id, rec in chosen.items():
+            if rec is None:
+                errs.append(f"--robot-id {robot_id}: not covered by any effectivity range")
+        result["applicable"] = {robot_id: _summary(rec) for robot_id, rec in chosen.items()}
+    if report and index is not None:
+        result["report"] = effectivity_report(records, index)
+    if table:
+        try:
+            problems = verify_routing_table(RoutingTable(table), records, digest.hexdigest())
+        except (OSError, ValueError) as e:
+            problems = [str(e)]
+        errs.extend(f"--table {table}: {p}" for p in problems)
+    result["valid"] = not errs
+    return result
+
 def show_json_parse_error(path: str, e):
     # e is a json.JSONDecodeError with lineno, colno, pos
     try:
@@ -207,43 +482,62 @@ def show_json_parse_error(path: str, e):
     except Exception:
         print("ERROR: invalid JSON:", e)
 
+def _print_report(report: Dict[str, Any]) -> None:
+    def rng(seg):
+        return f"{seg['start']:04d}-{seg['end']:04d}"
+    print(f"SEGMENTS ({len(report['segments'])}):")
+    for seg in report["segments"]:
+        w = seg["winner"]
+        print(f"  {rng(seg)} → version={w['version']}, eco={w.get('eco') or ''} "
+              f"[record {w['index']}, {seg['candidates']} candidate(s)]")
+    print(f"OVERLAPS ({len(report['overlaps'])}):")
+    for seg in report["overlaps"]:
+        print(f"  {rng(seg)}: " + ", ".join(f"{r['version']} (record {r['index']})" for r in seg["records"]))
+    print(f"GAPS ({len(report['gaps'])}):")
+    for seg in report["gaps"]:
+        print(f"  {rng(seg)}")
+    print(f"SHADOWED ({len(report['shadowed'])}):")
+    for r in report["shadowed"]:
+        print(f"  record {r['index']}: version={r['version']}, effectivity={r['effectivity']}")
+
 def main():
     ap = argparse.ArgumentParser(description="Validate a Master Routing Record JSON.")
     ap.add_argument("file", help="Path to master_routing_record.json")
     ap.add_argument("--strict", action="store_true", help="(kept for compatibility; validation is strict by default)")
-    ap.add_argument("--robot-id", help="Select the applicable routing for this robotId (e.g., JAG-0007)")
+    ap.add_argument("--robot-id", action="append", default=[],
+                    help="Select the applicable routing for this robotId (e.g., JAG-0007); repeatable")
     ap.add_argument("--debug", action="store_true", help="Print key fields/types for diagnostics")
+    ap.add_argument("--stream", action="store_true", help="Validate records as they are parsed (bounded memory)")
+    ap.add_argument("--jobs", type=int, default=1, help="Validate records in N processes (default 1)")
+    ap.add_argument("--report", action="store_true", help="Add the overlap/gap/winner analysis of effectivity ranges")
+    ap.add_argument("--table", help="Check a compiled routing applicability table (.rtab) against the file")
+    ap.add_argument("--json", action="store_true", help="Print a machine-readable JSON result")
     args = ap.parse_args()
 
     try:
-        with open(args.file, "r", encoding="utf-8") as f:
-            text = f.read()
-    except Exception as e:
-        print(f"ERROR: could not read file: {e}", file=sys.stderr)
-        sys.exit(2)
-
-    try:
-        doc = json.loads(text)
+        result = check_file(args.file, args.robot_id, stream=args.stream, jobs=max(1, args.jobs), report=args.report,
+                            debug=args.debug and not args.json, table=args.table)
     except json.JSONDecodeError as e:
-        show_json_parse_error(args.file, e)
-        sys.exit(3)
-    except Exception as e:
-        print(f"ERROR: invalid JSON: {e}")
+        if args.json:
+            print(json.dumps({"valid": False, "errors": [f"invalid JSON: {e}"]}))
+        else:
+            show_json_parse_error(args.file, e)
         sys.exit(3)
-
-    if args.debug:
-        try:
-            rec0 = (doc.get("masterRoutingRecord") or [])[0]
-        except Exception:
-            rec0 = None
-        print("[DEBUG] schemaVersion:", _type_val(doc.get("schemaVersion")))
-        if isinstance(rec0, dict):
-            print("[DEBUG] version:", _type_val(rec0.get("version")))
-            print("[DEBUG] releasedBy:", _type_val(rec0.get("releasedBy")))
+    except (OSError, UnicodeDecodeError) as e:
+        if args.json:
+            print(json.dumps({"valid": False, "errors": [f"could not read file: {e}"]}))
         else:
-            print("[DEBUG] first record missing or not an object")
+            print(f"ERROR: could not read file: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        sys.exit(0 if result["valid"] else 1)
+
+    if result.get("report") is not None:
+        _print_report(result["report"])
 
-    errs, chosen = validate_document(doc, robot_id=args.robot_id)
+    errs = result["errors"]
     if errs:
         print("INVALID:")
         for i, msg in enumerate(errs, start=1):
@@ -251,12 +545,13 @@ def main():
         sys.exit(1)
 
     print("VALID ✅")
-    if chosen is not None:
+    for robot_id, chosen in result["applicable"].items():
         eff = chosen.get("effectivity")
         ver = chosen.get("version")
         eco = chosen.get("eco", "")
         rby = chosen.get("releasedBy", "")
-        print(f"APPLIES → version={ver}, effectivity={eff}, releasedBy={rby}, eco={eco}")
+        prefix = f"APPLIES ({robot_id})" if len(result["applicable"]) > 1 else "APPLIES"
+        print(f"{prefix} → version={ver}, effectivity={eff}, releasedBy={rby}, eco={eco}")
     sys.exit(0)
 
 if __name__ == "__main__":